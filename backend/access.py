@@ -0,0 +1,165 @@
+"""Authentication and ownership checks shared by the routes.
+
+``login_required`` resolves the session's user once per request into
+``g.user_id``. ``owns_lore_map`` and ``owns_event`` also load the lore map
+or event named in the URL and pass it to the view in place of the id,
+answering 404 when it isn't the user's.
+
+A map never changes owner, so "lore map M belongs to user U" is cached
+per process in a small TTL LRU, along with the user summary
+validate-session returns. A cached map is still loaded and its owner
+checked, so a row deleted (or an id reused) in another process within the
+TTL is caught rather than trusted. Deletes in this process evict their
+entries from the session's ``after_flush`` hook.
+
+Events aren't cached: checking a cached event's owner costs the same one
+query as the ownership join, which also loads the event's map.
+"""
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+
+from flask import g, jsonify, session
+from sqlalchemy import event as sa_event
+from sqlalchemy.orm import contains_eager
+
+from extensions import db
+from models import Event, LoreMap, User
+
+CACHE_SIZE = 4096
+CACHE_TTL = 300  # seconds
+
+
+class TTLCache:
+    """Thread-safe LRU whose entries also expire ``ttl`` seconds after being set."""
+
+    def __init__(self, maxsize, ttl):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            value, expires = entry
+            if expires < time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = (value, time.monotonic() + self.ttl)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def discard(self, *keys):
+        with self._lock:
+            for key in keys:
+                self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+_facts = TTLCache(CACHE_SIZE, CACHE_TTL)
+
+
+def current_user_id():
+    """The signed-in user's id, read from the session once per request."""
+    if 'user_id' not in g:
+        g.user_id = session.get('user_id')
+    return g.user_id
+
+
+def user_summary(user_id):
+    """``{"id", "username"}`` for a user, or None if the user no longer exists."""
+    key = ('user', user_id)
+    summary = _facts.get(key)
+    if summary is None:
+        username = db.session.query(User.username).filter(User.id == user_id).scalar()
+        if username is None:
+            return None
+        summary = {"id": user_id, "username": username}
+        _facts.set(key, summary)
+    return summary
+
+
+def load_lore_map(lore_map_id, user_id):
+    """The user's lore map, or None."""
+    key = ('lore_map', lore_map_id)
+    if _facts.get(key) == user_id:
+        lore_map = db.session.get(LoreMap, lore_map_id)
+        if lore_map is not None and lore_map.user_id == user_id:
+            return lore_map
+        _facts.discard(key)
+    lore_map = LoreMap.query.filter_by(id=lore_map_id, user_id=user_id).first()
+    if lore_map is not None:
+        _facts.set(key, user_id)
+    return lore_map
+
+
+def load_event(event_id, user_id):
+    """The event if it is on one of the user's lore maps, or None; its map comes loaded."""
+    event = Event.query.join(LoreMap).options(contains_eager(Event.lore_map)).filter(
+        Event.id == event_id, LoreMap.user_id == user_id
+    ).first()
+    if event is not None:
+        _facts.set(('lore_map', event.lore_map_id), user_id)
+    return event
+
+
+def forget(lore_map_ids):
+    """Evict ownership facts for deleted lore maps."""
+    _facts.discard(*[('lore_map', lore_map_id) for lore_map_id in lore_map_ids])
+
+
+@sa_event.listens_for(db.session, 'after_flush')
+def _forget_deleted(session, flush_context):
+    deleted = [obj.id for obj in session.deleted if isinstance(obj, LoreMap)]
+    if deleted:
+        forget(deleted)
+
+
+def login_required(view):
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        if not current_user_id():
+            return jsonify({"error": "Not authenticated"}), 401
+        return view(*args, **kwargs)
+    return wrapper
+
+
+def owns_lore_map(arg='lore_map_id', error="Lore map not found"):
+    """Replace the ``arg`` URL value with the user's ``lore_map``, or answer 404."""
+    def decorator(view):
+        @wraps(view)
+        @login_required
+        def wrapper(*args, **kwargs):
+            lore_map = load_lore_map(kwargs.pop(arg), g.user_id)
+            if lore_map is None:
+                return jsonify({"error": error}), 404
+            return view(*args, lore_map=lore_map, **kwargs)
+        return wrapper
+    return decorator
+
+
+def owns_event(arg='event_id', error="Event not found"):
+    """Replace the ``arg`` URL value with the user's ``event``, or answer 404."""
+    def decorator(view):
+        @wraps(view)
+        @login_required
+        def wrapper(*args, **kwargs):
+            event = load_event(kwargs.pop(arg), g.user_id)
+            if event is None:
+                return jsonify({"error": error}), 404
+            return view(*args, event=event, **kwargs)
+        return wrapper
+    return decorator
@@ -5,25 +5,31 @@ from werkzeug.security import generate_password_hash
 
 import config
 from extensions import db
+from jobs import init_app as init_jobs, run_jobs_command
+from migrations import ensure_schema, migrate_command
 from models import User
-from models.event import run_migrations
 from routes import all_blueprints
+from serializers import FastJSONProvider
+from srd_loader import load_srd_command
+from upload_store import gc_uploads_command
 
 # Initialize Flask app
 app = Flask(__name__)
 app.config.from_object(config)
+app.json = FastJSONProvider(app)
 
 # Create uploads directory if it doesn't exist
 os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
 
 # Initialize extensions
 db.init_app(app)
+init_jobs(app)
 
 # Configure CORS
 CORS(app,
      origins=config.FRONTEND_URLS,
-     allow_headers=['Content-Type', 'Authorization'],
-     expose_headers=['Set-Cookie'],
+     allow_headers=['Content-Type', 'Authorization', 'If-None-Match', 'If-Modified-Since', 'Range'],
+     expose_headers=['Set-Cookie', 'ETag', 'Accept-Ranges', 'Content-Range'],
      allow_methods=['GET', 'POST', 'PUT', 'DELETE', 'OPTIONS'],
      supports_credentials=True)
 
@@ -31,9 +37,15 @@ CORS(app,
 for bp in all_blueprints:
     app.register_blueprint(bp)
 
-# Run migrations on startup (works with gunicorn too)
+# Register CLI commands
+app.cli.add_command(migrate_command)
+app.cli.add_command(load_srd_command)
+app.cli.add_command(gc_uploads_command)
+app.cli.add_command(run_jobs_command)
+
+# Check the schema version on startup (works with gunicorn too)
 with app.app_context():
-    run_migrations(db)
+    ensure_schema(db.engine, app.config['AUTO_MIGRATE'])
 
 
 # Test endpoint
@@ -47,9 +59,6 @@ if __name__ == '__main__':
     port = int(os.environ.get('PORT', 5000))
 
     with app.app_context():
-        db.create_all()  # Create database tables
-        run_migrations(db)  # Add new columns to existing tables
-
         # Create a demo user if none exists (for testing)
         if not User.query.filter_by(username='demo').first():
             demo_user = User(
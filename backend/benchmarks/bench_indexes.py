@@ -0,0 +1,104 @@
+"""Latency of get_lore_map and get_characters with and without the lookup indexes.
+
+Seeds a throwaway SQLite database with 10k events and 50k characters, then
+times the endpoints through the Flask test client before and after
+the lookup-index migration creates them.
+
+    python benchmarks/bench_indexes.py
+"""
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+DB_PATH = os.path.join(tempfile.mkdtemp(), 'bench.db')
+os.environ['DATABASE_URL'] = f'sqlite:///{DB_PATH}'
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import app  # noqa: E402
+from extensions import db  # noqa: E402
+from migrations import v0005_lookup_indexes  # noqa: E402
+from migrations.v0005_lookup_indexes import INDEXES  # noqa: E402
+
+USERS = 10
+MAPS = 50
+EVENTS = 10_000
+CHARACTERS = 50_000
+OFFICIAL = 40_000
+ROUNDS = 20
+
+
+def seed():
+    with app.app_context():
+        conn = db.engine.raw_connection()
+        cur = conn.cursor()
+        cur.executemany(
+            'INSERT INTO user (id, username, email, password_hash) VALUES (?, ?, ?, ?)',
+            [(u, f'user{u}', f'user{u}@example.com', 'x') for u in range(1, USERS + 1)]
+        )
+        cur.executemany(
+            'INSERT INTO lore_map (id, title, user_id, version, created_at, updated_at) '
+            "VALUES (?, ?, ?, 0, '2024-01-01 00:00:00', '2024-01-01 00:00:00')",
+            [(m, f'Map {m}', (m % USERS) + 1) for m in range(1, MAPS + 1)]
+        )
+        cur.executemany(
+            'INSERT INTO event (id, title, lore_map_id, position_x, position_y, conditions, version) '
+            'VALUES (?, ?, ?, ?, ?, ?, 0)',
+            [(e, f'Event {e}', (e % MAPS) + 1, e % 97, e % 89, '[]') for e in range(1, EVENTS + 1)]
+        )
+        cur.executemany(
+            'INSERT INTO event_connection (from_event_id, to_event_id, version) VALUES (?, ?, 0)',
+            [(e, e + MAPS) for e in range(1, EVENTS - MAPS + 1)]
+        )
+        cur.executemany(
+            'INSERT INTO character (id, name, user_id, is_official, challenge_rating, actions) '
+            'VALUES (?, ?, ?, ?, ?, ?)',
+            [(c, f'Creature {c:06d}', None if c <= OFFICIAL else (c % USERS) + 1,
+              c <= OFFICIAL, str(c % 20), '[]') for c in range(1, CHARACTERS + 1)]
+        )
+        conn.commit()
+        conn.close()
+
+
+def drop_indexes():
+    with app.app_context():
+        for name, _, _ in INDEXES:
+            db.session.execute(db.text(f'DROP INDEX IF EXISTS {name}'))
+        db.session.execute(db.text('DROP INDEX IF EXISTS uq_event_character_event_id_character_id'))
+        db.session.commit()
+
+
+def timed(client, url):
+    samples = []
+    for _ in range(ROUNDS):
+        start = time.perf_counter()
+        response = client.get(url)
+        samples.append((time.perf_counter() - start) * 1000)
+        assert response.status_code == 200, response.status_code
+    return statistics.median(samples)
+
+
+def measure():
+    client = app.test_client()
+    with client.session_transaction() as sess:
+        sess['user_id'] = 1
+    return {
+        'get_lore_map': timed(client, f'/api/loremaps/{USERS}'),
+        'get_characters?limit=100': timed(client, '/api/characters?limit=100'),
+        'get_characters?fields=id,name': timed(client, '/api/characters?fields=id,name'),
+    }
+
+
+if __name__ == '__main__':
+    app.config['SESSION_COOKIE_SECURE'] = False
+    seed()
+    drop_indexes()
+    before = measure()
+    with app.app_context(), db.engine.begin() as conn:
+        v0005_lookup_indexes.upgrade(conn)
+    after = measure()
+
+    print(f'{"endpoint":32} {"before ms":>10} {"after ms":>10}')
+    for name in before:
+        print(f'{name:32} {before[name]:10.2f} {after[name]:10.2f}')
@@ -0,0 +1,149 @@
+"""Login and lore map latency during a burst of logins.
+
+Models the start of a session: ``LOGINS`` players sign in at once, in
+``ROUNDS`` waves, while ``READERS`` clients keep fetching the live lore map.
+Every request runs on its own thread, like a threaded worker's request
+threads.
+
+Hashing on the request threads (``PASSWORD_HASH_WORKERS = 0``) lets every
+pending login compete for the CPU at once, starving the map readers. The
+bounded pool runs at most ``POOL_WORKERS`` hashes at a time, so the map
+stays responsive; on few cores logins then share the CPU with the readers
+instead of taking it over, and ``PASSWORD_HASH_METHOD`` is the lever on
+login latency itself. The last mode shows a cheaper method (Werkzeug 3's
+scrypt default). Stored hashes are reset to each mode's method first, so
+no login pays for a rehash.
+
+    python benchmarks/bench_login.py
+"""
+import logging
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+TMP_DIR = tempfile.mkdtemp()
+os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(TMP_DIR, 'bench.db')}"
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from werkzeug.security import generate_password_hash  # noqa: E402
+
+from app import app  # noqa: E402
+from extensions import db  # noqa: E402
+from models import User  # noqa: E402
+
+LOGINS = 24
+ROUNDS = 2
+READERS = 4
+POOL_WORKERS = 2
+PASSWORD = 'correct horse battery staple'
+MODES = (
+    ('request threads', 0, 'pbkdf2:sha256:600000'),
+    (f'pool of {POOL_WORKERS}', POOL_WORKERS, 'pbkdf2:sha256:600000'),
+    (f'pool of {POOL_WORKERS}', POOL_WORKERS, 'scrypt:32768:8:1'),
+)
+
+
+def reset_hashes(method):
+    app.config['PASSWORD_HASH_METHOD'] = method
+    with app.app_context():
+        # One hash shared by every player keeps this quick
+        password_hash = generate_password_hash(PASSWORD, method, app.config['PASSWORD_SALT_LENGTH'])
+        User.query.update({User.password_hash: password_hash})
+        db.session.commit()
+
+
+def setup():
+    app.config['SESSION_COOKIE_SECURE'] = False
+    with app.app_context():
+        db.session.add_all([
+            User(username=f'player{i}', email=f'player{i}@example.com', password_hash='')
+            for i in range(LOGINS + 1)
+        ])
+        db.session.commit()
+    reset_hashes(MODES[0][2])
+
+    dm = app.test_client()
+    dm.post('/api/login', json={'username': f'player{LOGINS}', 'password': PASSWORD})
+    lore_map_id = dm.post('/api/loremaps', json={'title': 'Campaign'}).get_json()['id']
+    for i in range(20):
+        dm.post(f'/api/loremaps/{lore_map_id}/events', json={'title': f'Event {i}', 'position': {'x': i, 'y': i}})
+    return lore_map_id
+
+
+def login(player, samples):
+    client = app.test_client()
+    start = time.perf_counter()
+    response = client.post('/api/login', json={'username': f'player{player}', 'password': PASSWORD})
+    samples.append(time.perf_counter() - start)
+    assert response.status_code == 200, response.get_json()
+
+
+def read(client, lore_map_id, stop, samples):
+    while not stop.is_set():
+        start = time.perf_counter()
+        response = client.get(f'/api/loremaps/{lore_map_id}')
+        samples.append(time.perf_counter() - start)
+        assert response.status_code == 200
+
+
+def percentile(samples, fraction):
+    samples = sorted(samples)
+    return samples[max(0, int(len(samples) * fraction) - 1)]
+
+
+def run(workers, method, readers, lore_map_id):
+    reset_hashes(method)
+    app.config['PASSWORD_HASH_WORKERS'] = workers
+    login_samples, read_samples = [], []
+    stop = threading.Event()
+    readers = [threading.Thread(target=read, args=(client, lore_map_id, stop, read_samples))
+               for client in readers]
+    for reader in readers:
+        reader.start()
+
+    start = time.perf_counter()
+    for _ in range(ROUNDS):
+        burst = [threading.Thread(target=login, args=(player, login_samples)) for player in range(LOGINS)]
+        for thread in burst:
+            thread.start()
+        for thread in burst:
+            thread.join()
+    elapsed = time.perf_counter() - start
+
+    stop.set()
+    for reader in readers:
+        reader.join()
+    return {
+        'login_p50': statistics.median(login_samples),
+        'login_p99': percentile(login_samples, 0.99),
+        'read_p50': statistics.median(read_samples),
+        'read_p99': percentile(read_samples, 0.99),
+        'reads': len(read_samples) / elapsed,
+        'elapsed': elapsed,
+    }
+
+
+def main():
+    logging.getLogger('werkzeug').setLevel(logging.WARNING)
+    lore_map_id = setup()
+    readers = []
+    for _ in range(READERS):
+        client = app.test_client()
+        client.post('/api/login', json={'username': f'player{LOGINS}', 'password': PASSWORD})
+        readers.append(client)
+
+    print(f"{ROUNDS} bursts of {LOGINS} logins, {READERS} clients reading a lore map, "
+          f"{os.cpu_count()} CPU(s)")
+    print(f"  {'mode':<17} {'method':<21} {'login p50':>10} {'login p99':>10} "
+          f"{'map p50':>9} {'map p99':>9} {'maps/s':>7}")
+    for label, workers, method in MODES:
+        result = run(workers, method, readers, lore_map_id)
+        print(f"  {label:<17} {method:<21} {result['login_p50'] * 1000:>7.0f} ms {result['login_p99'] * 1000:>7.0f} ms "
+              f"{result['read_p50'] * 1000:>6.1f} ms {result['read_p99'] * 1000:>6.1f} ms {result['reads']:>7.0f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,100 @@
+"""Serialization cost of a 5,000-character catalog response.
+
+Loads 5k characters from a throwaway SQLite database once, then times
+turning the rows into a JSON body three ways: the old hand-built dicts with
+stdlib json, compiled schemas with stdlib json, and compiled schemas with
+orjson (skipped if it isn't installed).
+
+    python benchmarks/bench_serialization.py
+"""
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+DB_PATH = os.path.join(tempfile.mkdtemp(), 'bench.db')
+os.environ['DATABASE_URL'] = f'sqlite:///{DB_PATH}'
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import app  # noqa: E402
+from extensions import db  # noqa: E402
+from models import Character  # noqa: E402
+from serializers import CHARACTER, orjson  # noqa: E402
+
+CHARACTERS = 5_000
+ROUNDS = 30
+
+ACTIONS = [
+    {"name": "Multiattack", "desc": "The creature makes two attacks."},
+    {"name": "Bite", "desc": "Melee Weapon Attack: +4 to hit, reach 5 ft.", "attack_bonus": 4},
+]
+
+
+def seed():
+    with app.app_context():
+        db.session.execute(Character.__table__.insert(), [{
+            'name': f'Creature {c:05d}', 'character_type': 'Monster', 'description': 'A beast.',
+            'strength': 10 + c % 8, 'dexterity': 12, 'constitution': 14, 'intelligence': 3,
+            'wisdom': 12, 'charisma': 6, 'armor_class': 13, 'hit_points': 11,
+            'challenge_rating': str(c % 20), 'creature_type': 'beast', 'is_official': True,
+            'actions': ACTIONS, 'skills': {'perception': 3, 'stealth': 4},
+            'senses': 'darkvision 60 ft.', 'languages': '-',
+        } for c in range(CHARACTERS)])
+        db.session.commit()
+
+
+def legacy_dicts(rows):
+    """What the catalog route did before: a dict comprehension over row._mapping."""
+    defaults = {'strength': 10, 'dexterity': 10, 'constitution': 10, 'intelligence': 10,
+                'wisdom': 10, 'charisma': 10, 'armor_class': 10, 'hit_points': 1,
+                'is_official': False}
+    fields = [(key, defaults.get(key)) for key in CHARACTER.keys]
+    result = []
+    for row in rows:
+        values = row._mapping
+        result.append({key: (values[key] or default) if default is not None else values[key]
+                       for key, default in fields})
+    return result
+
+
+def stdlib_dumps(data):
+    return json.dumps(data, sort_keys=True, separators=(',', ':')).encode('utf-8')
+
+
+def timed(fn, rows):
+    samples = []
+    for _ in range(ROUNDS):
+        start = time.perf_counter()
+        fn(rows)
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+def main():
+    seed()
+    with app.app_context():
+        rows = db.session.query(*[getattr(Character, c) for c in CHARACTER.columns]).all()
+    assert len(rows) == CHARACTERS
+
+    variants = [
+        ('hand-built dicts + json', lambda r: stdlib_dumps(legacy_dicts(r))),
+        ('schema + json', lambda r: stdlib_dumps(CHARACTER.dump_rows(r))),
+    ]
+    if orjson is not None:
+        options = orjson.OPT_NON_STR_KEYS | orjson.OPT_SORT_KEYS
+        variants.append(('schema + orjson', lambda r: orjson.dumps(CHARACTER.dump_rows(r), option=options)))
+
+    assert json.loads(variants[0][1](rows)) == json.loads(variants[-1][1](rows))
+
+    baseline = None
+    print(f'{CHARACTERS} characters, median of {ROUNDS} rounds')
+    for label, fn in variants:
+        ms = timed(fn, rows)
+        baseline = baseline or ms
+        print(f'  {label:<26} {ms:8.2f} ms  {baseline / ms:5.1f}x')
+
+
+if __name__ == '__main__':
+    main()
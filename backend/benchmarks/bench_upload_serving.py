@@ -0,0 +1,142 @@
+"""Worker occupancy while 50 slow clients download a 16 MB battle map.
+
+Serves ``/api/uploads/<file>`` from a threaded local server, one thread
+standing in for each sync worker, and has 50 clients download concurrently
+at a throttled rate, like phones on a mobile connection. A WSGI wrapper
+records how long each request holds its worker: from the call into the app
+until the server closes the response iterable after the last byte.
+
+Two modes are compared: the worker streaming the file itself (gunicorn
+would use sendfile here, which saves copies but still blocks on a slow
+socket), and ``x-accel-redirect``, where the worker only returns headers and
+the proxy would send the body.
+
+    python benchmarks/bench_upload_serving.py
+"""
+import http.client
+import logging
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+TMP_DIR = tempfile.mkdtemp()
+os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(TMP_DIR, 'bench.db')}"
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from werkzeug.serving import make_server  # noqa: E402
+
+from app import app  # noqa: E402
+
+CLIENTS = 50
+FILE_SIZE = 16 * 1024 * 1024
+CLIENT_RATE = 8 * 1024 * 1024  # bytes per second per client
+READ_SIZE = 64 * 1024
+FILENAME = 'b' * 64 + '.png'
+
+
+class Occupancy:
+    """WSGI wrapper timing each request until its body has been sent."""
+
+    def __init__(self, wsgi_app):
+        self.wsgi_app = wsgi_app
+        self.lock = threading.Lock()
+        self.samples = []
+        self.busy = 0
+        self.peak = 0
+
+    def __call__(self, environ, start_response):
+        with self.lock:
+            self.busy += 1
+            self.peak = max(self.peak, self.busy)
+        start = time.perf_counter()
+        body = self.wsgi_app(environ, start_response)
+        return _Tracked(self, body, start)
+
+    def done(self, start):
+        with self.lock:
+            self.busy -= 1
+            self.samples.append(time.perf_counter() - start)
+
+
+class _Tracked:
+    def __init__(self, occupancy, body, start):
+        self.occupancy = occupancy
+        self.body = body
+        self.start = start
+
+    def __iter__(self):
+        return iter(self.body)
+
+    def close(self):
+        try:
+            if hasattr(self.body, 'close'):
+                self.body.close()
+        finally:
+            self.occupancy.done(self.start)
+
+
+def download(port, results):
+    conn = http.client.HTTPConnection('127.0.0.1', port, timeout=120)
+    conn.request('GET', f'/api/uploads/{FILENAME}')
+    response = conn.getresponse()
+    received = 0
+    start = time.perf_counter()
+    while True:
+        chunk = response.read(READ_SIZE)
+        if not chunk:
+            break
+        received += len(chunk)
+        # Throttle to CLIENT_RATE
+        delay = received / CLIENT_RATE - (time.perf_counter() - start)
+        if delay > 0:
+            time.sleep(delay)
+    conn.close()
+    results.append((response.status, received))
+
+
+def run(mode):
+    app.config['UPLOAD_OFFLOAD'] = mode
+    occupancy = Occupancy(app.wsgi_app)
+    server = make_server('127.0.0.1', 0, occupancy, threaded=True)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+
+    results = []
+    clients = [threading.Thread(target=download, args=(server.port, results)) for _ in range(CLIENTS)]
+    for client in clients:
+        client.start()
+    for client in clients:
+        client.join()
+    server.shutdown()
+
+    assert len(results) == CLIENTS and all(status == 200 for status, _ in results)
+    samples = sorted(occupancy.samples)
+    return {
+        'bytes': sum(received for _, received in results) / CLIENTS,
+        'median': statistics.median(samples),
+        'p95': samples[int(len(samples) * 0.95) - 1],
+        'worker_seconds': sum(samples),
+        'peak': occupancy.peak,
+    }
+
+
+def main():
+    logging.getLogger('werkzeug').setLevel(logging.WARNING)
+    app.config['UPLOAD_FOLDER'] = TMP_DIR
+    with open(os.path.join(TMP_DIR, FILENAME), 'wb') as target:
+        target.write(os.urandom(FILE_SIZE))
+
+    print(f'{CLIENTS} clients x {FILE_SIZE // (1024 * 1024)} MB at '
+          f'{CLIENT_RATE // (1024 * 1024)} MB/s each')
+    print(f"  {'mode':<18} {'body/client':>12} {'median':>9} {'p95':>9} {'worker-s':>9} {'peak busy':>10}")
+    for label, mode in (('worker streams', ''), ('x-accel-redirect', 'x-accel-redirect')):
+        result = run(mode)
+        print(f"  {label:<18} {result['bytes'] / 1024:>9.0f} KB {result['median'] * 1000:>6.1f} ms "
+              f"{result['p95'] * 1000:>6.1f} ms {result['worker_seconds']:>9.2f} {result['peak']:>10}")
+
+
+if __name__ == '__main__':
+    main()
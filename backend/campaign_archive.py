@@ -0,0 +1,265 @@
+"""Streamed export and bulk import of a whole campaign as a zip archive.
+
+Layout: ``manifest.json`` (format and lore map), one JSON object per line in
+``events.jsonl``, ``connections.jsonl``, ``event_characters.jsonl`` and
+``characters.jsonl``, plus ``uploads/<filename>`` for battle maps when
+images are included. Export writes the zip into a small buffer that is
+drained after every batch, so memory stays flat whatever the campaign size.
+"""
+import io
+import json
+import os
+import zipfile
+from datetime import datetime
+
+import story_graph
+import upload_store
+from extensions import db
+from models import LoreMap, Event, EventConnection, Character, EventCharacter
+from utils import allowed_file
+
+ARCHIVE_FORMAT = 'lorekeep-campaign'
+ARCHIVE_VERSION = 1
+BATCH_SIZE = 500
+FILE_CHUNK_SIZE = 64 * 1024
+
+EVENT_COLUMNS = ('id', 'title', 'description', 'location', 'position_x', 'position_y',
+                 'image_url', 'conditions', 'is_party_location', 'is_completed',
+                 'dm_notes', 'order_number')
+CONNECTION_COLUMNS = ('from_event_id', 'to_event_id', 'description', 'condition', 'connection_type')
+EVENT_CHARACTER_COLUMNS = ('event_id', 'character_id', 'role')
+# SRD bookkeeping stays behind: imported copies are user-owned, not catalog rows.
+# challenge_rating_value is derived from challenge_rating on import.
+CHARACTER_COLUMNS = tuple(
+    column.name for column in Character.__table__.columns
+    if column.name not in ('user_id', 'source_key', 'source_hash', 'updated_at', 'challenge_rating_value')
+)
+
+
+class _DrainableBuffer(io.RawIOBase):
+    """Write-only sink that hands back whatever was written since the last drain."""
+
+    def __init__(self):
+        self._chunks = []
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def drain(self):
+        data = b''.join(self._chunks)
+        self._chunks = []
+        return data
+
+
+def _rows(query, columns):
+    for row in query.with_entities(*columns).yield_per(BATCH_SIZE):
+        yield dict(row._mapping)
+
+
+def _upload_filename(image_url):
+    if image_url and image_url.startswith('/api/uploads/'):
+        return image_url.rsplit('/', 1)[-1]
+    return None
+
+
+def export_lore_map(lore_map, upload_folder, include_images=False):
+    """Yield the zip archive for ``lore_map`` in chunks."""
+    buffer = _DrainableBuffer()
+    archive = zipfile.ZipFile(buffer, 'w', zipfile.ZIP_DEFLATED)
+
+    def write_jsonl(name, rows):
+        with archive.open(name, 'w', force_zip64=True) as entry:
+            batch = []
+            for row in rows:
+                batch.append(json.dumps(row, default=str))
+                if len(batch) >= BATCH_SIZE:
+                    entry.write(('\n'.join(batch) + '\n').encode('utf-8'))
+                    batch = []
+                    yield buffer.drain()
+            if batch:
+                entry.write(('\n'.join(batch) + '\n').encode('utf-8'))
+        yield buffer.drain()
+
+    manifest = {
+        "format": ARCHIVE_FORMAT,
+        "version": ARCHIVE_VERSION,
+        "exported_at": datetime.utcnow().isoformat(),
+        "lore_map": {
+            "title": lore_map.title,
+            "description": lore_map.description
+        }
+    }
+    archive.writestr('manifest.json', json.dumps(manifest, indent=2))
+    yield buffer.drain()
+
+    events = Event.query.filter(Event.lore_map_id == lore_map.id).order_by(Event.id)
+    event_ids = Event.query.with_entities(Event.id).filter(Event.lore_map_id == lore_map.id)
+    links = EventCharacter.query.filter(EventCharacter.event_id.in_(event_ids.scalar_subquery()))
+
+    yield from write_jsonl('events.jsonl', _rows(events, [getattr(Event, c) for c in EVENT_COLUMNS]))
+    yield from write_jsonl('connections.jsonl', _rows(
+        EventConnection.query.filter(EventConnection.from_event_id.in_(event_ids.scalar_subquery())),
+        [getattr(EventConnection, c) for c in CONNECTION_COLUMNS]
+    ))
+    yield from write_jsonl('event_characters.jsonl', _rows(
+        links, [getattr(EventCharacter, c) for c in EVENT_CHARACTER_COLUMNS]
+    ))
+    yield from write_jsonl('characters.jsonl', _rows(
+        Character.query.filter(Character.id.in_(
+            links.with_entities(EventCharacter.character_id).scalar_subquery()
+        )),
+        [getattr(Character, c) for c in CHARACTER_COLUMNS]
+    ))
+
+    if include_images:
+        seen = set()
+        for (image_url,) in events.with_entities(Event.image_url).filter(Event.image_url.isnot(None)):
+            filename = _upload_filename(image_url)
+            path = os.path.join(upload_folder, filename) if filename else None
+            if not path or filename in seen or not os.path.isfile(path):
+                continue
+            seen.add(filename)
+            with open(path, 'rb') as source, \
+                    archive.open(f'uploads/{filename}', 'w', force_zip64=True) as entry:
+                for chunk in iter(lambda: source.read(FILE_CHUNK_SIZE), b''):
+                    entry.write(chunk)
+                    yield buffer.drain()
+
+    archive.close()
+    yield buffer.drain()
+
+
+def _read_jsonl(archive, name):
+    if name not in archive.namelist():
+        return
+    with archive.open(name) as entry:
+        for line in io.TextIOWrapper(entry, encoding='utf-8'):
+            if line.strip():
+                yield json.loads(line)
+
+
+def _batches(rows, size=BATCH_SIZE):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def import_lore_map(fileobj, user_id, upload_folder, max_image_size):
+    """Recreate an exported campaign for ``user_id``; the caller commits.
+
+    Official monsters are matched by name to the local catalog; anything
+    else referenced by the campaign becomes one of the user's characters.
+    Raises ValueError for archives that aren't LoreKeep exports, or whose
+    images exceed ``max_image_size`` bytes.
+    """
+    try:
+        archive = zipfile.ZipFile(fileobj)
+        manifest = json.loads(archive.read('manifest.json'))
+    except (zipfile.BadZipFile, KeyError, ValueError):
+        raise ValueError("Not a LoreKeep campaign archive")
+    if manifest.get('format') != ARCHIVE_FORMAT:
+        raise ValueError("Not a LoreKeep campaign archive")
+
+    lore_map = LoreMap(
+        title=manifest['lore_map'].get('title') or 'Imported Map',
+        description=manifest['lore_map'].get('description') or '',
+        user_id=user_id
+    )
+    db.session.add(lore_map)
+    db.session.flush()
+    version = lore_map.bump_version()
+
+    # Battle maps go through the content-addressed store, so re-importing a
+    # campaign shares its images with the original
+    image_urls = {}
+    for name in archive.namelist():
+        if not name.startswith('uploads/') or name.endswith('/'):
+            continue
+        original = name.split('/', 1)[1]
+        if not allowed_file(original):
+            continue
+        # The declared size can lie; store() also stops at the limit
+        if archive.getinfo(name).file_size > max_image_size:
+            raise ValueError(f"Image {original} is larger than the upload limit")
+        with archive.open(name) as source:
+            filename = upload_store.store(source, original.rsplit('.', 1)[1], upload_folder,
+                                          max_size=max_image_size)
+        image_urls[upload_store.url_for_file(original)] = upload_store.url_for_file(filename)
+
+    character_ids = {}
+    for batch in _batches(_read_jsonl(archive, 'characters.jsonl')):
+        official_names = [row['name'] for row in batch if row.get('is_official')]
+        official = dict(db.session.query(Character.name, Character.id).filter(
+            Character.user_id.is_(None),
+            Character.is_official == True,
+            Character.name.in_(official_names)
+        )) if official_names else {}
+
+        created = []
+        for row in batch:
+            if row.get('is_official') and row['name'] in official:
+                character_ids[row['id']] = official[row['name']]
+                continue
+            values = {c: row.get(c) for c in CHARACTER_COLUMNS if c != 'id'}
+            values['is_official'] = False
+            created.append((row['id'], Character(user_id=user_id, **values)))
+        db.session.add_all(character for _, character in created)
+        db.session.flush()
+        character_ids.update((old_id, character.id) for old_id, character in created)
+
+    event_ids = {}
+    with_targets = []
+    for batch in _batches(_read_jsonl(archive, 'events.jsonl')):
+        created = []
+        for row in batch:
+            values = {c: row.get(c) for c in EVENT_COLUMNS if c != 'id'}
+            values['image_url'] = image_urls.get(values['image_url'], values['image_url'])
+            created.append((row['id'], Event(lore_map_id=lore_map.id, version=version, **values)))
+        db.session.add_all(event for _, event in created)
+        db.session.flush()
+        event_ids.update((old_id, event.id) for old_id, event in created)
+        with_targets.extend((event.id, event.conditions) for _, event in created
+                            if any(condition.get('target') is not None
+                                   for condition in story_graph.parse_conditions(event.conditions)))
+
+    # Condition targets still hold the exporting map's event ids; one that
+    # isn't in the archive is cleared rather than left naming a local event
+    def resolve(target):
+        try:
+            return event_ids.get(int(target))
+        except (TypeError, ValueError):
+            return None
+
+    condition_updates = []
+    for event_id, conditions in with_targets:
+        remapped = story_graph.remap_condition_targets(conditions, resolve)
+        if remapped is not None:
+            condition_updates.append({'id': event_id, 'conditions': remapped})
+    if condition_updates:
+        db.session.bulk_update_mappings(Event, condition_updates)
+
+    for batch in _batches(_read_jsonl(archive, 'connections.jsonl')):
+        db.session.bulk_insert_mappings(EventConnection, [dict(
+            {c: row.get(c) for c in CONNECTION_COLUMNS},
+            from_event_id=event_ids[row['from_event_id']],
+            to_event_id=event_ids[row['to_event_id']],
+            version=version
+        ) for row in batch if row['from_event_id'] in event_ids and row['to_event_id'] in event_ids])
+
+    for batch in _batches(_read_jsonl(archive, 'event_characters.jsonl')):
+        db.session.bulk_insert_mappings(EventCharacter, [dict(
+            role=row.get('role'),
+            event_id=event_ids[row['event_id']],
+            character_id=character_ids[row['character_id']]
+        ) for row in batch if row['event_id'] in event_ids and row['character_id'] in character_ids])
+
+    return lore_map, {"events": len(event_ids), "characters": len(character_ids)}
@@ -0,0 +1,43 @@
+import math
+
+# Every challenge rating in the 5e rules, keyed by the strings we store
+CHALLENGE_RATINGS = {'0': 0.0, '1/8': 0.125, '1/4': 0.25, '1/2': 0.5}
+CHALLENGE_RATINGS.update({str(cr): float(cr) for cr in range(1, 31)})
+
+# Decimal spellings that older clients saved for the fractional ratings
+CHALLENGE_RATING_ALIASES = {'0.125': 0.125, '0.25': 0.25, '0.5': 0.5, '.125': 0.125, '.25': 0.25, '.5': 0.5}
+
+
+def parse_challenge_rating(value):
+    """Convert a stored or user-supplied challenge rating to a float, or None."""
+    if value is None:
+        return None
+    if isinstance(value, (int, float)):
+        number = float(value)
+    else:
+        value = str(value).strip()
+        if value in CHALLENGE_RATINGS:
+            return CHALLENGE_RATINGS[value]
+        if value in CHALLENGE_RATING_ALIASES:
+            return CHALLENGE_RATING_ALIASES[value]
+        try:
+            if '/' in value:
+                numerator, denominator = value.split('/', 1)
+                number = float(numerator) / float(denominator)
+            else:
+                number = float(value)
+        except (ValueError, ZeroDivisionError):
+            return None
+    # 'inf' and 'nan' parse as floats but aren't ratings
+    return number if math.isfinite(number) else None
+
+
+# Experience points awarded per challenge rating (DMG p. 275)
+CHALLENGE_RATING_XP = {
+    0.0: 10, 0.125: 25, 0.25: 50, 0.5: 100, 1.0: 200, 2.0: 450, 3.0: 700, 4.0: 1100,
+    5.0: 1800, 6.0: 2300, 7.0: 2900, 8.0: 3900, 9.0: 5000, 10.0: 5900, 11.0: 7200,
+    12.0: 8400, 13.0: 10000, 14.0: 11500, 15.0: 13000, 16.0: 15000, 17.0: 18000,
+    18.0: 20000, 19.0: 22000, 20.0: 25000, 21.0: 33000, 22.0: 41000, 23.0: 50000,
+    24.0: 62000, 25.0: 75000, 26.0: 90000, 27.0: 105000, 28.0: 120000, 29.0: 135000,
+    30.0: 155000,
+}
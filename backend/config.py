@@ -4,8 +4,27 @@ SECRET_KEY = os.environ.get('SECRET_KEY', 'dev-fallback-key')
 
 # File upload configuration
 UPLOAD_FOLDER = 'uploads'
-ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif', 'webp'}
+ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif', 'webp', 'svg'}
 MAX_CONTENT_LENGTH = 16 * 1024 * 1024  # 16MB max file size
+IMAGE_WORKERS = int(os.environ.get('IMAGE_WORKERS', 2))  # Threads running inline background jobs
+# Seconds an upload must stay unreferenced before `flask --app app gc-uploads` deletes it
+UPLOAD_GC_GRACE = int(os.environ.get('UPLOAD_GC_GRACE', 60 * 60))
+# Who sends upload bytes: '' streams from the worker (sendfile under gunicorn),
+# 'x-sendfile' hands the path to Apache/lighttpd, 'x-accel-redirect' to nginx
+UPLOAD_OFFLOAD = os.environ.get('UPLOAD_OFFLOAD', '')
+# nginx `internal` location aliased to UPLOAD_FOLDER, for x-accel-redirect
+UPLOAD_ACCEL_PREFIX = os.environ.get('UPLOAD_ACCEL_PREFIX', '/_uploads/')
+
+# Password hashing, in werkzeug's `generate_password_hash` method syntax
+# ('pbkdf2:sha256:<iterations>' or 'scrypt:<n>:<r>:<p>'). Hashes made with
+# other parameters are upgraded when their user next logs in.
+PASSWORD_HASH_METHOD = os.environ.get('PASSWORD_HASH_METHOD', 'pbkdf2:sha256:600000')
+PASSWORD_SALT_LENGTH = int(os.environ.get('PASSWORD_SALT_LENGTH', 16))
+# Threads hashing passwords (0 = on the request thread), how many more logins
+# may wait for one, and how long a login waits before answering 503
+PASSWORD_HASH_WORKERS = int(os.environ.get('PASSWORD_HASH_WORKERS', 2))
+PASSWORD_HASH_QUEUE = int(os.environ.get('PASSWORD_HASH_QUEUE', 32))
+PASSWORD_HASH_TIMEOUT = float(os.environ.get('PASSWORD_HASH_TIMEOUT', 10))
 
 # Session configuration
 SESSION_COOKIE_SECURE = True       # HTTPS only
@@ -26,6 +45,26 @@ else:
 
 SQLALCHEMY_TRACK_MODIFICATIONS = False
 
+# Cache of pre-serialized official monsters. 'filesystem' shares one copy
+# between all workers on a host; 'memory' keeps one per process.
+OFFICIAL_CACHE_BACKEND = os.environ.get('OFFICIAL_CACHE_BACKEND', 'memory')
+OFFICIAL_CACHE_DIR = os.environ.get('OFFICIAL_CACHE_DIR', 'cache/official')
+OFFICIAL_CACHE_MAX_BYTES = int(os.environ.get('OFFICIAL_CACHE_MAX_BYTES', 64 * 1024 * 1024))
+
+# JSON encoder for responses: 'auto' uses orjson when installed, 'json' forces
+# the standard library.
+JSON_ENCODER = os.environ.get('JSON_ENCODER', 'auto')
+
+# Background jobs: 'inline' runs them on threads in the web process after the
+# request commits (and sweeps up retries and jobs left by a restart);
+# 'external' leaves them to `flask --app app run-jobs`.
+JOB_RUNNER = os.environ.get('JOB_RUNNER', 'inline')
+JOB_PROCESSES = int(os.environ.get('JOB_PROCESSES', 0))  # run-jobs pool size; 0 = CPU count
+
+# Apply pending schema migrations at boot. Turn off in production and run
+# `flask --app app migrate` during release instead.
+AUTO_MIGRATE = os.environ.get('AUTO_MIGRATE', 'true').lower() == 'true'
+
 # CORS allowed origins
 FRONTEND_URLS = [
     'http://localhost:3000',
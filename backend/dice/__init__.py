@@ -0,0 +1,12 @@
+"""Dice notation parsing, vectorized rolling and exact distributions.
+
+Notation: terms joined by ``+``/``-``. A term is a number or ``NdS`` with an
+optional keep/drop suffix: ``kh``/``k`` (keep highest), ``kl`` (keep lowest),
+``dh`` and ``dl``/``d`` (drop highest/lowest), e.g. ``4d6kh3``, ``2d20kl1``,
+``1d8+1d6+3``. ``d%`` is a d100.
+"""
+from dice.distribution import distribution
+from dice.parser import Constant, DiceError, DiceTerm, parse
+from dice.roller import roll
+
+__all__ = ['Constant', 'DiceError', 'DiceTerm', 'distribution', 'parse', 'roll']
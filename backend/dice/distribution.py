@@ -0,0 +1,99 @@
+"""Exact total distributions by convolution (no simulation)."""
+from functools import lru_cache
+from math import comb
+
+import numpy as np
+
+from dice.parser import DiceError, DiceTerm, parse
+
+MAX_OUTCOMES = 100_000
+# Keep/drop terms use an order-statistics DP of count^2 * sides vector steps
+MAX_KEEP_WORK = 250_000
+FFT_THRESHOLD = 1_000_000
+
+
+def distribution(notation):
+    """Exact distribution of ``notation``'s total.
+
+    Returns ``(minimum, probabilities)``: ``probabilities[i]`` is the chance
+    the total equals ``minimum + i``.
+    """
+    return _distribution(parse(notation))
+
+
+@lru_cache(maxsize=256)
+def _distribution(terms):
+    offset = 0
+    pmf = np.ones(1)
+    for term in terms:
+        if not isinstance(term, DiceTerm):
+            offset += term.sign * term.value
+            continue
+        low, term_pmf = _term_distribution(term.count, term.sides, term.keep)
+        if term.sign < 0:
+            low, term_pmf = -(low + len(term_pmf) - 1), term_pmf[::-1]
+        if len(pmf) + len(term_pmf) - 1 > MAX_OUTCOMES:
+            raise DiceError("Too many possible totals to compute exactly")
+        pmf = _convolve(pmf, term_pmf)
+        offset += low
+    pmf.flags.writeable = False
+    return offset, pmf
+
+
+def _convolve(a, b):
+    """Linear convolution; FFT once direct convolution would be slow."""
+    if len(a) * len(b) <= FFT_THRESHOLD:
+        return np.convolve(a, b)
+    size = len(a) + len(b) - 1
+    result = np.fft.irfft(np.fft.rfft(a, size) * np.fft.rfft(b, size), size)
+    # Round-off leaves tiny negative values where the true probability is ~0
+    return np.clip(result, 0.0, None)
+
+
+def _term_distribution(count, sides, keep):
+    if keep is None:
+        if count * (sides - 1) + 1 > MAX_OUTCOMES:
+            raise DiceError("Too many possible totals to compute exactly")
+        # Sum of identical dice by repeated squaring of the single-die pmf
+        die = np.full(sides, 1.0 / sides)
+        result, power, remaining = np.ones(1), die, count
+        while remaining:
+            if remaining & 1:
+                result = _convolve(result, power)
+            remaining >>= 1
+            if remaining:
+                power = _convolve(power, power)
+        return count, result
+
+    mode, kept = keep
+    if count * count * sides > MAX_KEEP_WORK:
+        raise DiceError("Too many dice to compute a keep/drop distribution exactly")
+    return kept, _kept_sum(count, sides, kept, mode == 'h')
+
+
+def _kept_sum(count, sides, kept, highest):
+    """Distribution of the sum of the ``kept`` highest (or lowest) of ``count`` dice.
+
+    Walks face values from the kept end, choosing how many of the remaining
+    dice show each value; ``chances[m]`` is the distribution of the kept sum
+    with ``m`` dice placed so far.
+    """
+    faces = range(sides, 0, -1) if highest else range(1, sides + 1)
+    width = kept * sides + 1
+    p_face = 1.0 / sides
+    chances = np.zeros((count + 1, width))
+    chances[0, 0] = 1.0
+    for face in faces:
+        updated = np.zeros_like(chances)
+        for placed in range(count + 1):
+            row = chances[placed]
+            if not row.any():
+                continue
+            free = count - placed
+            still_kept = max(kept - placed, 0)
+            for showing in range(free + 1):
+                weight = comb(free, showing) * p_face ** showing
+                added = face * min(showing, still_kept)
+                updated[placed + showing, added:] += row[:width - added] * weight
+        chances = updated
+    return chances[count, kept:]
@@ -0,0 +1,83 @@
+"""Dice notation -> cached tuple AST."""
+import re
+from collections import namedtuple
+from functools import lru_cache
+
+MAX_DICE = 1000
+MAX_SIDES = 1000
+MAX_TERMS = 20
+MAX_NOTATION_LENGTH = 100
+
+
+class DiceError(ValueError):
+    """Raised for notation that can't be parsed or exceeds the limits."""
+
+
+# sign is +1 or -1; keep is None or ('h' | 'l', how many dice are kept)
+DiceTerm = namedtuple('DiceTerm', 'sign count sides keep')
+Constant = namedtuple('Constant', 'sign value')
+
+_OPERATOR_SPACING = re.compile(r'\s*([+-])\s*')
+_TERM = re.compile(
+    r'([+-])?(?:(\d*)d(\d+|%)(?:(kh|kl|dh|dl|k|d)(\d+))?|(\d+))'
+)
+
+
+def parse(notation):
+    """Parse ``notation`` into a tuple of terms. Raises DiceError."""
+    if not isinstance(notation, str):
+        raise DiceError("Dice notation must be a string")
+    normalized = _OPERATOR_SPACING.sub(r'\1', notation.strip()).lower()
+    if len(normalized) > MAX_NOTATION_LENGTH:
+        raise DiceError(f"Dice notation is limited to {MAX_NOTATION_LENGTH} characters")
+    return _parse(normalized)
+
+
+@lru_cache(maxsize=1024)
+def _parse(notation):
+    if not notation:
+        raise DiceError("Empty dice notation")
+
+    terms = []
+    position = 0
+    while position < len(notation):
+        match = _TERM.match(notation, position)
+        if not match or match.end() == position or (terms and not match.group(1)):
+            raise DiceError(f"Invalid dice notation at '{notation[position:]}'")
+        position = match.end()
+        sign_text, count, sides, keep_mode, keep_count, constant = match.groups()
+        sign = -1 if sign_text == '-' else 1
+
+        if constant is not None:
+            terms.append(Constant(sign, int(constant)))
+            continue
+
+        count = int(count) if count else 1
+        sides = 100 if sides == '%' else int(sides)
+        if not 1 <= count <= MAX_DICE:
+            raise DiceError(f"Dice count must be between 1 and {MAX_DICE}")
+        if not 1 <= sides <= MAX_SIDES:
+            raise DiceError(f"Dice sides must be between 1 and {MAX_SIDES}")
+        terms.append(DiceTerm(sign, count, sides, _keep(keep_mode, keep_count, count)))
+
+    if len(terms) > MAX_TERMS:
+        raise DiceError(f"Dice notation is limited to {MAX_TERMS} terms")
+    return tuple(terms)
+
+
+def _keep(mode, amount, count):
+    """Normalize keep/drop suffixes to ('h' | 'l', dice kept), or None to keep all."""
+    if mode is None:
+        return None
+    amount = int(amount)
+    if mode in ('kh', 'k'):
+        kept = ('h', amount)
+    elif mode == 'kl':
+        kept = ('l', amount)
+    elif mode == 'dh':
+        kept = ('l', count - amount)
+    else:  # 'dl' / 'd'
+        kept = ('h', count - amount)
+    if not 0 < kept[1] <= count:
+        raise DiceError(f"Can't keep {kept[1]} of {count} dice")
+    return None if kept[1] == count else kept
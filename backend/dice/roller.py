@@ -0,0 +1,36 @@
+"""Vectorized rolling: every die of every repetition is drawn in one NumPy call per term."""
+import numpy as np
+
+from dice.parser import DiceError, DiceTerm, parse
+
+MAX_ROLLED_DICE = 200_000
+
+
+def roll(notation, times=1, rng=None):
+    """Roll ``notation`` ``times`` times.
+
+    Returns ``(totals, dice)``: an int array of ``times`` totals, and per dice
+    term a ``(times, count)`` array of the faces rolled (before keep/drop).
+    """
+    terms = parse(notation)
+    rolled = times * sum(term.count for term in terms if isinstance(term, DiceTerm))
+    if times < 1 or rolled > MAX_ROLLED_DICE:
+        raise DiceError(f"A request may roll at most {MAX_ROLLED_DICE} dice")
+
+    rng = rng or np.random.default_rng()
+    totals = np.zeros(times, dtype=np.int64)
+    dice = []
+    for term in terms:
+        if not isinstance(term, DiceTerm):
+            totals += term.sign * term.value
+            continue
+        faces = rng.integers(1, term.sides + 1, size=(times, term.count))
+        dice.append(faces)
+        if term.keep is None:
+            kept = faces
+        else:
+            ordered = np.sort(faces, axis=1)
+            mode, amount = term.keep
+            kept = ordered[:, -amount:] if mode == 'h' else ordered[:, :amount]
+        totals += term.sign * kept.sum(axis=1)
+    return totals, dice
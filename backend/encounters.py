@@ -0,0 +1,202 @@
+"""Encounter difficulty (DMG XP budgets) and per-creature combat stats.
+
+All creatures are evaluated together: ability modifiers, XP and proficiency
+come from array lookups, and every attack of every creature is scored
+against the party's armor class in one vectorized pass.
+"""
+import re
+from functools import lru_cache
+
+import numpy as np
+
+import dice
+from challenge_ratings import CHALLENGE_RATING_XP
+
+ABILITIES = ('strength', 'dexterity', 'constitution', 'intelligence', 'wisdom', 'charisma')
+DIFFICULTIES = ('easy', 'medium', 'hard', 'deadly')
+DEFAULT_TARGET_AC = 15
+
+# Party XP thresholds per character level: easy, medium, hard, deadly
+LEVEL_THRESHOLDS = np.array([
+    (25, 50, 75, 100), (50, 100, 150, 200), (75, 150, 225, 400), (125, 250, 375, 500),
+    (250, 500, 750, 1100), (300, 600, 900, 1400), (350, 750, 1100, 1700),
+    (450, 900, 1400, 2100), (550, 1100, 1600, 2400), (600, 1200, 1900, 2800),
+    (800, 1600, 2400, 3600), (1000, 2000, 3000, 4500), (1100, 2200, 3400, 5100),
+    (1250, 2500, 3800, 5700), (1400, 2800, 4300, 6400), (1600, 3200, 4800, 7200),
+    (2000, 3900, 5900, 8800), (2100, 4200, 6300, 9500), (2400, 4900, 7300, 10900),
+    (2800, 5700, 8500, 12700),
+])
+
+# Encounter multipliers by monster count; small/large parties shift one step
+MULTIPLIERS = (0.5, 1, 1.5, 2, 2.5, 3, 4, 5)
+MULTIPLIER_STEPS = ((1, 1), (2, 2), (6, 3), (10, 4), (14, 5))  # (up to N monsters, step)
+
+CR_STEPS = np.array(sorted(CHALLENGE_RATING_XP))
+CR_XP = np.array([CHALLENGE_RATING_XP[cr] for cr in CR_STEPS])
+# Proficiency bonus by CR: +2 up to CR 4, then +1 per four CRs
+PROFICIENCY_CR = np.array([0, 5, 9, 13, 17, 21, 25, 29])
+
+_TO_HIT = re.compile(r'([+-]\d+)\s*to\s*hit', re.IGNORECASE)
+_DAMAGE = re.compile(r'\((\d+d\d+(?:\s*[+-]\s*\d+)?)\)|(\d+d\d+(?:\s*[+-]\s*\d+)?)', re.IGNORECASE)
+
+
+class EncounterError(ValueError):
+    """Raised for party or creature input that can't be evaluated."""
+
+
+def parse_party(party):
+    """``[5, 5, 4]`` or ``[{"level": 5, "armor_class": 16}, ...]`` -> (levels, armor classes)."""
+    if not isinstance(party, list) or not party:
+        raise EncounterError("party must be a non-empty list of levels")
+    levels, armor = [], []
+    for member in party:
+        level = member.get('level') if isinstance(member, dict) else member
+        if not isinstance(level, int) or not 1 <= level <= 20:
+            raise EncounterError("Party levels must be integers from 1 to 20")
+        levels.append(level)
+        if isinstance(member, dict) and isinstance(member.get('armor_class'), int):
+            armor.append(member['armor_class'])
+    return np.array(levels), armor
+
+
+@lru_cache(maxsize=1024)
+def damage_average(notation):
+    """(average damage, average of the dice alone) for a damage expression, or None."""
+    try:
+        terms = dice.parse(notation)
+    except dice.DiceError:
+        return None
+    total = dice_only = 0.0
+    for term in terms:
+        if isinstance(term, dice.DiceTerm):
+            if term.keep is None:
+                mean = term.count * (term.sides + 1) / 2
+            else:
+                minimum, pmf = dice.distribution(f"{term.count}d{term.sides}k{term.keep[0]}{term.keep[1]}")
+                mean = float(np.arange(minimum, minimum + len(pmf)) @ pmf)
+            total += term.sign * mean
+            dice_only += term.sign * mean
+        else:
+            total += term.sign * term.value
+    return total, dice_only
+
+
+def _attacks(actions):
+    """Yield (name, attack bonus, damage notations) for each attack in a stored action list."""
+    if not isinstance(actions, list):
+        return
+    for action in actions:
+        if not isinstance(action, dict):
+            continue
+        text = action.get('desc') or action.get('description') or ''
+        bonus = action.get('attack_bonus')
+        if not isinstance(bonus, (int, float)):
+            match = _TO_HIT.search(text)
+            if not match:
+                continue
+            bonus = int(match.group(1))
+
+        damage_entries = action.get('damage')
+        if isinstance(damage_entries, str):
+            damage_entries = [damage_entries]
+        elif not isinstance(damage_entries, list):
+            damage_entries = []
+        notations = []
+        for damage in damage_entries:
+            notation = damage.get('damage_dice') if isinstance(damage, dict) else damage
+            if isinstance(notation, str):
+                notations.append(notation)
+        if not notations:
+            notations = [a or b for a, b in _DAMAGE.findall(text)][:1]
+        yield action.get('name') or 'Attack', bonus, notations
+
+
+def _multiplier(monsters, party_size):
+    step = next((step for limit, step in MULTIPLIER_STEPS if monsters <= limit), 6)
+    if party_size < 3:
+        step += 1
+    elif party_size >= 6:
+        step -= 1
+    return MULTIPLIERS[step]
+
+
+def evaluate(party, creatures, target_ac=None):
+    """Evaluate an encounter.
+
+    ``creatures`` is a list of dicts with ``id``, ``name``, the six ability
+    scores, ``armor_class``, ``hit_points``, ``challenge_rating``,
+    ``challenge_rating_value`` and ``actions``; repeat an entry for each copy
+    of a monster. ``target_ac`` defaults to the party's average armor class.
+    """
+    levels, party_armor = parse_party(party)
+    if target_ac is None:
+        target_ac = round(sum(party_armor) / len(party_armor)) if party_armor else DEFAULT_TARGET_AC
+
+    count = len(creatures)
+    scores = np.array([[creature.get(ability) or 10 for ability in ABILITIES] for creature in creatures],
+                      dtype=np.int64).reshape(count, len(ABILITIES))
+    modifiers = np.floor_divide(scores - 10, 2)
+    cr = np.array([creature.get('challenge_rating_value') or 0.0 for creature in creatures])
+    # Off-table ratings count as the next lower standard one
+    xp = CR_XP[np.clip(np.searchsorted(CR_STEPS, cr, side='right') - 1, 0, len(CR_STEPS) - 1)]
+    proficiency = 1 + np.searchsorted(PROFICIENCY_CR, cr, side='right')
+
+    # Flatten every attack so hit chance and expected damage are one array pass
+    owners, names, bonuses, averages, dice_averages = [], [], [], [], []
+    for index, creature in enumerate(creatures):
+        for name, bonus, notations in _attacks(creature.get('actions')):
+            parsed = [damage_average(notation) for notation in notations]
+            parsed = [value for value in parsed if value is not None]
+            owners.append(index)
+            names.append(name)
+            bonuses.append(bonus)
+            averages.append(sum(value[0] for value in parsed))
+            dice_averages.append(sum(value[1] for value in parsed))
+
+    hit_chance = np.clip((21 - (target_ac - np.array(bonuses, dtype=float))) / 20, 0.05, 0.95)
+    # A natural 20 (5%) doubles the damage dice
+    expected = hit_chance * np.array(averages) + 0.05 * np.array(dice_averages)
+    owners = np.array(owners, dtype=np.int64)
+    best = np.zeros(count)
+    np.maximum.at(best, owners, expected)
+
+    total_xp = int(xp.sum())
+    adjusted_xp = total_xp * _multiplier(count, len(levels)) if count else 0
+    thresholds = LEVEL_THRESHOLDS[levels - 1].sum(axis=0)
+    reached = [name for name, threshold in zip(DIFFICULTIES, thresholds) if adjusted_xp >= threshold]
+
+    attacks_by_creature = [[] for _ in range(count)]
+    for owner, name, bonus, average, chance, value in zip(
+            owners.tolist(), names, bonuses, averages, hit_chance.tolist(), expected.tolist()):
+        attacks_by_creature[owner].append({
+            "name": name,
+            "attack_bonus": bonus,
+            "average_damage": average,
+            "hit_chance": chance,
+            "expected_damage": value
+        })
+
+    return {
+        "party": {
+            "levels": levels.tolist(),
+            "thresholds": dict(zip(DIFFICULTIES, thresholds.tolist())),
+            "target_ac": target_ac
+        },
+        "monsters": count,
+        "xp": total_xp,
+        "adjusted_xp": adjusted_xp,
+        "difficulty": reached[-1] if reached else 'trivial',
+        "expected_damage_per_round": float(best.sum()),
+        "creatures": [{
+            "id": creature.get('id'),
+            "name": creature.get('name'),
+            "challenge_rating": creature.get('challenge_rating'),
+            "xp": int(xp[index]),
+            "proficiency_bonus": int(proficiency[index]),
+            "armor_class": creature.get('armor_class'),
+            "hit_points": creature.get('hit_points'),
+            "modifiers": dict(zip(ABILITIES, modifiers[index].tolist())),
+            "attacks": attacks_by_creature[index],
+            "best_attack_expected_damage": float(best[index])
+        } for index, creature in enumerate(creatures)]
+    }
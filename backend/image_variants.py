@@ -0,0 +1,89 @@
+"""Resized WebP variants of uploaded battle maps, built off the request path.
+
+For each upload ``<name>`` the pool writes ``variants/<name>/<size>.webp``
+under ``UPLOAD_FOLDER``: ``thumb`` and ``medium`` bound the longer side to
+``SIZES[size]`` pixels, ``full`` is the original transcoded to WebP. Files
+are written to a temporary name and renamed, so readers never see a
+partial image. Builds run as ``image_variants`` jobs (see ``jobs``). Until
+a variant exists the original is served instead, and the first such
+request queues the build (covering older uploads and imported campaigns).
+
+SVG uploads aren't rasterized. Their "variants" are gzip and (when the
+``brotli`` package is installed) brotli copies, ``variants/<name>/<name>.gz``
+and ``.br``, so they can be served precompressed.
+"""
+import gzip
+import os
+import shutil
+import threading
+
+from PIL import Image, ImageOps
+
+try:
+    import brotli
+except ImportError:  # gzip copies only
+    brotli = None
+
+SIZES = {'thumb': 256, 'medium': 1024, 'full': None}
+WEBP_QUALITY = 80
+# Content-Encoding -> suffix of the precompressed copy, in order of preference
+COMPRESSED = {'br': '.br', 'gzip': '.gz'}
+
+
+def variants_dir(upload_folder, filename):
+    return os.path.join(upload_folder, 'variants', filename)
+
+
+def variant_path(upload_folder, filename, size):
+    return os.path.join(variants_dir(upload_folder, filename), f'{size}.webp')
+
+
+def is_vector(filename):
+    return filename.lower().endswith('.svg')
+
+
+def compressed_path(upload_folder, filename, encoding):
+    return os.path.join(variants_dir(upload_folder, filename), filename + COMPRESSED[encoding])
+
+
+def _write(path, data):
+    tmp_path = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+    with open(tmp_path, 'wb') as target:
+        target.write(data)
+    os.replace(tmp_path, path)
+
+
+def _build_compressed(upload_folder, filename):
+    with open(os.path.join(upload_folder, filename), 'rb') as source:
+        data = source.read()
+    _write(compressed_path(upload_folder, filename, 'gzip'), gzip.compress(data, 9, mtime=0))
+    if brotli is not None:
+        _write(compressed_path(upload_folder, filename, 'br'), brotli.compress(data, quality=11))
+
+
+def build_variants(upload_folder, filename):
+    """Write every variant of one upload. Safe to call again; existing files are replaced."""
+    source = os.path.join(upload_folder, filename)
+    target_dir = variants_dir(upload_folder, filename)
+    os.makedirs(target_dir, exist_ok=True)
+    if is_vector(filename):
+        _build_compressed(upload_folder, filename)
+        return
+
+    with Image.open(source) as original:
+        image = ImageOps.exif_transpose(original)
+        if image.mode not in ('RGB', 'RGBA'):
+            image = image.convert('RGBA' if 'transparency' in image.info or 'A' in image.mode else 'RGB')
+        # Largest first, so each smaller variant resamples fewer pixels
+        for size, bound in sorted(SIZES.items(), key=lambda item: -(item[1] or float('inf'))):
+            if bound is not None and max(image.size) > bound:
+                image = image.copy()
+                image.thumbnail((bound, bound), Image.LANCZOS)
+            path = variant_path(upload_folder, filename, size)
+            tmp_path = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+            image.save(tmp_path, 'WEBP', quality=WEBP_QUALITY, method=4)
+            os.replace(tmp_path, path)
+
+
+def remove_variants(upload_folder, filename):
+    shutil.rmtree(variants_dir(upload_folder, filename), ignore_errors=True)
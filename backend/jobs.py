@@ -0,0 +1,323 @@
+"""Background jobs stored in the ``job`` table.
+
+Routes ``enqueue`` work in their own transaction, so a job exists exactly
+when the change that needs it commits. Where it runs depends on
+``JOB_RUNNER``:
+
+* ``'external'``: ``flask --app app run-jobs`` claims queued jobs and runs
+  them on a ``ProcessPoolExecutor``, so image work never competes with
+  requests for a web worker's CPU. The runner process does all database
+  access; the pool processes only get the job's kind and payload.
+* ``'inline'`` (development default): the web process runs a job on a
+  small thread pool as soon as its transaction commits. A sweeper thread,
+  started by the process's first request, renews the leases of those jobs
+  and starts any due job nobody is running: retries, and jobs left behind
+  by a restarted process.
+
+A job is claimed with a conditional UPDATE, so two runners never take the
+same one. Running jobs renew a lease; if a runner dies, its jobs go back to
+the queue once the lease expires. A failed job is retried with exponential
+backoff and jitter until ``max_attempts``; ``GET /api/jobs/<id>`` reports
+its state. Jobs are deduplicated per user, so the id a user gets back is
+always one they can look up.
+
+Handlers are plain module-level functions (picklable for the pool) taking
+the job's payload as keyword arguments.
+"""
+import logging
+import os
+import random
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime, timedelta
+
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+from sqlalchemy import bindparam, event as sa_event, text
+
+import image_variants
+import tile_pyramid
+from extensions import db
+from models import Job
+
+logger = logging.getLogger(__name__)
+
+HANDLERS = {
+    'image_variants': image_variants.build_variants,
+    'tiles': tile_pyramid.build_tiles,
+}
+ACTIVE = ('queued', 'running')
+LEASE_SECONDS = 60
+RETRY_BASE_SECONDS = 5
+RETRY_MAX_SECONDS = 15 * 60
+ERROR_MAX_LENGTH = 2000
+SWEEP_SECONDS = LEASE_SECONDS / 3
+SWEEP_BATCH = 50
+
+_inline_executor = None
+_inline_jobs = set()  # Submitted to this process's pool and not finished
+_inline_lock = threading.Lock()
+_sweeper = None
+
+
+def enqueue(kind, key=None, user_id=None, max_attempts=5, dedupe=ACTIVE, **payload):
+    """Add a job to the session (the caller commits) and return it.
+
+    With a ``key``, the same user's job of the same kind and key whose
+    status is in ``dedupe`` is returned instead of queueing a duplicate.
+    """
+    if kind not in HANDLERS:
+        raise ValueError(f"Unknown job kind: {kind}")
+    if key is not None:
+        existing = Job.query.filter(Job.kind == kind, Job.key == key, Job.user_id == user_id,
+                                    Job.status.in_(dedupe)).first()
+        if existing:
+            return existing
+    job = Job(kind=kind, key=key, user_id=user_id, payload=payload, max_attempts=max_attempts,
+              status='queued', attempts=0, run_at=datetime.utcnow())
+    db.session.add(job)
+    db.session.flush()
+    db.session.info.setdefault('new_jobs', []).append(job.id)
+    return job
+
+
+def queue_missing(kind, upload_folder, filename):
+    """Queue the build of a derived file a request found missing, and commit.
+
+    Nothing is queued while a build is pending, or once one has failed for
+    good, so repeated misses don't pile up jobs. The job belongs to no user,
+    so its id isn't given to clients.
+    """
+    job = enqueue(kind, key=filename, dedupe=ACTIVE + ('failed',),
+                  upload_folder=upload_folder, filename=filename)
+    db.session.commit()
+    return job
+
+
+def execute(kind, payload):
+    """Run one job's handler; called in a pool process or thread."""
+    HANDLERS[kind](**payload)
+
+
+def retry_delay(attempts):
+    """Seconds before retry number ``attempts``: doubling from RETRY_BASE_SECONDS, with jitter."""
+    delay = min(RETRY_BASE_SECONDS * 2 ** (attempts - 1), RETRY_MAX_SECONDS)
+    return delay * random.uniform(0.5, 1.0)
+
+
+def _claim(job_id, now):
+    return db.session.execute(text(
+        "UPDATE job SET status = 'running', attempts = attempts + 1, locked_at = :now "
+        "WHERE id = :id AND status = 'queued'"
+    ), {'id': job_id, 'now': now}).rowcount == 1
+
+
+def _requeue_expired(now):
+    # Jobs of a runner that stopped renewing its lease are due again
+    db.session.execute(text(
+        "UPDATE job SET status = 'queued' WHERE status = 'running' AND locked_at < :expired"
+    ), {'expired': now - timedelta(seconds=LEASE_SECONDS)})
+
+
+def claim(limit):
+    """Take up to ``limit`` due jobs; returns (id, kind, payload) tuples."""
+    now = datetime.utcnow()
+    _requeue_expired(now)
+    candidates = db.session.query(Job.id, Job.kind, Job.payload).filter(
+        Job.status == 'queued', Job.run_at <= now
+    ).order_by(Job.run_at, Job.id).limit(limit).all()
+    claimed = [(job_id, kind, payload) for job_id, kind, payload in candidates if _claim(job_id, now)]
+    db.session.commit()
+    return claimed
+
+
+def renew(job_ids):
+    if job_ids:
+        db.session.execute(text('UPDATE job SET locked_at = :now WHERE id IN :ids').bindparams(
+            bindparam('ids', expanding=True)
+        ), {'now': datetime.utcnow(), 'ids': list(job_ids)})
+        db.session.commit()
+
+
+def finish(job_id, error=None):
+    """Record a job's outcome; a failure is re-queued with backoff while attempts remain.
+
+    Returns the retry delay in seconds, or None when the job is done.
+    """
+    job = db.session.get(Job, job_id)
+    now = datetime.utcnow()
+    delay = None
+    if error is None:
+        job.status = 'succeeded'
+        job.last_error = None
+        job.finished_at = now
+    else:
+        job.last_error = f'{type(error).__name__}: {error}'[:ERROR_MAX_LENGTH]
+        if job.attempts < job.max_attempts:
+            delay = retry_delay(job.attempts)
+            job.status = 'queued'
+            job.run_at = now + timedelta(seconds=delay)
+        else:
+            job.status = 'failed'
+            job.finished_at = now
+    job.locked_at = None
+    db.session.commit()
+    return delay
+
+
+def release(job_ids):
+    """Hand unfinished jobs back to the queue without counting the attempt."""
+    if job_ids:
+        db.session.execute(text(
+            "UPDATE job SET status = 'queued', attempts = attempts - 1, locked_at = NULL "
+            "WHERE id IN :ids AND status = 'running'"
+        ).bindparams(bindparam('ids', expanding=True)), {'ids': list(job_ids)})
+        db.session.commit()
+
+
+# Inline runner
+
+def _run_inline(app, job_id):
+    try:
+        with app.app_context():
+            job = db.session.get(Job, job_id)
+            if job is None or not _claim(job_id, datetime.utcnow()):
+                db.session.rollback()
+                return
+            kind, payload = job.kind, job.payload
+            db.session.commit()
+            error = None
+            try:
+                execute(kind, payload)
+            except Exception as exc:
+                logger.exception("Job %s (%s) failed", job_id, kind)
+                error = exc
+            delay = finish(job_id, error)
+    finally:
+        with _inline_lock:
+            _inline_jobs.discard(job_id)
+    if delay is not None:
+        timer = threading.Timer(delay, _submit_inline, (app, [job_id]))
+        timer.daemon = True
+        timer.start()
+
+
+def _submit_inline(app, job_ids):
+    global _inline_executor
+    with _inline_lock:
+        if _inline_executor is None:
+            _inline_executor = ThreadPoolExecutor(max_workers=app.config['IMAGE_WORKERS'],
+                                                  thread_name_prefix='jobs')
+        job_ids = [job_id for job_id in job_ids if job_id not in _inline_jobs]
+        _inline_jobs.update(job_ids)
+    for job_id in job_ids:
+        _inline_executor.submit(_run_inline, app, job_id)
+
+
+def _sweep_inline(app):
+    """Renew this process's leases, then start due jobs nobody is running."""
+    with _inline_lock:
+        mine = list(_inline_jobs)
+    with app.app_context():
+        renew(mine)
+        now = datetime.utcnow()
+        _requeue_expired(now)
+        due = db.session.query(Job.id).filter(Job.status == 'queued', Job.run_at <= now).order_by(
+            Job.run_at, Job.id
+        ).limit(SWEEP_BATCH).all()
+        db.session.commit()
+    _submit_inline(app, [job_id for job_id, in due])
+
+
+def _sweep_forever(app):
+    while True:
+        try:
+            _sweep_inline(app)
+        except Exception:
+            logger.exception("Job sweep failed")
+        time.sleep(SWEEP_SECONDS)
+
+
+def _start_sweeper():
+    global _sweeper
+    if _sweeper is not None or current_app.config['JOB_RUNNER'] != 'inline':
+        return
+    with _inline_lock:
+        if _sweeper is None:
+            _sweeper = threading.Thread(target=_sweep_forever, args=(current_app._get_current_object(),),
+                                        name='jobs-sweeper', daemon=True)
+            _sweeper.start()
+
+
+def init_app(app):
+    """Start the inline sweeper with the first request (not for CLI commands)."""
+    app.before_request(_start_sweeper)
+
+
+@sa_event.listens_for(db.session, 'after_commit')
+def _start_committed_jobs(session):
+    job_ids = session.info.pop('new_jobs', None)
+    if job_ids and current_app.config['JOB_RUNNER'] == 'inline':
+        _submit_inline(current_app._get_current_object(), job_ids)
+
+
+@sa_event.listens_for(db.session, 'after_rollback')
+def _forget_rolled_back_jobs(session):
+    session.info.pop('new_jobs', None)
+
+
+# External runner
+
+def run_worker(processes, poll_interval=1.0, once=False):
+    """Claim and run jobs on a process pool until interrupted (or, with ``once``, until none is due)."""
+    pool = ProcessPoolExecutor(max_workers=processes)
+    running = {}
+    try:
+        while True:
+            if len(running) < processes:
+                for job_id, kind, payload in claim(processes - len(running)):
+                    running[pool.submit(execute, kind, payload)] = job_id
+            if not running:
+                if once:
+                    return
+                time.sleep(poll_interval)
+                continue
+
+            done, _ = wait(running, timeout=poll_interval, return_when=FIRST_COMPLETED)
+            broken = False
+            for future in done:
+                job_id = running.pop(future)
+                error = future.exception()
+                if error is not None:
+                    logger.error("Job %s failed: %r", job_id, error)
+                    broken = broken or isinstance(error, BrokenProcessPool)
+                finish(job_id, error)
+            if broken:
+                # A crashed child takes the whole pool down; start a fresh one
+                release(running.values())
+                running.clear()
+                pool.shutdown(wait=False, cancel_futures=True)
+                pool = ProcessPoolExecutor(max_workers=processes)
+            renew(running.values())
+    finally:
+        release(running.values())
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+@click.command('run-jobs')
+@click.option('--processes', type=int, default=None,
+              help='Worker processes (default JOB_PROCESSES, or the CPU count).')
+@click.option('--poll', type=float, default=1.0, help='Seconds between queue polls when idle.')
+@click.option('--once', is_flag=True, help='Exit once no job is due or running.')
+@with_appcontext
+def run_jobs_command(processes, poll, once):
+    """Run queued background jobs on a process pool."""
+    processes = processes or current_app.config['JOB_PROCESSES'] or os.cpu_count() or 1
+    click.echo(f"Running jobs on {processes} process(es)")
+    try:
+        run_worker(processes, poll, once)
+    except KeyboardInterrupt:
+        click.echo("Stopped; unfinished jobs were returned to the queue")
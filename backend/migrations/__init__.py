@@ -0,0 +1,127 @@
+"""Versioned schema migrations.
+
+Applied versions are recorded in a ``schema_version`` table. ``upgrade``
+runs pending scripts in order under a database-wide lock (a Postgres
+advisory lock, or SQLite's write lock), so concurrently booting workers
+don't race; whoever gets the lock second finds nothing left to do.
+Worker boot only calls ``ensure_schema``, which is a single version query
+once the database is current. Run ``flask --app app migrate`` to upgrade
+outside the web boot.
+"""
+from contextlib import contextmanager
+
+import click
+from flask.cli import with_appcontext
+from sqlalchemy import text
+
+from extensions import db
+from migrations import (
+    v0001_initial_schema,
+    v0002_event_columns,
+    v0003_lore_map_versions,
+    v0004_character_revision,
+    v0005_lookup_indexes,
+    v0006_search_index,
+    v0007_srd_source_columns,
+    v0008_json_columns,
+    v0009_event_position_index,
+    v0010_challenge_rating_value,
+    v0011_uploads,
+    v0012_jobs,
+    v0013_password_hash_length,
+    v0014_character_is_official_not_null,
+    v0015_character_search_text,
+)
+
+MIGRATIONS = [
+    (1, v0001_initial_schema),
+    (2, v0002_event_columns),
+    (3, v0003_lore_map_versions),
+    (4, v0004_character_revision),
+    (5, v0005_lookup_indexes),
+    (6, v0006_search_index),
+    (7, v0007_srd_source_columns),
+    (8, v0008_json_columns),
+    (9, v0009_event_position_index),
+    (10, v0010_challenge_rating_value),
+    (11, v0011_uploads),
+    (12, v0012_jobs),
+    (13, v0013_password_hash_length),
+    (14, v0014_character_is_official_not_null),
+    (15, v0015_character_search_text),
+]
+
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+# Arbitrary application-wide key for pg_advisory_xact_lock
+ADVISORY_LOCK_KEY = 0x4C4B4550
+
+
+@contextmanager
+def _locked_transaction(engine):
+    if engine.dialect.name == 'sqlite':
+        # BEGIN IMMEDIATE takes the write lock up front instead of on first write
+        with engine.connect().execution_options(isolation_level='AUTOCOMMIT') as conn:
+            conn.exec_driver_sql('BEGIN IMMEDIATE')
+            try:
+                yield conn
+            except BaseException:
+                conn.exec_driver_sql('ROLLBACK')
+                raise
+            conn.exec_driver_sql('COMMIT')
+    else:
+        with engine.begin() as conn:
+            if engine.dialect.name == 'postgresql':
+                conn.execute(text('SELECT pg_advisory_xact_lock(:key)'), {'key': ADVISORY_LOCK_KEY})
+            yield conn
+
+
+def current_version(engine):
+    """Highest applied migration, or 0 for a database that predates this table."""
+    try:
+        with engine.connect() as conn:
+            return conn.execute(text('SELECT MAX(version) FROM schema_version')).scalar() or 0
+    except Exception:
+        return 0
+
+
+def upgrade(engine):
+    """Apply all pending migrations in order; returns the versions applied."""
+    applied = []
+    with _locked_transaction(engine) as conn:
+        conn.execute(text(
+            'CREATE TABLE IF NOT EXISTS schema_version ('
+            'version INTEGER PRIMARY KEY, name VARCHAR(100) NOT NULL, applied_at TIMESTAMP)'
+        ))
+        # Re-read under the lock; another worker may have just finished
+        current = conn.execute(text('SELECT MAX(version) FROM schema_version')).scalar() or 0
+
+        for version, module in MIGRATIONS:
+            if version <= current:
+                continue
+            module.upgrade(conn)
+            conn.execute(text(
+                'INSERT INTO schema_version (version, name, applied_at) '
+                'VALUES (:version, :name, CURRENT_TIMESTAMP)'
+            ), {'version': version, 'name': module.__name__.rsplit('.', 1)[-1]})
+            applied.append(version)
+    return applied
+
+
+def ensure_schema(engine, auto_upgrade=True):
+    """Boot-time check: upgrade if behind, or refuse to start when auto_upgrade is off."""
+    if current_version(engine) >= LATEST_VERSION:
+        return
+    if not auto_upgrade:
+        raise RuntimeError('Database schema is out of date; run "flask --app app migrate"')
+    upgrade(engine)
+
+
+@click.command('migrate')
+@with_appcontext
+def migrate_command():
+    """Apply pending database migrations."""
+    applied = upgrade(db.engine)
+    if applied:
+        click.echo(f"Applied migrations: {', '.join(str(v) for v in applied)}")
+    click.echo(f"Database is at schema version {current_version(db.engine)}")
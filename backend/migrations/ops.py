@@ -0,0 +1,32 @@
+"""Idempotent schema operations shared by the migration scripts.
+
+Every helper checks before it acts, so a migration can be re-run against a
+database that was partly upgraded by the old startup ALTER TABLE attempts.
+"""
+from sqlalchemy import inspect, text
+
+
+def quote(conn, name):
+    return conn.dialect.identifier_preparer.quote(name)
+
+
+def has_column(conn, table, column):
+    return column in {col['name'] for col in inspect(conn).get_columns(table)}
+
+
+def add_column(conn, table, column, ddl):
+    """ALTER TABLE ... ADD COLUMN unless the column already exists."""
+    if not has_column(conn, table, column):
+        conn.execute(text(f"ALTER TABLE {quote(conn, table)} ADD COLUMN {column} {ddl}"))
+
+
+def create_table(conn, model):
+    """Create a model's table (and its declared indexes) if it is missing."""
+    model.__table__.create(conn, checkfirst=True)
+
+
+def create_index(conn, name, table, columns, unique=False):
+    unique_sql = 'UNIQUE ' if unique else ''
+    conn.execute(text(
+        f"CREATE {unique_sql}INDEX IF NOT EXISTS {name} ON {quote(conn, table)} ({columns})"
+    ))
@@ -0,0 +1,8 @@
+"""Create the original tables on an empty database."""
+from migrations.ops import create_table
+from models import User, LoreMap, Event, EventConnection, Character, EventCharacter, Item
+
+
+def upgrade(conn):
+    for model in (User, LoreMap, Character, Item, Event, EventConnection, EventCharacter):
+        create_table(conn, model)
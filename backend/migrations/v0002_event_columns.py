@@ -0,0 +1,9 @@
+"""Completion tracking, DM notes, ordering and connection types."""
+from migrations.ops import add_column
+
+
+def upgrade(conn):
+    add_column(conn, 'event', 'is_completed', 'BOOLEAN DEFAULT FALSE')
+    add_column(conn, 'event', 'dm_notes', 'TEXT')
+    add_column(conn, 'event', 'order_number', 'INTEGER')
+    add_column(conn, 'event_connection', 'connection_type', "VARCHAR(20) DEFAULT 'default'")
@@ -0,0 +1,10 @@
+"""Lore map versions and tombstones for delta sync."""
+from migrations.ops import add_column, create_table
+from models import Tombstone
+
+
+def upgrade(conn):
+    add_column(conn, 'lore_map', 'version', 'INTEGER DEFAULT 0')
+    add_column(conn, 'event', 'version', 'INTEGER DEFAULT 0')
+    add_column(conn, 'event_connection', 'version', 'INTEGER DEFAULT 0')
+    create_table(conn, Tombstone)
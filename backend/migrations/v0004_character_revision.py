@@ -0,0 +1,6 @@
+"""Per-user character catalog revision used for ETags."""
+from migrations.ops import add_column
+
+
+def upgrade(conn):
+    add_column(conn, 'user', 'character_revision', 'INTEGER DEFAULT 0')
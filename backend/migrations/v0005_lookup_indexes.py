@@ -0,0 +1,28 @@
+"""Indexes for the hot lookup paths and unique event-character links."""
+from sqlalchemy import text
+from migrations.ops import create_index
+
+# Mirrored by the model definitions so create_all builds the same indexes
+INDEXES = [
+    ("ix_lore_map_user_id", "lore_map", "user_id"),
+    ("ix_event_lore_map_id_version", "event", "lore_map_id, version"),
+    ("ix_event_connection_from_event_id", "event_connection", "from_event_id"),
+    ("ix_event_connection_to_event_id", "event_connection", "to_event_id"),
+    ("ix_event_character_character_id", "event_character", "character_id"),
+    ("ix_character_user_id_is_official_name", "character", "user_id, is_official, name"),
+    ("ix_character_is_official_name_id", "character", "is_official, name, id"),
+    ("ix_tombstone_lore_map_id_version", "tombstone", "lore_map_id, version"),
+]
+
+
+def upgrade(conn):
+    for name, table, columns in INDEXES:
+        create_index(conn, name, table, columns)
+
+    # Older databases may hold duplicate links; keep the first of each
+    conn.execute(text(
+        "DELETE FROM event_character WHERE id NOT IN ("
+        "SELECT MIN(id) FROM event_character GROUP BY event_id, character_id)"
+    ))
+    create_index(conn, 'uq_event_character_event_id_character_id', 'event_character',
+                 'event_id, character_id', unique=True)
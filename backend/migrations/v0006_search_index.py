@@ -0,0 +1,12 @@
+"""Full-text search index, backfilled from existing rows."""
+import search_index
+
+
+def upgrade(conn):
+    if not search_index.supported(conn):
+        return
+    search_index.create_schema(conn)
+    # Characters are indexed by v0015, once v0008 has made their action
+    # columns valid JSON for the extraction the index now does
+    for entity_type in ('lore_map', 'event'):
+        search_index.reindex(conn, entity_type)
@@ -0,0 +1,9 @@
+"""Source key, content hash and update time for SRD-imported characters."""
+from migrations.ops import add_column, create_index
+
+
+def upgrade(conn):
+    add_column(conn, 'character', 'source_key', 'VARCHAR(100)')
+    add_column(conn, 'character', 'source_hash', 'VARCHAR(64)')
+    add_column(conn, 'character', 'updated_at', 'TIMESTAMP')
+    create_index(conn, 'ix_character_source_key', 'character', 'source_key', unique=True)
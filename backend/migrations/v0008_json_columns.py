@@ -0,0 +1,53 @@
+"""Clean legacy JSON text and convert JSON columns to JSONB on Postgres.
+
+Older clients stored ``'[object Object]'``, ``'undefined'`` and similar
+placeholders, plus the odd bit of free text, in these columns. Every value
+is rewritten to valid JSON (or NULL) so the native JSON type can decode
+without defensive parsing.
+"""
+import json
+from sqlalchemy import text
+from migrations.ops import quote
+from models.types import coerce_json
+
+JSON_COLUMNS = [
+    ('character', 'actions'),
+    ('character', 'legendary_actions'),
+    ('character', 'special_abilities'),
+    ('character', 'reactions'),
+    ('character', 'skills'),
+    ('event', 'conditions'),
+    ('event_connection', 'condition'),
+]
+
+BATCH_SIZE = 1000
+
+
+def upgrade(conn):
+    for table, column in JSON_COLUMNS:
+        table_sql, column_sql = quote(conn, table), quote(conn, column)
+        last_id = 0
+        while True:
+            rows = conn.execute(text(
+                f"SELECT id, {column_sql} FROM {table_sql} "
+                f"WHERE id > :last_id AND {column_sql} IS NOT NULL ORDER BY id LIMIT {BATCH_SIZE}"
+            ), {'last_id': last_id}).fetchall()
+            if not rows:
+                break
+            last_id = rows[-1][0]
+
+            updates = []
+            for row_id, raw in rows:
+                value = coerce_json(raw)
+                cleaned = None if value is None else json.dumps(value)
+                if cleaned != raw:
+                    updates.append({'id': row_id, 'value': cleaned})
+            if updates:
+                conn.execute(text(
+                    f"UPDATE {table_sql} SET {column_sql} = :value WHERE id = :id"
+                ), updates)
+
+        if conn.dialect.name == 'postgresql':
+            conn.execute(text(
+                f"ALTER TABLE {table_sql} ALTER COLUMN {column_sql} TYPE JSONB USING {column_sql}::jsonb"
+            ))
@@ -0,0 +1,7 @@
+"""Composite position index for viewport (bbox) queries on lore map canvases."""
+from migrations.ops import create_index
+
+
+def upgrade(conn):
+    create_index(conn, 'ix_event_lore_map_id_position', 'event',
+                 'lore_map_id, position_x, position_y')
@@ -0,0 +1,24 @@
+"""Numeric challenge rating column, backfilled from the free-form string."""
+from sqlalchemy import text
+from challenge_ratings import parse_challenge_rating
+from migrations.ops import add_column, create_index, quote
+
+
+def upgrade(conn):
+    add_column(conn, 'character', 'challenge_rating_value', 'FLOAT')
+
+    # Few distinct spellings exist, so update per value rather than per row
+    table = quote(conn, 'character')
+    values = conn.execute(text(
+        f"SELECT DISTINCT challenge_rating FROM {table} WHERE challenge_rating IS NOT NULL"
+    )).scalars().all()
+    updates = [
+        {'rating': rating, 'value': parse_challenge_rating(rating)}
+        for rating in values if parse_challenge_rating(rating) is not None
+    ]
+    if updates:
+        conn.execute(text(
+            f"UPDATE {table} SET challenge_rating_value = :value WHERE challenge_rating = :rating"
+        ), updates)
+
+    create_index(conn, 'ix_character_challenge_rating_value', 'character', 'challenge_rating_value')
@@ -0,0 +1,11 @@
+"""Reference-counted content-addressed uploads.
+
+Existing ``<timestamp>_<name>`` files keep their names and are not counted;
+only files written through ``upload_store`` get a row.
+"""
+from models import Upload
+from migrations.ops import create_table
+
+
+def upgrade(conn):
+    create_table(conn, Upload)
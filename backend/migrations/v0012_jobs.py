@@ -0,0 +1,7 @@
+"""Background job table."""
+from models import Job
+from migrations.ops import create_table
+
+
+def upgrade(conn):
+    create_table(conn, Job)
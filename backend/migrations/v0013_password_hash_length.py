@@ -0,0 +1,11 @@
+"""Room for scrypt password hashes, which are longer than 128 characters."""
+from sqlalchemy import text
+from migrations.ops import quote
+
+
+def upgrade(conn):
+    # SQLite doesn't enforce VARCHAR lengths
+    if conn.dialect.name == 'postgresql':
+        conn.execute(text(
+            f"ALTER TABLE {quote(conn, 'user')} ALTER COLUMN password_hash TYPE VARCHAR(255)"
+        ))
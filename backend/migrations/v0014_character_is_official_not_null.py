@@ -0,0 +1,19 @@
+"""Backfill NULL ``character.is_official`` and make the column NOT NULL DEFAULT false.
+
+Keyset pagination orders on the plain column so it can use
+``ix_character_is_official_name_id``; a NULL would drop out of the cursor
+comparison.
+"""
+from sqlalchemy import text
+from migrations.ops import quote
+
+
+def upgrade(conn):
+    table = quote(conn, 'character')
+    conn.execute(text(f"UPDATE {table} SET is_official = :false WHERE is_official IS NULL"), {'false': False})
+
+    # SQLite can't change constraints without rebuilding the table; the
+    # model's default and databases created from it cover new rows there
+    if conn.dialect.name == 'postgresql':
+        conn.execute(text(f"ALTER TABLE {table} ALTER COLUMN is_official SET DEFAULT false"))
+        conn.execute(text(f"ALTER TABLE {table} ALTER COLUMN is_official SET NOT NULL"))
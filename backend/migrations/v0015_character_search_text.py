@@ -0,0 +1,8 @@
+"""Re-index characters from their actions' text rather than the raw JSON."""
+import search_index
+
+
+def upgrade(conn):
+    if not search_index.supported(conn):
+        return
+    search_index.reindex(conn, 'character')
@@ -3,6 +3,9 @@ from models.lore_map import LoreMap
 from models.event import Event, EventConnection
 from models.character import Character, EventCharacter
 from models.item import Item
+from models.tombstone import Tombstone
+from models.upload import Upload
+from models.job import Job
 
 __all__ = [
     'User',
@@ -12,4 +15,7 @@ __all__ = [
     'Character',
     'EventCharacter',
     'Item',
+    'Tombstone',
+    'Upload',
+    'Job',
 ]
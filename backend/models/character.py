@@ -1,7 +1,18 @@
+from datetime import datetime
+from sqlalchemy.orm import validates
+from challenge_ratings import parse_challenge_rating
 from extensions import db
+from models.types import JSONData
 
 
 class Character(db.Model):
+    __table_args__ = (
+        db.Index('ix_character_user_id_is_official_name', 'user_id', 'is_official', 'name'),
+        db.Index('ix_character_is_official_name_id', 'is_official', 'name', 'id'),
+        db.Index('ix_character_source_key', 'source_key', unique=True),
+        db.Index('ix_character_challenge_rating_value', 'challenge_rating_value'),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(100), nullable=False)
     character_type = db.Column(db.String(50))
@@ -22,19 +33,25 @@ class Character(db.Model):
 
     # Monster-specific fields
     challenge_rating = db.Column(db.String(10))
+    challenge_rating_value = db.Column(db.Float)  # Numeric CR, kept in sync for sorting/filtering
     creature_type = db.Column(db.String(50))
 
     # Official vs User-created
-    is_official = db.Column(db.Boolean, default=False)
+    is_official = db.Column(db.Boolean, nullable=False, default=False, server_default=db.false())
+
+    # SRD import bookkeeping: stable key and content hash of the source stat block
+    source_key = db.Column(db.String(100))
+    source_hash = db.Column(db.String(64))
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
     # Actions
-    actions = db.Column(db.Text)  # JSON string for actions like attacks
-    legendary_actions = db.Column(db.Text)  # JSON string for legendary actions
-    special_abilities = db.Column(db.Text)  # JSON string for special abilities
-    reactions = db.Column(db.Text)  # JSON string for reactions
+    actions = db.Column(JSONData)  # Actions like attacks
+    legendary_actions = db.Column(JSONData)
+    special_abilities = db.Column(JSONData)
+    reactions = db.Column(JSONData)
 
     # Additional D&D data
-    skills = db.Column(db.Text)  # JSON string for skills
+    skills = db.Column(JSONData)  # Skill name -> bonus
     damage_resistances = db.Column(db.Text)
     damage_immunities = db.Column(db.Text)
     condition_immunities = db.Column(db.Text)
@@ -44,9 +61,27 @@ class Character(db.Model):
     # Relationships
     events = db.relationship('EventCharacter', backref='character', lazy=True, cascade='all, delete-orphan')
 
+    @validates('challenge_rating')
+    def _sync_challenge_rating_value(self, key, value):
+        self.challenge_rating_value = parse_challenge_rating(value)
+        return value
+
 
 class EventCharacter(db.Model):
+    __table_args__ = (
+        db.Index('uq_event_character_event_id_character_id', 'event_id', 'character_id', unique=True),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     event_id = db.Column(db.Integer, db.ForeignKey('event.id'), nullable=False)
-    character_id = db.Column(db.Integer, db.ForeignKey('character.id'), nullable=False)
+    character_id = db.Column(db.Integer, db.ForeignKey('character.id'), nullable=False, index=True)
     role = db.Column(db.String(50))  # Role in this specific event
+
+
+def official_catalog_fingerprint():
+    """Row count, max id and last update of the official monsters, used to build cheap ETags."""
+    return db.session.query(
+        db.func.count(Character.id),
+        db.func.max(Character.id),
+        db.func.max(Character.updated_at)
+    ).filter(Character.user_id.is_(None), Character.is_official == True).one()
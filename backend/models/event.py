@@ -1,7 +1,14 @@
 from extensions import db
+from models.types import JSONData
 
 
 class Event(db.Model):
+    __table_args__ = (
+        db.Index('ix_event_lore_map_id_version', 'lore_map_id', 'version'),
+        # Viewport queries: range on position_x, position_y checked from the index
+        db.Index('ix_event_lore_map_id_position', 'lore_map_id', 'position_x', 'position_y'),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     title = db.Column(db.String(100), nullable=False)
     description = db.Column(db.Text)
@@ -9,12 +16,13 @@ class Event(db.Model):
     position_x = db.Column(db.Integer, default=0)
     position_y = db.Column(db.Integer, default=0)
     image_url = db.Column(db.String(255))
-    conditions = db.Column(db.Text)  # JSON string for conditions
+    conditions = db.Column(JSONData)  # List of unlock conditions
     is_party_location = db.Column(db.Boolean, default=False)
     is_completed = db.Column(db.Boolean, default=False)
     dm_notes = db.Column(db.Text)
     order_number = db.Column(db.Integer)
     lore_map_id = db.Column(db.Integer, db.ForeignKey('lore_map.id'), nullable=False)
+    version = db.Column(db.Integer, default=0)  # Lore map version of the last change
 
     # Relationships
     characters = db.relationship('EventCharacter', backref='event', lazy=True, cascade='all, delete-orphan')
@@ -32,24 +40,9 @@ class Event(db.Model):
 
 class EventConnection(db.Model):
     id = db.Column(db.Integer, primary_key=True)
-    from_event_id = db.Column(db.Integer, db.ForeignKey('event.id'), nullable=False)
-    to_event_id = db.Column(db.Integer, db.ForeignKey('event.id'), nullable=False)
+    from_event_id = db.Column(db.Integer, db.ForeignKey('event.id'), nullable=False, index=True)
+    to_event_id = db.Column(db.Integer, db.ForeignKey('event.id'), nullable=False, index=True)
     description = db.Column(db.String(255))
-    condition = db.Column(db.Text)  # JSON string for conditions
+    condition = db.Column(JSONData)  # Condition for following this connection
     connection_type = db.Column(db.String(20), default='default')  # default, success, failure, optional
-
-
-def run_migrations(db):
-    """Add new columns to existing tables safely."""
-    migrations = [
-        ("event", "is_completed", "BOOLEAN DEFAULT FALSE"),
-        ("event", "dm_notes", "TEXT"),
-        ("event", "order_number", "INTEGER"),
-        ("event_connection", "connection_type", "VARCHAR(20) DEFAULT 'default'"),
-    ]
-    for table, column, col_type in migrations:
-        try:
-            db.session.execute(db.text(f"ALTER TABLE {table} ADD COLUMN {column} {col_type}"))
-            db.session.commit()
-        except Exception:
-            db.session.rollback()
+    version = db.Column(db.Integer, default=0)  # Lore map version of the last change
@@ -8,7 +8,16 @@ class LoreMap(db.Model):
     description = db.Column(db.Text)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
-    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False, index=True)
+    version = db.Column(db.Integer, default=0)
 
     # Relationships
     events = db.relationship('Event', backref='lore_map', lazy=True, cascade='all, delete-orphan')
+    tombstones = db.relationship('Tombstone', lazy=True, cascade='all, delete-orphan')
+
+    def bump_version(self):
+        """Advance the map version and touch updated_at, returning the new version."""
+        self.version = db.func.coalesce(LoreMap.version, 0) + 1
+        self.updated_at = datetime.utcnow()
+        db.session.flush()
+        return self.version
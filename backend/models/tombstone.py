@@ -0,0 +1,24 @@
+from extensions import db
+
+
+class Tombstone(db.Model):
+    """Marks an event or connection deleted at a given lore map version."""
+    __table_args__ = (
+        db.Index('ix_tombstone_lore_map_id_version', 'lore_map_id', 'version'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    lore_map_id = db.Column(db.Integer, db.ForeignKey('lore_map.id'), nullable=False)
+    entity_type = db.Column(db.String(20), nullable=False)  # event, connection
+    entity_id = db.Column(db.Integer, nullable=False)
+    version = db.Column(db.Integer, nullable=False)
+
+
+def record_deletions(lore_map_id, entity_type, entity_ids, version):
+    """Insert tombstones for deleted rows so delta syncs can report them."""
+    db.session.bulk_insert_mappings(Tombstone, [{
+        "lore_map_id": lore_map_id,
+        "entity_type": entity_type,
+        "entity_id": entity_id,
+        "version": version
+    } for entity_id in entity_ids])
@@ -0,0 +1,40 @@
+import json
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.types import JSON, TypeDecorator
+
+# Placeholders older clients wrote into JSON text columns
+LEGACY_EMPTY_VALUES = {'', '[object Object]', 'undefined', 'null'}
+
+
+def coerce_json(value):
+    """Decode a JSON-encoded string, mapping legacy placeholders to None.
+
+    Text that isn't JSON is kept as a plain string value rather than dropped.
+    """
+    if not isinstance(value, str):
+        return value
+    if value.strip() in LEGACY_EMPTY_VALUES:
+        return None
+    try:
+        return json.loads(value)
+    except ValueError:
+        return value
+
+
+class JSONData(TypeDecorator):
+    """Native JSON column: JSONB on Postgres, JSON (text) on SQLite.
+
+    Values are decoded once by the driver/result processor, so routes get
+    lists and dicts back directly. Strings are still accepted on write and
+    decoded, since clients have always sent these fields JSON-encoded.
+    """
+    impl = JSON
+    cache_ok = True
+
+    def load_dialect_impl(self, dialect):
+        if dialect.name == 'postgresql':
+            return dialect.type_descriptor(JSONB(none_as_null=True))
+        return dialect.type_descriptor(JSON(none_as_null=True))
+
+    def process_bind_param(self, value, dialect):
+        return coerce_json(value)
@@ -0,0 +1,22 @@
+from datetime import datetime
+from extensions import db
+
+
+class Upload(db.Model):
+    """One stored file, named by its content hash and shared by every event that uses it."""
+    __table_args__ = (
+        db.Index('ix_upload_ref_count_updated_at', 'ref_count', 'updated_at'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    sha256 = db.Column(db.String(64), unique=True, nullable=False)
+    extension = db.Column(db.String(10), nullable=False)
+    size = db.Column(db.Integer, nullable=False)
+    ref_count = db.Column(db.Integer, nullable=False, default=0)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    # Last store or reference change; garbage collection waits out a grace period after it
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    @property
+    def filename(self):
+        return f'{self.sha256}.{self.extension}'
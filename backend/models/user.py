@@ -6,10 +6,19 @@ class User(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     username = db.Column(db.String(50), unique=True, nullable=False)
     email = db.Column(db.String(120), unique=True, nullable=False)
-    password_hash = db.Column(db.String(128), nullable=False)
+    password_hash = db.Column(db.String(255), nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    character_revision = db.Column(db.Integer, default=0)  # Bumped on any character change
 
     # Relationships
     lore_maps = db.relationship('LoreMap', backref='author', lazy=True)
     characters = db.relationship('Character', backref='creator', lazy=True)
     items = db.relationship('Item', backref='creator', lazy=True)
+
+
+def bump_character_revision(user_id):
+    """Invalidate ETags derived from the user's character catalog."""
+    User.query.filter_by(id=user_id).update(
+        {User.character_revision: db.func.coalesce(User.character_revision, 0) + 1},
+        synchronize_session=False
+    )
@@ -0,0 +1,141 @@
+"""Process-level cache of pre-serialized official monster JSON.
+
+Official monsters are identical for every user, so their JSON is built once
+and stored as bytes. Callers splice those bytes into each response and only
+serialize the user's own characters themselves.
+
+Cache keys embed version data (the official catalog fingerprint, or a row's
+``updated_at``), so a worker never serves stale rows even if another
+process changed the catalog. ``invalidate`` frees the stale entries
+explicitly. The ``filesystem`` backend lets every gunicorn worker on a host
+share one copy; the default ``memory`` backend is per process.
+"""
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+
+from flask import current_app
+
+
+class MemoryBackend:
+    """Thread-safe LRU bounded by the total size of the stored values."""
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        if len(value) > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._size -= len(self._entries.pop(key))
+            self._entries[key] = value
+            self._size += len(value)
+            while self._size > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._size -= len(evicted)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+
+class FileBackend:
+    """Shares entries between processes through files, bounded by total size."""
+
+    def __init__(self, directory, max_bytes):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.directory, hashlib.sha1(key.encode('utf-8')).hexdigest() + '.json')
+
+    def get(self, key):
+        try:
+            with open(self._path(key), 'rb') as fp:
+                return fp.read()
+        except FileNotFoundError:
+            return None
+
+    def set(self, key, value):
+        if len(value) > self.max_bytes:
+            return
+        path = self._path(key)
+        # Write then rename, so readers never see a partial file
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'wb') as fp:
+            fp.write(value)
+        os.replace(tmp_path, path)
+        self._prune()
+
+    def _prune(self):
+        entries = []
+        for name in os.listdir(self.directory):
+            if name.endswith('.json'):
+                try:
+                    stat = os.stat(os.path.join(self.directory, name))
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, name))
+        total = sum(size for _, size, _ in entries)
+        for _, size, name in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(os.path.join(self.directory, name))
+            except FileNotFoundError:
+                pass
+            total -= size
+
+    def clear(self):
+        for name in os.listdir(self.directory):
+            try:
+                os.remove(os.path.join(self.directory, name))
+            except FileNotFoundError:
+                pass
+
+
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def get_backend():
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                config = current_app.config
+                if config['OFFICIAL_CACHE_BACKEND'] == 'filesystem':
+                    _backend = FileBackend(config['OFFICIAL_CACHE_DIR'], config['OFFICIAL_CACHE_MAX_BYTES'])
+                else:
+                    _backend = MemoryBackend(config['OFFICIAL_CACHE_MAX_BYTES'])
+    return _backend
+
+
+def cached(key, build):
+    """Return the cached bytes for ``key``, building and storing them on a miss."""
+    key = repr(key)
+    backend = get_backend()
+    value = backend.get(key)
+    if value is None:
+        value = build()
+        backend.set(key, value)
+    return value
+
+
+def invalidate():
+    """Drop every cached entry, e.g. after the SRD loader or an admin edits official rows."""
+    get_backend().clear()
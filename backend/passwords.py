@@ -0,0 +1,93 @@
+"""Password hashing off the request thread.
+
+Hashing is deliberately slow (hundreds of milliseconds at the default
+cost), so a burst of logins at session start would otherwise tie up every
+worker thread. Hashes run on a small per-process thread pool instead:
+``hashlib`` releases the GIL while it works, so the pool hashes in
+parallel while the other request threads keep serving lore maps, and at
+most ``PASSWORD_HASH_WORKERS`` cores are ever spent on it. A request waits
+at most ``PASSWORD_HASH_TIMEOUT`` seconds for one of the
+``PASSWORD_HASH_WORKERS + PASSWORD_HASH_QUEUE`` admission slots, then
+gets ``Busy``.
+
+``PASSWORD_HASH_METHOD`` and ``PASSWORD_SALT_LENGTH`` set the cost of new
+hashes. A successful login whose stored hash used other parameters also
+returns a fresh hash for the caller to save, so raising the cost upgrades
+users as they sign in.
+"""
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+
+from flask import current_app
+from werkzeug.security import check_password_hash, generate_password_hash
+
+_executor = None
+_slots = None
+_lock = threading.Lock()
+
+
+class Busy(Exception):
+    """Every hashing slot stayed taken for PASSWORD_HASH_TIMEOUT seconds."""
+
+
+@lru_cache(maxsize=4)
+def _reference_hash(method, salt_length):
+    """A hash made with the given parameters, for its prefix and for unknown users."""
+    return generate_password_hash('', method, salt_length)
+
+
+def _parameters(password_hash):
+    """(method, salt length) a stored hash was made with."""
+    method, salt, _ = password_hash.split('$', 2)
+    return method, len(salt)
+
+
+def _verify(password_hash, password, method, salt_length):
+    """(valid, new hash or None); runs on the pool."""
+    if password_hash is None:
+        # Same work as a real check, so response times don't reveal usernames
+        check_password_hash(_reference_hash(method, salt_length), password)
+        return False, None
+    if not check_password_hash(password_hash, password):
+        return False, None
+    if _parameters(password_hash) != _parameters(_reference_hash(method, salt_length)):
+        return True, generate_password_hash(password, method, salt_length)
+    return True, None
+
+
+def _run(fn, *args):
+    global _executor, _slots
+    config = current_app.config
+    workers = config['PASSWORD_HASH_WORKERS']
+    if not workers:
+        return fn(*args)
+
+    with _lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='passwords')
+            _slots = threading.BoundedSemaphore(workers + config['PASSWORD_HASH_QUEUE'])
+    if not _slots.acquire(timeout=config['PASSWORD_HASH_TIMEOUT']):
+        raise Busy()
+    try:
+        return _executor.submit(fn, *args).result()
+    finally:
+        _slots.release()
+
+
+def hash_password(password):
+    """Hash a new password with the configured parameters."""
+    config = current_app.config
+    return _run(generate_password_hash, password,
+                config['PASSWORD_HASH_METHOD'], config['PASSWORD_SALT_LENGTH'])
+
+
+def verify_password(password_hash, password):
+    """Check ``password`` against a stored hash (None for an unknown user).
+
+    Returns ``(valid, new_hash)``; ``new_hash`` is set when the password
+    was right but the stored hash used outdated parameters.
+    """
+    config = current_app.config
+    return _run(_verify, password_hash, password,
+                config['PASSWORD_HASH_METHOD'], config['PASSWORD_SALT_LENGTH'])
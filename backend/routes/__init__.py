@@ -4,6 +4,10 @@ from routes.events import events_bp
 from routes.battle_maps import battle_maps_bp
 from routes.characters import characters_bp
 from routes.event_characters import event_characters_bp
+from routes.search import search_bp
+from routes.dice import dice_bp
+from routes.encounters import encounters_bp
+from routes.jobs import jobs_bp
 
 all_blueprints = [
     auth_bp,
@@ -12,4 +16,8 @@ all_blueprints = [
     battle_maps_bp,
     characters_bp,
     event_characters_bp,
+    search_bp,
+    dice_bp,
+    encounters_bp,
+    jobs_bp,
 ]
@@ -1,11 +1,16 @@
-from flask import Blueprint, jsonify, request, session
-from werkzeug.security import generate_password_hash, check_password_hash
+from flask import Blueprint, g, jsonify, request, session
 from extensions import db
+from access import login_required, user_summary
 from models import User
+from passwords import Busy, hash_password, verify_password
 
 auth_bp = Blueprint('auth', __name__)
 
 
+def _busy():
+    return jsonify({"error": "Too many sign-ins in progress, please try again"}), 503, {'Retry-After': '1'}
+
+
 @auth_bp.route('/api/register', methods=['POST'])
 def register():
     data = request.json
@@ -17,11 +22,18 @@ def register():
     if User.query.filter_by(email=data.get('email')).first():
         return jsonify({"error": "Email already exists"}), 400
 
+    # Don't hold a database connection while the password hashes
+    db.session.rollback()
+    try:
+        password_hash = hash_password(data.get('password'))
+    except Busy:
+        return _busy()
+
     # Create new user
     new_user = User(
         username=data.get('username'),
         email=data.get('email'),
-        password_hash=generate_password_hash(data.get('password'))
+        password_hash=password_hash
     )
 
     db.session.add(new_user)
@@ -37,9 +49,24 @@ def register():
 @auth_bp.route('/api/login', methods=['POST'])
 def login():
     data = request.json
-    user = User.query.filter_by(username=data.get('username')).first()
-
-    if user and check_password_hash(user.password_hash, data.get('password')):
+    user = db.session.query(User.id, User.username, User.password_hash).filter_by(
+        username=data.get('username')
+    ).first()
+    # Don't hold a database connection while the password hashes
+    db.session.rollback()
+
+    try:
+        valid, new_hash = verify_password(user.password_hash if user else None, data.get('password') or '')
+    except Busy:
+        return _busy()
+
+    if valid:
+        if new_hash:
+            # Hashed with outdated parameters; skipped if the password changed meanwhile
+            User.query.filter_by(id=user.id, password_hash=user.password_hash).update(
+                {User.password_hash: new_hash}, synchronize_session=False
+            )
+            db.session.commit()
         session['user_id'] = user.id
         return jsonify({
             "id": user.id,
@@ -57,17 +84,15 @@ def logout():
 
 
 @auth_bp.route('/api/validate-session', methods=['GET'])
+@login_required
 def validate_session():
-    user_id = session.get('user_id')
-    if not user_id:
-        return jsonify({"error": "Not authenticated"}), 401
-
-    user = User.query.get(user_id)
+    # Cached per process, so app loads don't each query the user table
+    user = user_summary(g.user_id)
     if not user:
         return jsonify({"error": "User not found"}), 404
 
     return jsonify({
-        "id": user.id,
-        "username": user.username,
+        "id": user["id"],
+        "username": user["username"],
         "message": "Session is valid"
     })
@@ -1,29 +1,27 @@
 import os
-from datetime import datetime
-from flask import Blueprint, jsonify, request, session, send_from_directory, current_app
+from flask import Blueprint, current_app, g, jsonify, request
 from werkzeug.utils import secure_filename
 from extensions import db
-from models import Event, LoreMap
+from access import owns_event
+import image_variants
+import jobs
+import tile_pyramid
+import upload_serving
+import upload_store
+from models import Event
 from utils import allowed_file
 
 battle_maps_bp = Blueprint('battle_maps', __name__)
 
+UPLOAD_MAX_AGE = 24 * 60 * 60
+VARIANT_MAX_AGE = 365 * 24 * 60 * 60
+STORED_MAX_AGE = 365 * 24 * 60 * 60
+PENDING_MAX_AGE = 60
 
-@battle_maps_bp.route('/api/events/<int:event_id>/battle-map', methods=['POST'])
-def upload_battle_map(event_id):
-    user_id = session.get('user_id')
-    if not user_id:
-        return jsonify({"error": "Not authenticated"}), 401
-
-    # Check if event belongs to user
-    event = Event.query.join(LoreMap).filter(
-        Event.id == event_id,
-        LoreMap.user_id == user_id
-    ).first()
-
-    if not event:
-        return jsonify({"error": "Event not found"}), 404
 
+@battle_maps_bp.route('/api/events/<int:event_id>/battle-map', methods=['POST'])
+@owns_event()
+def upload_battle_map(event):
     if 'battle_map' not in request.files:
         return jsonify({"error": "No file provided"}), 400
 
@@ -32,57 +30,136 @@ def upload_battle_map(event_id):
         return jsonify({"error": "No file selected"}), 400
 
     if file and allowed_file(file.filename):
-        # Create a unique filename
-        filename = secure_filename(file.filename)
-        timestamp = str(int(datetime.utcnow().timestamp()))
-        filename = f"{timestamp}_{filename}"
-
-        # Save the file
-        filepath = os.path.join(current_app.config['UPLOAD_FOLDER'], filename)
-        file.save(filepath)
-
-        # Update the event with the image URL
-        event.image_url = f"/api/uploads/{filename}"
+        # Stored under its content hash; re-uploading the same map reuses the file
+        extension = file.filename.rsplit('.', 1)[1]
+        filename = upload_store.store(file.stream, extension, current_app.config['UPLOAD_FOLDER'])
+
+        # Update the event with the image URL; the previous file loses a reference
+        event.image_url = upload_store.url_for_file(filename)
+        event.version = event.lore_map.bump_version()
+
+        # Thumbnails and WebP copies are built by background jobs, committed
+        # together with the event
+        upload_folder = current_app.config['UPLOAD_FOLDER']
+        queued = {"variants": jobs.enqueue('image_variants', key=filename, user_id=g.user_id,
+                                           upload_folder=upload_folder, filename=filename)}
+        # tiles=1 also cuts a deep-zoom pyramid, for maps too large to decode whole
+        tiles = request.form.get('tiles', '').lower() in ('1', 'true', 'yes') and \
+            not image_variants.is_vector(filename)
+        if tiles:
+            queued["tiles"] = jobs.enqueue('tiles', key=filename, user_id=g.user_id,
+                                           upload_folder=upload_folder, filename=filename)
         db.session.commit()
 
-        return jsonify({
+        result = {
             "message": "Battle map uploaded successfully",
-            "battle_map_url": event.image_url
-        })
+            "battle_map_url": event.image_url,
+            "jobs": {name: job.id for name, job in queued.items()}
+        }
+        if tiles:
+            result["tiles_url"] = f"{event.image_url}/tiles"
+        return jsonify(result)
 
     return jsonify({"error": "Invalid file type"}), 400
 
 
 @battle_maps_bp.route('/api/events/<int:event_id>/battle-map', methods=['DELETE'])
-def delete_battle_map(event_id):
-    user_id = session.get('user_id')
-    if not user_id:
-        return jsonify({"error": "Not authenticated"}), 401
-
-    # Check if event belongs to user
-    event = Event.query.join(LoreMap).filter(
-        Event.id == event_id,
-        LoreMap.user_id == user_id
-    ).first()
-
-    if not event:
-        return jsonify({"error": "Event not found"}), 404
-
-    # Delete the file if it exists
-    if event.image_url:
-        filename = event.image_url.split('/')[-1]
-        filepath = os.path.join(current_app.config['UPLOAD_FOLDER'], filename)
-
-        if os.path.exists(filepath):
+@owns_event()
+def delete_battle_map(event):
+    # Stored files are reference-counted and left to `gc-uploads`. Files from
+    # before the store are deleted here unless another event still uses them.
+    filename = upload_store.filename_from_url(event.image_url)
+    if filename and not upload_store.content_hash(filename):
+        shared = Event.query.filter(Event.image_url == event.image_url, Event.id != event.id).first()
+        filepath = os.path.join(current_app.config['UPLOAD_FOLDER'], secure_filename(filename))
+        if not shared and os.path.exists(filepath):
             os.remove(filepath)
+            image_variants.remove_variants(current_app.config['UPLOAD_FOLDER'], filename)
 
     # Remove the image URL from the event
     event.image_url = None
+    event.version = event.lore_map.bump_version()
     db.session.commit()
 
     return jsonify({"message": "Battle map deleted successfully"})
 
 
+def _send(upload_folder, filename, immutable):
+    max_age = STORED_MAX_AGE if immutable else UPLOAD_MAX_AGE
+    return upload_serving.send_upload(upload_folder, filename, max_age, immutable)
+
+
 @battle_maps_bp.route('/api/uploads/<filename>')
 def uploaded_file(filename):
-    return send_from_directory(current_app.config['UPLOAD_FOLDER'], filename)
+    """Serve an upload; ``?size=thumb|medium|full`` picks a WebP variant.
+
+    Variants are served with a one-year max-age. While a variant is still
+    being built the original is returned with a short max-age instead.
+    Content-addressed files never change under their name, so they and
+    their variants are also marked immutable. SVGs have no raster variants
+    and are sent precompressed when the client accepts it.
+    """
+    upload_folder = current_app.config['UPLOAD_FOLDER']
+    immutable = upload_store.content_hash(filename) is not None
+    size = request.args.get('size')
+    if size is None or image_variants.is_vector(filename):
+        return _send(upload_folder, filename, immutable)
+    if size not in image_variants.SIZES:
+        return jsonify({"error": "size must be one of thumb, medium, full"}), 400
+
+    filename = secure_filename(filename)
+    if size == 'full' and 'image/webp' not in request.accept_mimetypes:
+        response = _send(upload_folder, filename, immutable)
+        response.vary.add('Accept')
+        return response
+
+    if os.path.exists(image_variants.variant_path(upload_folder, filename, size)):
+        response = upload_serving.send_upload(
+            upload_folder, f'variants/{filename}/{size}.webp', VARIANT_MAX_AGE, immutable
+        )
+    else:
+        if not os.path.exists(os.path.join(upload_folder, filename)):
+            return jsonify({"error": "File not found"}), 404
+        jobs.queue_missing('image_variants', upload_folder, filename)
+        response = upload_serving.send_upload(upload_folder, filename, PENDING_MAX_AGE)
+    if size == 'full':
+        response.vary.add('Accept')
+    return response
+
+
+def _tiles_response(filename, relative_path):
+    """Send a file from an upload's pyramid, or 404 and queue the build if there is none yet."""
+    upload_folder = current_app.config['UPLOAD_FOLDER']
+    filename = secure_filename(filename)
+    tiles_dir = tile_pyramid.tiles_dir(upload_folder, filename)
+    if not os.path.isdir(tiles_dir):
+        if image_variants.is_vector(filename) or not os.path.exists(os.path.join(upload_folder, filename)):
+            return jsonify({"error": "File not found"}), 404
+        # The build is shared by everyone viewing the map and owned by no user,
+        # so there's no job id to hand out; clients retry after Retry-After
+        job = jobs.queue_missing('tiles', upload_folder, filename)
+        if job.status == 'failed':
+            return jsonify({"error": "Tiles could not be generated"}), 404
+        response = jsonify({"error": "Tiles are being generated"})
+        response.headers['Retry-After'] = 5
+        return response, 404
+    if not os.path.exists(os.path.join(tiles_dir, relative_path)):
+        return jsonify({"error": "Tile not found"}), 404
+
+    # Tiles of a content-addressed upload can never change
+    immutable = upload_store.content_hash(filename) is not None
+    return upload_serving.send_upload(
+        upload_folder, f'variants/{filename}/tiles/{relative_path}', VARIANT_MAX_AGE, immutable
+    )
+
+
+@battle_maps_bp.route('/api/uploads/<filename>/tiles')
+def upload_tiles_info(filename):
+    """Pyramid description: ``width``, ``height``, ``tile_size``, ``levels`` and ``format``."""
+    return _tiles_response(filename, 'info.json')
+
+
+@battle_maps_bp.route('/api/uploads/<filename>/tiles/<int:z>/<int:x>/<int:y>')
+def upload_tile(filename, z, x, y):
+    """One deep-zoom tile; level 0 is the whole map in a single tile."""
+    return _tiles_response(filename, tile_pyramid.tile_path(z, x, y))
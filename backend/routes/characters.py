@@ -1,67 +1,166 @@
-from flask import Blueprint, jsonify, request, session
+import base64
+import heapq
+import json
+from flask import Blueprint, current_app, jsonify, request, session
+import official_catalog
+from challenge_ratings import parse_challenge_rating
 from extensions import db
-from models import Character
-from utils import safe_parse_json
+from models import Character, User
+from models.character import official_catalog_fingerprint
+from models.user import bump_character_revision
+from serializers import CHARACTER
+from utils import conditional_jsonify, make_etag
 
 characters_bp = Blueprint('characters', __name__)
 
 
+MAX_PAGE_SIZE = 500
+
+FILTER_ARGS = ('character_type', 'creature_type', 'name', 'cr_min', 'cr_max')
+
+
+def _encode_cursor(row):
+    key = [bool(row.is_official), row.name, row.id]
+    return base64.urlsafe_b64encode(json.dumps(key).encode('utf-8')).decode('ascii')
+
+
+def _decode_cursor(cursor):
+    is_official, name, char_id = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+    return bool(is_official), str(name), int(char_id)
+
+
 @characters_bp.route('/api/characters', methods=['GET'])
 def get_characters():
+    """List the user's characters and official monsters.
+
+    Optional query parameters: ``character_type``, ``creature_type``,
+    ``cr_min``/``cr_max``, ``name`` (prefix), ``fields`` (comma-separated
+    projection) and ``limit``/``cursor`` for keyset pagination. Paginated
+    requests return ``{"characters": [...], "next_cursor": ...}``.
+    """
     user_id = session.get('user_id')
     if not user_id:
         return jsonify({"error": "Not authenticated"}), 401
 
+    fields = list(CHARACTER.keys)
+    if request.args.get('fields'):
+        fields = [f.strip() for f in request.args['fields'].split(',') if f.strip()]
+        unknown = [f for f in fields if f not in CHARACTER]
+        if unknown:
+            return jsonify({"error": f"Unknown fields: {', '.join(unknown)}"}), 400
+
+    paginate = 'limit' in request.args or 'cursor' in request.args
+    limit = min(max(request.args.get('limit', 100, type=int), 1), MAX_PAGE_SIZE)
+    cursor = None
+    if request.args.get('cursor'):
+        try:
+            cursor = _decode_cursor(request.args['cursor'])
+        except (ValueError, TypeError):
+            return jsonify({"error": "Invalid cursor"}), 400
+
     try:
-        # Show both user's characters AND official monsters
-        characters = Character.query.filter(
-            db.or_(
-                Character.user_id == user_id,
-                db.and_(Character.user_id.is_(None), Character.is_official == True)
+        revision = db.session.query(User.character_revision).filter(User.id == user_id).scalar()
+        official_fingerprint = tuple(official_catalog_fingerprint())
+        etag = make_etag('characters', user_id, revision, *official_fingerprint,
+                         request.query_string.decode('utf-8'))
+
+        if paginate or any(request.args.get(arg) for arg in FILTER_ARGS):
+            return conditional_jsonify(
+                etag, lambda: _build_characters(user_id, fields, paginate, limit, cursor)
             )
-        ).order_by(
-            Character.is_official.asc(),
-            Character.name.asc()
-        ).all()
-
-        result = []
-        for char in characters:
-            char_data = {
-                "id": char.id,
-                "name": char.name,
-                "character_type": char.character_type,
-                "description": char.description,
-                "strength": char.strength or 10,
-                "dexterity": char.dexterity or 10,
-                "constitution": char.constitution or 10,
-                "intelligence": char.intelligence or 10,
-                "wisdom": char.wisdom or 10,
-                "charisma": char.charisma or 10,
-                "armor_class": char.armor_class or 10,
-                "hit_points": char.hit_points or 1,
-                "challenge_rating": char.challenge_rating,
-                "creature_type": char.creature_type,
-                "is_official": char.is_official or False,
-                "user_id": char.user_id,
-                "actions": char.actions,
-                "legendary_actions": safe_parse_json(char.legendary_actions),
-                "special_abilities": safe_parse_json(char.special_abilities),
-                "reactions": safe_parse_json(char.reactions),
-                "skills": safe_parse_json(char.skills),
-                "damage_resistances": char.damage_resistances,
-                "damage_immunities": char.damage_immunities,
-                "condition_immunities": char.condition_immunities,
-                "senses": char.senses,
-                "languages": char.languages
-            }
-            result.append(char_data)
-
-        return jsonify(result)
+        return conditional_jsonify(
+            etag, lambda: _build_full_catalog(user_id, fields, official_fingerprint)
+        )
 
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
 
+def _catalog_query(columns, scope, cursor):
+    query = Character.query.with_entities(
+        *[getattr(Character, column) for column in columns]
+    ).filter(scope)
+
+    args = request.args
+    if args.get('character_type'):
+        query = query.filter(Character.character_type == args['character_type'])
+    if args.get('creature_type'):
+        query = query.filter(Character.creature_type == args['creature_type'])
+    if args.get('name'):
+        prefix = args['name'].replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+        query = query.filter(Character.name.ilike(prefix + '%', escape='\\'))
+    cr_min = parse_challenge_rating(args.get('cr_min'))
+    cr_max = parse_challenge_rating(args.get('cr_max'))
+    if cr_min is not None:
+        query = query.filter(Character.challenge_rating_value >= cr_min)
+    if cr_max is not None:
+        query = query.filter(Character.challenge_rating_value <= cr_max)
+
+    order_key = (Character.is_official, Character.name, Character.id)
+    if cursor:
+        query = query.filter(db.tuple_(*order_key) > db.tuple_(*cursor))
+    return query.order_by(*[column.asc() for column in order_key])
+
+
+def _catalog_columns(schema):
+    # The cursor needs the ordering key even if it wasn't asked for; extra
+    # columns go last so rows still line up with schema.dump_row
+    return list(dict.fromkeys(schema.columns + ('is_official', 'name', 'id')))
+
+
+def _build_characters(user_id, fields, paginate, limit, cursor):
+    schema = CHARACTER.only(fields)
+    columns = _catalog_columns(schema)
+    own = Character.user_id == user_id
+    official = db.and_(Character.user_id.is_(None), Character.is_official == True)
+
+    if paginate:
+        # One ordered index range scan per scope beats sorting the OR of both
+        own_rows = _catalog_query(columns, own, cursor).limit(limit + 1).all()
+        official_rows = _catalog_query(columns, official, cursor).limit(limit + 1).all()
+        rows = list(heapq.merge(
+            own_rows, official_rows,
+            key=lambda row: (bool(row.is_official), row.name, row.id)
+        ))[:limit + 1]
+    else:
+        # Show both user's characters AND official monsters
+        rows = _catalog_query(columns, db.or_(own, official), cursor).all()
+
+    result = schema.dump_rows(rows[:limit] if paginate else rows)
+
+    if not paginate:
+        return result
+
+    next_cursor = _encode_cursor(rows[limit - 1]) if len(rows) > limit else None
+    return {"characters": result, "next_cursor": next_cursor}
+
+
+def _json_items(items):
+    """Serialize a list and strip the brackets, leaving bytes that can be spliced."""
+    return current_app.json.dumps_bytes(items)[1:-1]
+
+
+def _build_full_catalog(user_id, fields, official_fingerprint):
+    schema = CHARACTER.only(fields)
+    columns = _catalog_columns(schema)
+    own_rows = _catalog_query(columns, Character.user_id == user_id, None).all()
+    if any(row.is_official for row in own_rows):
+        # Would interleave with the official block; too rare to be worth splicing
+        return _build_characters(user_id, fields, False, None, None)
+
+    official = db.and_(Character.user_id.is_(None), Character.is_official == True)
+    official_items = official_catalog.cached(
+        ('catalog', tuple(fields), official_fingerprint),
+        lambda: _json_items(schema.dump_rows(_catalog_query(columns, official, None)))
+    )
+
+    parts = [part for part in (_json_items(schema.dump_rows(own_rows)),
+                               official_items) if part]
+    return current_app.response_class(
+        b'[' + b','.join(parts) + b']\n', mimetype='application/json'
+    )
+
+
 @characters_bp.route('/api/characters/<int:id>', methods=['GET'])
 def get_character(id):
     user_id = session.get('user_id')
@@ -69,7 +168,7 @@ def get_character(id):
         return jsonify({"error": "Not authenticated"}), 401
 
     # Allow access to both user's characters AND official monsters
-    character = Character.query.filter(
+    key = db.session.query(Character.user_id, Character.is_official, Character.updated_at).filter(
         Character.id == id,
         db.or_(
             Character.user_id == user_id,
@@ -77,37 +176,18 @@ def get_character(id):
         )
     ).first()
 
-    if not character:
+    if not key:
         return jsonify({"error": "Character not found"}), 404
 
-    return jsonify({
-        "id": character.id,
-        "name": character.name,
-        "character_type": character.character_type,
-        "description": character.description,
-        "user_id": character.user_id,
-        "is_official": character.is_official or False,
-        "strength": character.strength or 10,
-        "dexterity": character.dexterity or 10,
-        "constitution": character.constitution or 10,
-        "intelligence": character.intelligence or 10,
-        "wisdom": character.wisdom or 10,
-        "charisma": character.charisma or 10,
-        "armor_class": character.armor_class or 10,
-        "hit_points": character.hit_points or 1,
-        "creature_type": character.creature_type,
-        "challenge_rating": character.challenge_rating,
-        "actions": safe_parse_json(character.actions),
-        "legendary_actions": safe_parse_json(character.legendary_actions),
-        "special_abilities": safe_parse_json(character.special_abilities),
-        "reactions": safe_parse_json(character.reactions),
-        "skills": safe_parse_json(character.skills),
-        "damage_resistances": character.damage_resistances,
-        "damage_immunities": character.damage_immunities,
-        "condition_immunities": character.condition_immunities,
-        "senses": character.senses,
-        "languages": character.languages
-    })
+    if key.user_id is None:
+        # Official rows are shared by everyone; serve the cached bytes
+        body = official_catalog.cached(
+            ('character', id, key.updated_at),
+            lambda: current_app.json.dumps_bytes(CHARACTER.dump(db.session.get(Character, id)))
+        )
+        return current_app.response_class(body + b'\n', mimetype='application/json')
+
+    return jsonify(CHARACTER.dump(db.session.get(Character, id)))
 
 
 @characters_bp.route('/api/characters', methods=['POST'])
@@ -134,11 +214,12 @@ def create_character():
             challenge_rating=data.get('challenge_rating', '0'),
             creature_type=data.get('creature_type', 'humanoid'),
             actions=data.get('actions'),
-            is_official=data.get('is_official', False),
+            is_official=bool(data.get('is_official', False)),
             user_id=user_id
         )
 
         db.session.add(new_character)
+        bump_character_revision(user_id)
         db.session.commit()
 
         return jsonify({
@@ -198,6 +279,7 @@ def update_character(id):
         if 'actions' in data:
             character.actions = data['actions']
 
+        bump_character_revision(user_id)
         db.session.commit()
 
         return jsonify({
@@ -238,6 +320,7 @@ def delete_character(id):
 
     try:
         db.session.delete(character)
+        bump_character_revision(user_id)
         db.session.commit()
         return jsonify({"message": "Character deleted successfully!"})
     except Exception as e:
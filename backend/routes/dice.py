@@ -0,0 +1,100 @@
+import numpy as np
+from flask import Blueprint, jsonify, request, session
+import dice
+from utils import conditional_jsonify, make_etag
+
+dice_bp = Blueprint('dice', __name__)
+
+# Above this many repetitions only totals are returned, not every face
+DETAIL_LIMIT = 100
+MAX_BATCH = 50
+
+
+def _roll_result(notation, times):
+    totals, faces = dice.roll(notation, times)
+    result = {
+        "notation": notation,
+        "times": times,
+        "totals": totals.tolist(),
+        "min": int(totals.min()),
+        "max": int(totals.max()),
+        "mean": float(totals.mean())
+    }
+    if times <= DETAIL_LIMIT:
+        # One list per repetition, holding each dice term's faces
+        result["dice"] = [[term[i].tolist() for term in faces] for i in range(times)]
+    return result
+
+
+@dice_bp.route('/api/dice/roll', methods=['POST'])
+def roll_dice():
+    """Roll dice notation server-side.
+
+    Body: ``{"notation": "4d6kh3", "times": 6}`` or a batch
+    ``{"rolls": [{"notation": "1d20+4", "times": 30, "label": "goblins"}, ...]}``.
+    """
+    user_id = session.get('user_id')
+    if not user_id:
+        return jsonify({"error": "Not authenticated"}), 401
+
+    data = request.json or {}
+    batch = data.get('rolls')
+    requests_ = batch if isinstance(batch, list) else [data]
+    if not requests_ or len(requests_) > MAX_BATCH:
+        return jsonify({"error": f"Provide between 1 and {MAX_BATCH} rolls"}), 400
+
+    results = []
+    try:
+        for item in requests_:
+            if not isinstance(item, dict) or 'notation' not in item:
+                return jsonify({"error": "Each roll needs a notation"}), 400
+            times = item.get('times', 1)
+            if not isinstance(times, int) or times < 1:
+                return jsonify({"error": "times must be a positive integer"}), 400
+            result = _roll_result(item['notation'], times)
+            if 'label' in item:
+                result["label"] = item['label']
+            results.append(result)
+    except dice.DiceError as e:
+        return jsonify({"error": str(e)}), 400
+
+    return jsonify({"results": results} if isinstance(batch, list) else results[0])
+
+
+@dice_bp.route('/api/dice/distribution', methods=['GET'])
+def dice_distribution():
+    """Exact probability of every total of ``notation``; ``target`` adds P(total >= target)."""
+    user_id = session.get('user_id')
+    if not user_id:
+        return jsonify({"error": "Not authenticated"}), 401
+
+    notation = request.args.get('notation', '')
+    target = request.args.get('target', type=int)
+
+    try:
+        minimum, pmf = dice.distribution(notation)
+    except dice.DiceError as e:
+        return jsonify({"error": str(e)}), 400
+
+    def build():
+        totals = np.arange(minimum, minimum + len(pmf))
+        mean = float(totals @ pmf)
+        at_least = np.cumsum(pmf[::-1])[::-1]
+        result = {
+            "notation": notation,
+            "min": int(totals[0]),
+            "max": int(totals[-1]),
+            "mean": mean,
+            "stddev": float(np.sqrt(((totals - mean) ** 2) @ pmf)),
+            "outcomes": [
+                {"total": total, "p": p, "at_least": cumulative}
+                for total, p, cumulative in zip(totals.tolist(), pmf.tolist(), at_least.tolist())
+            ]
+        }
+        if target is not None:
+            index = target - minimum
+            result["target"] = target
+            result["p_at_least"] = 1.0 if index <= 0 else (float(at_least[index]) if index < len(pmf) else 0.0)
+        return result
+
+    return conditional_jsonify(make_etag('dice-distribution', notation, target), build)
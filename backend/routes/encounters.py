@@ -0,0 +1,70 @@
+from flask import Blueprint, jsonify, request, session
+from extensions import db
+import encounters
+from models import Character, Event, EventCharacter, LoreMap
+
+encounters_bp = Blueprint('encounters', __name__)
+
+MAX_CREATURES = 1000
+
+CREATURE_COLUMNS = ('id', 'name', 'challenge_rating', 'challenge_rating_value', 'armor_class',
+                    'hit_points', 'actions') + encounters.ABILITIES
+
+
+@encounters_bp.route('/api/encounters/evaluate', methods=['POST'])
+def evaluate_encounter():
+    """XP budget, difficulty and per-creature stats for an encounter.
+
+    Body: ``party`` (levels, or objects with ``level`` and ``armor_class``),
+    then either ``character_ids`` (repeat an id per copy) or ``event_id`` to
+    use that event's non-PC characters, and optionally ``target_ac``.
+    """
+    user_id = session.get('user_id')
+    if not user_id:
+        return jsonify({"error": "Not authenticated"}), 401
+
+    data = request.json or {}
+    target_ac = data.get('target_ac')
+    if target_ac is not None and not isinstance(target_ac, int):
+        return jsonify({"error": "target_ac must be an integer"}), 400
+
+    if data.get('event_id') is not None:
+        event = Event.query.join(LoreMap).filter(
+            Event.id == data['event_id'],
+            LoreMap.user_id == user_id
+        ).first()
+        if not event:
+            return jsonify({"error": "Event not found"}), 404
+        ids = [row.character_id for row in db.session.query(EventCharacter.character_id).join(
+            Character, EventCharacter.character_id == Character.id
+        ).filter(
+            EventCharacter.event_id == event.id,
+            db.or_(Character.character_type.is_(None), Character.character_type != 'PC')
+        ).order_by(EventCharacter.id)]
+    else:
+        ids = data.get('character_ids')
+        if not isinstance(ids, list) or not all(isinstance(i, int) for i in ids):
+            return jsonify({"error": "Provide character_ids or event_id"}), 400
+
+    if len(ids) > MAX_CREATURES:
+        return jsonify({"error": f"An encounter may have at most {MAX_CREATURES} creatures"}), 400
+
+    # Own characters and official monsters, loaded once per distinct id
+    rows = db.session.query(*[getattr(Character, column) for column in CREATURE_COLUMNS]).filter(
+        Character.id.in_(set(ids)),
+        db.or_(
+            Character.user_id == user_id,
+            db.and_(Character.user_id.is_(None), Character.is_official == True)
+        )
+    ).all()
+    by_id = {row.id: row._asdict() for row in rows}
+    missing = sorted({i for i in ids if i not in by_id})
+    if missing:
+        return jsonify({"error": f"Characters not found: {', '.join(map(str, missing))}"}), 404
+
+    try:
+        result = encounters.evaluate(data.get('party'), [by_id[i] for i in ids], target_ac)
+    except encounters.EncounterError as e:
+        return jsonify({"error": str(e)}), 400
+
+    return jsonify(result)
@@ -1,51 +1,95 @@
-from flask import Blueprint, jsonify, request, session
+from flask import Blueprint, g, jsonify, request, session
+from sqlalchemy.exc import IntegrityError
 from extensions import db
-from models import Event, LoreMap, Character, EventCharacter
+from access import owns_event
+from models import Event, LoreMap, Character, EventCharacter, User
+from models.character import official_catalog_fingerprint
+from serializers import EVENT_CHARACTER
+from utils import conditional_jsonify, make_etag
 
 event_characters_bp = Blueprint('event_characters', __name__)
 
 
 @event_characters_bp.route('/api/events/<int:event_id>/characters', methods=['GET'])
-def get_event_characters(event_id):
+@owns_event()
+def get_event_characters(event):
+    user_id, event_id = g.user_id, event.id
+
+    # Membership fingerprint plus the user's catalog revision and the official
+    # catalog fingerprint, which cover renames of either kind of character
+    fingerprint = db.session.query(
+        db.func.count(EventCharacter.id),
+        db.func.max(EventCharacter.id),
+        db.func.sum(EventCharacter.character_id)
+    ).filter(EventCharacter.event_id == event_id).one()
+    revision = db.session.query(User.character_revision).filter(User.id == user_id).scalar()
+    official_fingerprint = tuple(official_catalog_fingerprint())
+
+    def build():
+        # Get all characters associated with this event
+        rows = _links_query().filter(EventCharacter.event_id == event_id).all()
+        return EVENT_CHARACTER.dump_rows(rows)
+
+    return conditional_jsonify(make_etag('event-characters', event_id, revision, *official_fingerprint, *fingerprint), build)
+
+
+def _links_query():
+    """Event-character links joined to their character, in EVENT_CHARACTER column order."""
+    return db.session.query(
+        EventCharacter.id,
+        EventCharacter.event_id,
+        EventCharacter.character_id,
+        EventCharacter.role,
+        Character.name,
+        Character.character_type,
+        Character.is_official
+    ).join(Character, EventCharacter.character_id == Character.id)
+
+
+def map_event_characters(lore_map_id):
+    """All event-character links of a lore map, grouped by event id, in one joined query."""
+    rows = _links_query().join(
+        Event, EventCharacter.event_id == Event.id
+    ).filter(Event.lore_map_id == lore_map_id).order_by(EventCharacter.id).all()
+
+    grouped = {}
+    for row in rows:
+        grouped.setdefault(row.event_id, []).append(EVENT_CHARACTER.dump_row(row))
+    return grouped
+
+
+def map_event_characters_fingerprint(lore_map_id, user_id):
+    fingerprint = db.session.query(
+        db.func.count(EventCharacter.id),
+        db.func.max(EventCharacter.id),
+        db.func.sum(EventCharacter.character_id)
+    ).join(Event, EventCharacter.event_id == Event.id).filter(Event.lore_map_id == lore_map_id).one()
+    revision = db.session.query(User.character_revision).filter(User.id == user_id).scalar()
+    return make_etag(revision, *official_catalog_fingerprint(), *fingerprint)
+
+
+@event_characters_bp.route('/api/loremaps/<int:lore_map_id>/event-characters', methods=['GET'])
+def get_lore_map_event_characters(lore_map_id):
     user_id = session.get('user_id')
     if not user_id:
         return jsonify({"error": "Not authenticated"}), 401
 
-    # Check if event belongs to user
-    event = Event.query.join(LoreMap).filter(Event.id == event_id, LoreMap.user_id == user_id).first()
-    if not event:
-        return jsonify({"error": "Event not found"}), 404
-
-    # Get all characters associated with this event
-    event_characters = db.session.query(EventCharacter, Character).join(
-        Character, EventCharacter.character_id == Character.id
-    ).filter(EventCharacter.event_id == event_id).all()
-
-    result = []
-    for event_char, character in event_characters:
-        result.append({
-            "id": event_char.id,
-            "event_id": event_char.event_id,
-            "character_id": event_char.character_id,
-            "role": event_char.role,
-            "character_name": character.name,
-            "character_type": character.character_type,
-            "is_official": character.is_official or False
-        })
+    # One ownership check for the whole map
+    lore_map = LoreMap.query.filter_by(id=lore_map_id, user_id=user_id).first()
+    if not lore_map:
+        return jsonify({"error": "Lore map not found"}), 404
 
-    return jsonify(result)
+    etag = make_etag('map-event-characters', lore_map_id,
+                     map_event_characters_fingerprint(lore_map_id, user_id))
+    return conditional_jsonify(etag, lambda: {
+        str(event_id): entries for event_id, entries in map_event_characters(lore_map_id).items()
+    })
 
 
 @event_characters_bp.route('/api/events/<int:event_id>/characters', methods=['POST'])
-def add_character_to_event(event_id):
-    user_id = session.get('user_id')
-    if not user_id:
-        return jsonify({"error": "Not authenticated"}), 401
-
-    # Check if event belongs to user
-    event = Event.query.join(LoreMap).filter(Event.id == event_id, LoreMap.user_id == user_id).first()
-    if not event:
-        return jsonify({"error": "Event not found"}), 404
+@owns_event()
+def add_character_to_event(event):
+    user_id, event_id = g.user_id, event.id
 
     data = request.json
     character_id = data.get('character_id')
@@ -62,11 +106,6 @@ def add_character_to_event(event_id):
     if not character:
         return jsonify({"error": "Character not found or access denied"}), 404
 
-    # Check if character is already in event
-    existing = EventCharacter.query.filter_by(event_id=event_id, character_id=character_id).first()
-    if existing:
-        return jsonify({"error": "Character already in event"}), 400
-
     # Add character to event
     event_character = EventCharacter(
         event_id=event_id,
@@ -86,21 +125,20 @@ def add_character_to_event(event_id):
             "message": "Character added to event!"
         }), 201
 
+    except IntegrityError:
+        # The unique (event_id, character_id) index rejects duplicates
+        db.session.rollback()
+        return jsonify({"error": "Character already in event"}), 400
+
     except Exception as e:
         db.session.rollback()
         return jsonify({"error": f"Database error: {str(e)}"}), 500
 
 
 @event_characters_bp.route('/api/events/<int:event_id>/characters/<int:character_id>', methods=['DELETE'])
-def remove_character_from_event(event_id, character_id):
-    user_id = session.get('user_id')
-    if not user_id:
-        return jsonify({"error": "Not authenticated"}), 401
-
-    # Check if event belongs to user
-    event = Event.query.join(LoreMap).filter(Event.id == event_id, LoreMap.user_id == user_id).first()
-    if not event:
-        return jsonify({"error": "Event not found"}), 404
+@owns_event()
+def remove_character_from_event(event, character_id):
+    event_id = event.id
 
     # Find and delete the event character relationship
     event_character = EventCharacter.query.filter_by(event_id=event_id, character_id=character_id).first()
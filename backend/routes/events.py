@@ -1,23 +1,15 @@
-import json
-from datetime import datetime
-from flask import Blueprint, jsonify, request, session
+from flask import Blueprint, jsonify, request
 from extensions import db
-from models import LoreMap, Event, EventConnection
+import story_graph
+from access import owns_event, owns_lore_map
+from models import Event, EventConnection
 
 events_bp = Blueprint('events', __name__)
 
 
 @events_bp.route('/api/loremaps/<int:lore_map_id>/events', methods=['POST'])
-def create_event(lore_map_id):
-    user_id = session.get('user_id')
-    if not user_id:
-        return jsonify({"error": "Not authenticated"}), 401
-
-    # Check if lore map exists and belongs to user
-    lore_map = LoreMap.query.filter_by(id=lore_map_id, user_id=user_id).first()
-    if not lore_map:
-        return jsonify({"error": "Lore map not found"}), 404
-
+@owns_lore_map()
+def create_event(lore_map):
     data = request.json
     position = data.get('position', {})
 
@@ -27,12 +19,13 @@ def create_event(lore_map_id):
         location=data.get('location', ''),
         position_x=position.get('x', 0),
         position_y=position.get('y', 0),
-        conditions=json.dumps(data.get('conditions', {})),
+        conditions=data.get('conditions', {}),
         is_party_location=data.get('is_party_location', False),
-        lore_map_id=lore_map_id
+        lore_map_id=lore_map.id
     )
 
     db.session.add(new_event)
+    new_event.version = lore_map.bump_version()
     db.session.commit()
 
     return jsonify({
@@ -50,20 +43,8 @@ def create_event(lore_map_id):
 
 
 @events_bp.route('/api/events/<int:event_id>', methods=['PUT'])
-def update_event(event_id):
-    user_id = session.get('user_id')
-    if not user_id:
-        return jsonify({"error": "Not authenticated"}), 401
-
-    # Get event and check if it belongs to user
-    event = Event.query.join(LoreMap).filter(
-        Event.id == event_id,
-        LoreMap.user_id == user_id
-    ).first()
-
-    if not event:
-        return jsonify({"error": "Event not found"}), 404
-
+@owns_event()
+def update_event(event):
     data = request.json
     position = data.get('position', {})
 
@@ -78,7 +59,7 @@ def update_event(event_id):
         event.position_x = position.get('x', event.position_x)
         event.position_y = position.get('y', event.position_y)
     if 'conditions' in data:
-        event.conditions = json.dumps(data['conditions'])
+        event.conditions = data['conditions']
     if 'is_party_location' in data:
         event.is_party_location = data['is_party_location']
     if 'is_completed' in data:
@@ -91,8 +72,8 @@ def update_event(event_id):
     if 'battle_map_url' in data and data['battle_map_url'] is not None:
         event.image_url = data['battle_map_url']
 
-    # Update the lore map's updated_at timestamp
-    event.lore_map.updated_at = datetime.utcnow()
+    # Bump the lore map's version and updated_at timestamp
+    event.version = event.lore_map.bump_version()
 
     db.session.commit()
 
@@ -110,29 +91,21 @@ def update_event(event_id):
         "dm_notes": event.dm_notes,
         "order_number": event.order_number,
         "battle_map_url": event.image_url,
-        "conditions": json.loads(event.conditions) if event.conditions else [],
+        "conditions": event.conditions if event.conditions is not None else [],
         "message": "Event updated successfully!"
     })
 
 
 @events_bp.route('/api/loremaps/<int:lore_map_id>/connections', methods=['POST'])
-def create_connection(lore_map_id):
-    user_id = session.get('user_id')
-    if not user_id:
-        return jsonify({"error": "Not authenticated"}), 401
-
-    # Check if lore map exists and belongs to user
-    lore_map = LoreMap.query.filter_by(id=lore_map_id, user_id=user_id).first()
-    if not lore_map:
-        return jsonify({"error": "Lore map not found"}), 404
-
+@owns_lore_map()
+def create_connection(lore_map):
     data = request.json
     from_event_id = data.get('from')
     to_event_id = data.get('to')
 
     # Check if both events exist and belong to this lore map
-    from_event = Event.query.filter_by(id=from_event_id, lore_map_id=lore_map_id).first()
-    to_event = Event.query.filter_by(id=to_event_id, lore_map_id=lore_map_id).first()
+    from_event = Event.query.filter_by(id=from_event_id, lore_map_id=lore_map.id).first()
+    to_event = Event.query.filter_by(id=to_event_id, lore_map_id=lore_map.id).first()
 
     if not from_event or not to_event:
         return jsonify({"error": "One or both events not found"}), 404
@@ -142,10 +115,11 @@ def create_connection(lore_map_id):
         from_event_id=from_event_id,
         to_event_id=to_event_id,
         description=data.get('description', ''),
-        condition=json.dumps(data.get('condition', {}))
+        condition=data.get('condition', {})
     )
 
     db.session.add(new_connection)
+    new_connection.version = lore_map.bump_version()
     db.session.commit()
 
     return jsonify({
@@ -159,24 +133,18 @@ def create_connection(lore_map_id):
 
 
 @events_bp.route('/api/events/<int:event_id>/toggle-complete', methods=['POST'])
-def toggle_event_complete(event_id):
-    user_id = session.get('user_id')
-    if not user_id:
-        return jsonify({"error": "Not authenticated"}), 401
-
-    event = Event.query.join(LoreMap).filter(
-        Event.id == event_id,
-        LoreMap.user_id == user_id
-    ).first()
-
-    if not event:
-        return jsonify({"error": "Event not found"}), 404
-
+@owns_event()
+def toggle_event_complete(event):
+    lore_map = event.lore_map
+    previous_version = lore_map.version or 0
     event.is_completed = not event.is_completed
+    event.version = lore_map.bump_version()
     db.session.commit()
 
     return jsonify({
         "id": event.id,
         "is_completed": event.is_completed,
+        "version": event.version,
+        "unlocks": story_graph.record_completion(lore_map, event.id, event.is_completed, previous_version),
         "message": "Event completion toggled!"
     })
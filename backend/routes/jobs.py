@@ -0,0 +1,20 @@
+from flask import Blueprint, jsonify, session
+from extensions import db
+from models import Job
+from serializers import JOB
+
+jobs_bp = Blueprint('jobs', __name__)
+
+
+@jobs_bp.route('/api/jobs/<int:job_id>', methods=['GET'])
+def get_job(job_id):
+    """Status of a background job the user queued, e.g. a battle map's variants."""
+    user_id = session.get('user_id')
+    if not user_id:
+        return jsonify({"error": "Not authenticated"}), 401
+
+    job = db.session.get(Job, job_id)
+    if not job or job.user_id != user_id:
+        return jsonify({"error": "Job not found"}), 404
+
+    return jsonify(JOB.dump(job))
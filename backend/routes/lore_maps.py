@@ -1,11 +1,21 @@
-import json
-from flask import Blueprint, jsonify, request, session
+import math
+from flask import Blueprint, Response, current_app, jsonify, request, session, stream_with_context
 from extensions import db
-from models import LoreMap, Event, EventConnection
-from datetime import datetime
+import campaign_archive
+import search_index
+import story_graph
+import upload_store
+from models import LoreMap, Event, EventConnection, EventCharacter, Tombstone
+from models.tombstone import record_deletions
+from models.user import bump_character_revision
+from routes.event_characters import map_event_characters, map_event_characters_fingerprint
+from serializers import EVENT, EVENT_CONNECTION, LORE_MAP
+from utils import conditional_jsonify, make_etag
 
 lore_maps_bp = Blueprint('lore_maps', __name__)
 
+MINIMAP_MAX_CELLS = 256
+
 
 @lore_maps_bp.route('/api/loremaps', methods=['GET'])
 def get_lore_maps():
@@ -13,16 +23,18 @@ def get_lore_maps():
     if not user_id:
         return jsonify({"error": "Not authenticated"}), 401
 
-    lore_maps = LoreMap.query.filter_by(user_id=user_id).all()
-    result = [{
-        "id": lm.id,
-        "title": lm.title,
-        "description": lm.description,
-        "created_at": lm.created_at.isoformat(),
-        "updated_at": lm.updated_at.isoformat()
-    } for lm in lore_maps]
+    fingerprint = db.session.query(
+        db.func.count(LoreMap.id),
+        db.func.max(LoreMap.id),
+        db.func.max(LoreMap.updated_at),
+        db.func.sum(LoreMap.version)
+    ).filter(LoreMap.user_id == user_id).one()
+
+    def build():
+        lore_maps = LoreMap.query.filter_by(user_id=user_id).all()
+        return LORE_MAP.dump_many(lore_maps)
 
-    return jsonify(result)
+    return conditional_jsonify(make_etag('loremaps', user_id, *fingerprint), build)
 
 
 @lore_maps_bp.route('/api/loremaps', methods=['POST'])
@@ -85,50 +97,268 @@ def get_lore_map(id):
     if not lore_map:
         return jsonify({"error": "Lore map not found"}), 404
 
-    # Get all events for this lore map
-    events = Event.query.filter_by(lore_map_id=lore_map.id).all()
-    events_data = [{
-        "id": event.id,
-        "title": event.title,
-        "description": event.description,
-        "location": event.location,
-        "position": {
-            "x": event.position_x,
-            "y": event.position_y
-        },
-        "is_party_location": event.is_party_location,
-        "is_completed": event.is_completed or False,
-        "dm_notes": event.dm_notes or '',
-        "order_number": event.order_number,
-        "battle_map_url": event.image_url,
-        "conditions": json.loads(event.conditions) if event.conditions else []
-    } for event in events]
-
-    # Get all connections between events
-    connections = EventConnection.query.filter(
-        (EventConnection.from_event_id.in_([e.id for e in events])) |
-        (EventConnection.to_event_id.in_([e.id for e in events]))
+    # ?include=characters embeds each event's characters, saving a request per event
+    include = {part.strip() for part in request.args.get('include', '').split(',')}
+    include_characters = 'characters' in include
+
+    def build():
+        # Get all events for this lore map
+        events = Event.query.filter_by(lore_map_id=lore_map.id).all()
+        events_data = EVENT.dump_many(events)
+
+        if include_characters:
+            characters_by_event = map_event_characters(lore_map.id)
+            for event_data in events_data:
+                event_data["characters"] = characters_by_event.get(event_data["id"], [])
+
+        # Get all connections between events
+        connections = EventConnection.query.filter(
+            (EventConnection.from_event_id.in_([e.id for e in events])) |
+            (EventConnection.to_event_id.in_([e.id for e in events]))
+        ).all()
+
+        connections_data = EVENT_CONNECTION.dump_many(connections)
+
+        return {
+            "id": lore_map.id,
+            "title": lore_map.title,
+            "description": lore_map.description,
+            "created_at": lore_map.created_at.isoformat(),
+            "updated_at": lore_map.updated_at.isoformat(),
+            "version": lore_map.version or 0,
+            "events": events_data,
+            "connections": connections_data
+        }
+
+    etag = make_etag(
+        'loremap', lore_map.id, lore_map.version, lore_map.updated_at.isoformat(),
+        map_event_characters_fingerprint(lore_map.id, user_id) if include_characters else None
+    )
+    return conditional_jsonify(etag, build)
+
+
+@lore_maps_bp.route('/api/loremaps/<int:id>/changes', methods=['GET'])
+def get_lore_map_changes(id):
+    """Return events and connections changed or deleted after version ``since``."""
+    user_id = session.get('user_id')
+    if not user_id:
+        return jsonify({"error": "Not authenticated"}), 401
+
+    lore_map = LoreMap.query.filter_by(id=id, user_id=user_id).first()
+    if not lore_map:
+        return jsonify({"error": "Lore map not found"}), 404
+
+    since = request.args.get('since', 0, type=int)
+
+    events = Event.query.filter(
+        Event.lore_map_id == id,
+        Event.version > since
     ).all()
 
-    connections_data = [{
-        "id": conn.id,
-        "from": conn.from_event_id,
-        "to": conn.to_event_id,
-        "description": conn.description,
-        "connection_type": conn.connection_type or 'default'
-    } for conn in connections]
+    connections = EventConnection.query.join(
+        Event, EventConnection.from_event_id == Event.id
+    ).filter(
+        Event.lore_map_id == id,
+        EventConnection.version > since
+    ).all()
 
-    result = {
+    tombstones = Tombstone.query.filter(
+        Tombstone.lore_map_id == id,
+        Tombstone.version > since
+    ).all()
+
+    # SQLite may reuse the id of a deleted row, so live rows win over tombstones
+    deleted_events = {t.entity_id for t in tombstones if t.entity_type == 'event'}
+    deleted_connections = {t.entity_id for t in tombstones if t.entity_type == 'connection'}
+    deleted_events -= {event.id for event in events}
+    deleted_connections -= {conn.id for conn in connections}
+
+    return jsonify({
         "id": lore_map.id,
-        "title": lore_map.title,
-        "description": lore_map.description,
-        "created_at": lore_map.created_at.isoformat(),
-        "updated_at": lore_map.updated_at.isoformat(),
-        "events": events_data,
-        "connections": connections_data
-    }
+        "since": since,
+        "version": lore_map.version or 0,
+        "events": EVENT.dump_many(events),
+        "connections": EVENT_CONNECTION.dump_many(connections),
+        "deleted": {
+            "events": sorted(deleted_events),
+            "connections": sorted(deleted_connections)
+        }
+    })
+
+
+def _parse_bbox(value):
+    """``x0,y0,x1,y1`` -> (min_x, min_y, max_x, max_y) widened to whole units, or None."""
+    try:
+        x0, y0, x1, y1 = (float(part) for part in value.split(','))
+    except (AttributeError, ValueError):
+        return None
+    if not all(math.isfinite(part) for part in (x0, y0, x1, y1)):
+        return None
+    return (math.floor(min(x0, x1)), math.floor(min(y0, y1)),
+            math.ceil(max(x0, x1)), math.ceil(max(y0, y1)))
+
+
+@lore_maps_bp.route('/api/loremaps/<int:id>/events', methods=['GET'])
+def get_lore_map_viewport(id):
+    """Events inside ``bbox=x0,y0,x1,y1`` plus the connections touching them.
+
+    Connections may lead off-screen; the far endpoints are returned in
+    ``offscreen`` with just their position so the client can draw the edge.
+    """
+    user_id = session.get('user_id')
+    if not user_id:
+        return jsonify({"error": "Not authenticated"}), 401
+
+    bbox = _parse_bbox(request.args.get('bbox'))
+    if bbox is None:
+        return jsonify({"error": "bbox must be x0,y0,x1,y1"}), 400
+
+    lore_map = LoreMap.query.filter_by(id=id, user_id=user_id).first()
+    if not lore_map:
+        return jsonify({"error": "Lore map not found"}), 404
+
+    def build():
+        min_x, min_y, max_x, max_y = bbox
+        in_view = db.and_(
+            Event.lore_map_id == id,
+            Event.position_x.between(min_x, max_x),
+            Event.position_y.between(min_y, max_y)
+        )
+        events = Event.query.filter(in_view).all()
+
+        visible_ids = db.session.query(Event.id).filter(in_view)
+        connections = EventConnection.query.filter(
+            db.or_(EventConnection.from_event_id.in_(visible_ids),
+                   EventConnection.to_event_id.in_(visible_ids))
+        ).all()
+
+        shown = {event.id for event in events}
+        offscreen_ids = {
+            event_id for conn in connections
+            for event_id in (conn.from_event_id, conn.to_event_id) if event_id not in shown
+        }
+        offscreen = db.session.query(Event.id, Event.position_x, Event.position_y).filter(
+            Event.id.in_(offscreen_ids)
+        ).all() if offscreen_ids else []
+
+        return {
+            "id": lore_map.id,
+            "version": lore_map.version or 0,
+            "bbox": list(bbox),
+            "events": EVENT.dump_many(events),
+            "connections": EVENT_CONNECTION.dump_many(connections),
+            "offscreen": [{"id": row.id, "position": {"x": row.position_x, "y": row.position_y}}
+                          for row in offscreen]
+        }
+
+    etag = make_etag('loremap-events', lore_map.id, lore_map.version,
+                     lore_map.updated_at.isoformat(), *bbox)
+    return conditional_jsonify(etag, build)
+
+
+@lore_maps_bp.route('/api/loremaps/<int:id>/minimap', methods=['GET'])
+def get_lore_map_minimap(id):
+    """Events clustered into a grid of at most ``cells`` x ``cells`` aggregate points."""
+    user_id = session.get('user_id')
+    if not user_id:
+        return jsonify({"error": "Not authenticated"}), 401
 
-    return jsonify(result)
+    lore_map = LoreMap.query.filter_by(id=id, user_id=user_id).first()
+    if not lore_map:
+        return jsonify({"error": "Lore map not found"}), 404
+
+    cells = min(max(request.args.get('cells', 32, type=int), 1), MINIMAP_MAX_CELLS)
+
+    def build():
+        placed = db.and_(
+            Event.lore_map_id == id,
+            Event.position_x.isnot(None),
+            Event.position_y.isnot(None)
+        )
+        min_x, min_y, max_x, max_y = db.session.query(
+            db.func.min(Event.position_x), db.func.min(Event.position_y),
+            db.func.max(Event.position_x), db.func.max(Event.position_y)
+        ).filter(placed).one()
+
+        result = {"id": lore_map.id, "version": lore_map.version or 0,
+                  "bounds": None, "cell_size": None, "points": []}
+        if min_x is None:
+            return result
+
+        # Square cells sized so the larger extent spans at most `cells` of them
+        extent = max(max_x - min_x, max_y - min_y) + 1
+        cell_size = max(-(-extent // cells), 1)
+        column = (Event.position_x - min_x) // cell_size
+        row = (Event.position_y - min_y) // cell_size
+
+        clusters = db.session.query(
+            db.func.count(Event.id).label('count'),
+            db.func.avg(Event.position_x).label('x'),
+            db.func.avg(Event.position_y).label('y'),
+            db.func.sum(db.case((Event.is_completed == True, 1), else_=0)).label('completed'),
+            db.func.sum(db.case((Event.is_party_location == True, 1), else_=0)).label('party')
+        ).filter(placed).group_by(column, row).all()
+
+        result["bounds"] = {"min_x": min_x, "min_y": min_y, "max_x": max_x, "max_y": max_y}
+        result["cell_size"] = cell_size
+        result["points"] = [{
+            "x": round(float(cluster.x)),
+            "y": round(float(cluster.y)),
+            "count": cluster.count,
+            "completed": int(cluster.completed or 0),
+            "is_party_location": bool(cluster.party)
+        } for cluster in clusters]
+        return result
+
+    etag = make_etag('loremap-minimap', lore_map.id, lore_map.version,
+                     lore_map.updated_at.isoformat(), cells)
+    return conditional_jsonify(etag, build)
+
+
+@lore_maps_bp.route('/api/loremaps/<int:id>/analysis', methods=['GET'])
+def get_lore_map_analysis(id):
+    """Reachability from the party, locked events, cycles and a topological order."""
+    user_id = session.get('user_id')
+    if not user_id:
+        return jsonify({"error": "Not authenticated"}), 401
+
+    lore_map = LoreMap.query.filter_by(id=id, user_id=user_id).first()
+    if not lore_map:
+        return jsonify({"error": "Lore map not found"}), 404
+
+    etag = make_etag('loremap-analysis', lore_map.id, lore_map.version)
+    return conditional_jsonify(etag, lambda: dict(
+        story_graph.get_graph(lore_map).analyze(), id=lore_map.id
+    ))
+
+
+@lore_maps_bp.route('/api/loremaps/<int:id>/analysis/order', methods=['POST'])
+def apply_lore_map_order(id):
+    """Fill every event's order_number from the story graph's topological order."""
+    user_id = session.get('user_id')
+    if not user_id:
+        return jsonify({"error": "Not authenticated"}), 401
+
+    lore_map = LoreMap.query.filter_by(id=id, user_id=user_id).first()
+    if not lore_map:
+        return jsonify({"error": "Lore map not found"}), 404
+
+    try:
+        order = story_graph.get_graph(lore_map).analyze()["order"]
+        version = lore_map.bump_version()
+        db.session.bulk_update_mappings(Event, [
+            {"id": event_id, "order_number": position, "version": version}
+            for position, event_id in enumerate(order, start=1)
+        ])
+        db.session.commit()
+        return jsonify({
+            "message": "Event order updated!",
+            "version": version,
+            "order": order
+        })
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({"error": f"Failed to update order: {str(e)}"}), 500
 
 
 @lore_maps_bp.route('/api/connections/<int:connection_id>', methods=['PUT'])
@@ -155,16 +385,10 @@ def update_connection(connection_id):
     if 'connection_type' in data:
         conn.connection_type = data['connection_type']
 
-    event.lore_map.updated_at = datetime.utcnow()
+    conn.version = event.lore_map.bump_version()
     db.session.commit()
 
-    return jsonify({
-        "id": conn.id,
-        "from": conn.from_event_id,
-        "to": conn.to_event_id,
-        "description": conn.description,
-        "connection_type": conn.connection_type or 'default'
-    })
+    return jsonify(EVENT_CONNECTION.dump(conn))
 
 
 @lore_maps_bp.route('/api/connections/<int:connection_id>', methods=['DELETE'])
@@ -184,7 +408,274 @@ def delete_connection(connection_id):
     if not event:
         return jsonify({"error": "Connection not found"}), 404
 
+    version = event.lore_map.bump_version()
+    record_deletions(event.lore_map_id, 'connection', [conn.id], version)
     db.session.delete(conn)
     db.session.commit()
 
     return jsonify({"message": "Connection deleted successfully!"})
+
+
+def _event_columns(data):
+    """Map an editor event payload onto Event columns, keeping only provided keys."""
+    columns = {}
+    for key in ('title', 'description', 'location', 'is_party_location',
+                'is_completed', 'dm_notes', 'order_number'):
+        if key in data:
+            columns[key] = data[key]
+    if 'position' in data:
+        position = data['position'] or {}
+        if 'x' in position:
+            columns['position_x'] = position['x']
+        if 'y' in position:
+            columns['position_y'] = position['y']
+    if 'conditions' in data:
+        columns['conditions'] = data['conditions']
+    if data.get('battle_map_url') is not None:
+        columns['image_url'] = data['battle_map_url']
+    return columns
+
+
+def _id_set(value):
+    """Ids from an optional JSON list; raises TypeError or ValueError on anything else."""
+    if value is None:
+        return set()
+    if not isinstance(value, list):
+        raise TypeError("expected a list of ids")
+    return {int(item) for item in value}
+
+
+@lore_maps_bp.route('/api/loremaps/<int:id>/graph', methods=['PUT'])
+def save_lore_map_graph(id):
+    """Upsert a full or partial set of events and connections in one transaction.
+
+    Events or connections whose ``id`` is not already part of this map are
+    inserted, and their client-side ids are returned mapped to the real ones.
+    Connections and event conditions may reference new events by those
+    client ids.
+    """
+    user_id = session.get('user_id')
+    if not user_id:
+        return jsonify({"error": "Not authenticated"}), 401
+
+    # Ownership is checked once for the whole batch
+    lore_map = LoreMap.query.filter_by(id=id, user_id=user_id).first()
+    if not lore_map:
+        return jsonify({"error": "Lore map not found"}), 404
+
+    data = request.json or {}
+    events_in = data.get('events', [])
+    connections_in = data.get('connections', [])
+    try:
+        if not all(isinstance(items, list) and all(isinstance(item, dict) for item in items)
+                   for items in (events_in, connections_in)):
+            raise TypeError("expected lists of objects")
+        deleted_event_ids = _id_set(data.get('deleted_events'))
+        deleted_connection_ids = _id_set(data.get('deleted_connections'))
+    except (TypeError, ValueError):
+        return jsonify({"error": "events and connections must be lists of objects, "
+                                 "deleted_events and deleted_connections lists of ids"}), 400
+
+    event_ids = {row.id for row in db.session.query(Event.id).filter_by(lore_map_id=id)}
+    connection_ids = {row.id for row in db.session.query(EventConnection.id).join(
+        Event, EventConnection.from_event_id == Event.id
+    ).filter(Event.lore_map_id == id)}
+
+    try:
+        version = lore_map.bump_version()
+
+        # Deletions first, so re-used client ids can't collide with removed rows
+        deleted_event_ids &= event_ids
+        if deleted_event_ids:
+            # Connections touching a deleted event go with it
+            deleted_connection_ids |= {row.id for row in db.session.query(EventConnection.id).filter(
+                EventConnection.from_event_id.in_(deleted_event_ids) |
+                EventConnection.to_event_id.in_(deleted_event_ids)
+            )}
+        deleted_connection_ids &= connection_ids
+
+        if deleted_connection_ids:
+            EventConnection.query.filter(
+                EventConnection.id.in_(deleted_connection_ids)
+            ).delete(synchronize_session=False)
+            record_deletions(id, 'connection', deleted_connection_ids, version)
+            connection_ids -= deleted_connection_ids
+        if deleted_event_ids:
+            EventCharacter.query.filter(
+                EventCharacter.event_id.in_(deleted_event_ids)
+            ).delete(synchronize_session=False)
+            released_urls = upload_store.image_urls(db.session.connection(), deleted_event_ids)
+            Event.query.filter(Event.id.in_(deleted_event_ids)).delete(synchronize_session=False)
+            upload_store.adjust(db.session.connection(), removed=released_urls)
+            record_deletions(id, 'event', deleted_event_ids, version)
+            search_index.remove(db.session.connection(), 'event', deleted_event_ids)
+            event_ids -= deleted_event_ids
+
+        # Split events into updates and inserts
+        event_updates = []
+        new_events = []
+        for event_data in events_in:
+            client_id = event_data.get('id')
+            columns = _event_columns(event_data)
+            if client_id in event_ids:
+                if columns:
+                    event_updates.append(dict(columns, id=client_id, version=version))
+            else:
+                columns.setdefault('title', 'New Event')
+                columns.setdefault('description', '')
+                columns.setdefault('location', '')
+                columns.setdefault('conditions', {})
+                new_events.append((client_id, Event(lore_map_id=id, version=version, **columns)))
+
+        if event_updates:
+            # Bulk updates bypass the flush hook that counts upload references too
+            image_updates = [row for row in event_updates if 'image_url' in row]
+            if image_updates:
+                released_urls = upload_store.image_urls(
+                    db.session.connection(), [row['id'] for row in image_updates]
+                )
+            db.session.bulk_update_mappings(Event, event_updates)
+            if image_updates:
+                upload_store.adjust(db.session.connection(),
+                                    added=[row['image_url'] for row in image_updates],
+                                    removed=released_urls)
+            # Bulk updates bypass the ORM flush hook that maintains the search index
+            search_index.reindex(db.session.connection(), 'event', [row['id'] for row in event_updates])
+        db.session.add_all(event for _, event in new_events)
+        db.session.flush()
+
+        event_id_map = {str(client_id): event.id for client_id, event in new_events
+                        if client_id is not None}
+        valid_event_ids = event_ids | set(event_id_map.values())
+
+        def resolve(ref):
+            if ref in event_ids:
+                return ref
+            return event_id_map.get(str(ref))
+
+        def resolve_target(ref):
+            resolved = resolve(ref)
+            return ref if resolved is None else resolved
+
+        # Conditions may name events created in this batch by their client ids
+        if event_id_map:
+            for _, event in new_events:
+                conditions = story_graph.remap_condition_targets(event.conditions, resolve_target)
+                if conditions is not None:
+                    event.conditions = conditions
+            condition_updates = []
+            for row in event_updates:
+                conditions = story_graph.remap_condition_targets(row.get('conditions'), resolve_target)
+                if conditions is not None:
+                    condition_updates.append({'id': row['id'], 'conditions': conditions})
+            if condition_updates:
+                db.session.bulk_update_mappings(Event, condition_updates)
+
+        # Same split for connections, resolving endpoints through the id map
+        connection_updates = []
+        new_connections = []
+        for conn_data in connections_in:
+            client_id = conn_data.get('id')
+            if client_id in connection_ids:
+                columns = {key: conn_data[key] for key in ('description', 'connection_type')
+                           if key in conn_data}
+                if columns:
+                    connection_updates.append(dict(columns, id=client_id, version=version))
+                continue
+
+            from_id = resolve(conn_data.get('from'))
+            to_id = resolve(conn_data.get('to'))
+            if from_id not in valid_event_ids or to_id not in valid_event_ids:
+                db.session.rollback()
+                return jsonify({"error": "One or both events not found"}), 404
+
+            new_connections.append((client_id, EventConnection(
+                from_event_id=from_id,
+                to_event_id=to_id,
+                description=conn_data.get('description', ''),
+                condition=conn_data.get('condition', {}),
+                connection_type=conn_data.get('connection_type', 'default'),
+                version=version
+            )))
+
+        if connection_updates:
+            db.session.bulk_update_mappings(EventConnection, connection_updates)
+        db.session.add_all(conn for _, conn in new_connections)
+        db.session.flush()
+        connection_id_map = {str(client_id): conn.id for client_id, conn in new_connections
+                             if client_id is not None}
+
+        db.session.commit()
+
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({"error": f"Failed to save lore map: {str(e)}"}), 500
+
+    return jsonify({
+        "id_map": {
+            "events": event_id_map,
+            "connections": connection_id_map
+        },
+        "version": version,
+        "message": "Lore map saved successfully!"
+    })
+
+
+@lore_maps_bp.route('/api/loremaps/<int:id>/export', methods=['GET'])
+def export_lore_map(id):
+    """Stream the whole campaign as a zip; ``?images=1`` also bundles battle maps."""
+    user_id = session.get('user_id')
+    if not user_id:
+        return jsonify({"error": "Not authenticated"}), 401
+
+    lore_map = LoreMap.query.filter_by(id=id, user_id=user_id).first()
+    if not lore_map:
+        return jsonify({"error": "Lore map not found"}), 404
+
+    include_images = request.args.get('images', '').lower() in ('1', 'true', 'yes')
+    chunks = campaign_archive.export_lore_map(
+        lore_map, current_app.config['UPLOAD_FOLDER'], include_images
+    )
+    filename = f"lorekeep-campaign-{lore_map.id}.zip"
+
+    return Response(
+        stream_with_context(chunk for chunk in chunks if chunk),
+        mimetype='application/zip',
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
+
+@lore_maps_bp.route('/api/loremaps/import', methods=['POST'])
+def import_lore_map():
+    """Create a new campaign from an archive produced by the export endpoint."""
+    user_id = session.get('user_id')
+    if not user_id:
+        return jsonify({"error": "Not authenticated"}), 401
+
+    if 'archive' not in request.files:
+        return jsonify({"error": "No file provided"}), 400
+
+    try:
+        lore_map, counts = campaign_archive.import_lore_map(
+            request.files['archive'].stream, user_id, current_app.config['UPLOAD_FOLDER'],
+            current_app.config['MAX_CONTENT_LENGTH']
+        )
+        bump_character_revision(user_id)
+        db.session.commit()
+
+    except ValueError as e:
+        db.session.rollback()
+        return jsonify({"error": str(e)}), 400
+
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({"error": f"Failed to import campaign: {str(e)}"}), 500
+
+    return jsonify({
+        "id": lore_map.id,
+        "title": lore_map.title,
+        "description": lore_map.description,
+        "events": counts["events"],
+        "characters": counts["characters"],
+        "message": "Campaign imported successfully!"
+    }), 201
@@ -0,0 +1,37 @@
+from flask import Blueprint, jsonify, request, session
+from extensions import db
+import search_index
+
+search_bp = Blueprint('search', __name__)
+
+
+@search_bp.route('/api/search', methods=['GET'])
+def search_all():
+    """Search the user's campaigns, events and characters (plus official monsters).
+
+    Query parameters: ``q``, optional comma-separated ``type``
+    (lore_map, event, character) and ``limit`` (max 100).
+    """
+    user_id = session.get('user_id')
+    if not user_id:
+        return jsonify({"error": "Not authenticated"}), 401
+
+    query = request.args.get('q', '').strip()
+    if not query:
+        return jsonify({"error": "Missing search query"}), 400
+
+    types = None
+    if request.args.get('type'):
+        types = [t.strip() for t in request.args['type'].split(',') if t.strip()]
+        unknown = [t for t in types if t not in search_index.TYPE_CODES]
+        if unknown:
+            return jsonify({"error": f"Unknown types: {', '.join(unknown)}"}), 400
+
+    limit = min(max(request.args.get('limit', 20, type=int), 1), 100)
+
+    try:
+        results = search_index.search(db.session.connection(), user_id, query, types, limit)
+    except Exception as e:
+        return jsonify({"error": f"Search failed: {str(e)}"}), 500
+
+    return jsonify({"query": query, "results": results})
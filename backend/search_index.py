@@ -0,0 +1,259 @@
+"""Full-text search over lore maps, events and characters.
+
+SQLite keeps an FTS5 virtual table and Postgres a tsvector column behind a
+GIN index. Both hold one row per searchable entity, keyed by
+``entity_id * 4 + type code`` so a single row can be replaced by primary
+key. Rows are refreshed from the session's ``after_flush`` hook whenever a
+searchable column changes, and routes that write through bulk operations
+call ``reindex``/``remove`` themselves.
+"""
+import html
+import re
+from collections import defaultdict
+
+from sqlalchemy import bindparam, event as sa_event, inspect as sa_inspect, text
+
+from extensions import db
+from models import LoreMap, Event, Character
+
+TYPE_CODES = {'lore_map': 1, 'event': 2, 'character': 3}
+TYPE_NAMES = {code: name for name, code in TYPE_CODES.items()}
+
+# Columns whose changes require refreshing the indexed document
+SEARCHABLE = {
+    LoreMap: ('lore_map', ('title', 'description')),
+    Event: ('event', ('title', 'description', 'location', 'dm_notes', 'lore_map_id')),
+    Character: ('character', ('name', 'description', 'actions', 'special_abilities',
+                              'legendary_actions', 'user_id')),
+}
+
+# Each source yields (key, owner_id, lore_map_id, title, body). Character
+# bodies take the name and description of each entry in their JSON action
+# lists ({actions} etc., filled in per dialect from ACTION_TEXT), since the
+# raw JSON would index key names and punctuation.
+SOURCES = {
+    'lore_map': (
+        "SELECT lm.id * 4 + 1, lm.user_id, lm.id, lm.title, COALESCE(lm.description, '') "
+        "FROM lore_map lm",
+        "lm.id"
+    ),
+    'event': (
+        "SELECT e.id * 4 + 2, lm.user_id, e.lore_map_id, e.title, "
+        "COALESCE(e.description, '') || ' ' || COALESCE(e.location, '') || ' ' || "
+        "COALESCE(e.dm_notes, '') "
+        "FROM event e JOIN lore_map lm ON lm.id = e.lore_map_id",
+        "e.id"
+    ),
+    'character': (
+        "SELECT c.id * 4 + 3, c.user_id, NULL, c.name, "
+        "COALESCE(c.description, '') || ' ' || COALESCE({actions}, '') || ' ' || "
+        "COALESCE({special_abilities}, '') || ' ' || COALESCE({legendary_actions}, '') "
+        "FROM \"character\" c",
+        "c.id"
+    ),
+}
+
+ACTION_COLUMNS = ('actions', 'special_abilities', 'legendary_actions')
+ACTION_TEXT = {
+    'sqlite': (
+        "(SELECT group_concat(COALESCE(json_extract(value, '$.name'), '') || ' ' || "
+        "COALESCE(json_extract(value, '$.desc'), json_extract(value, '$.description'), ''), ' ') "
+        "FROM json_each(CASE WHEN json_type({column}) = 'array' THEN {column} END) "
+        "WHERE type = 'object')"
+    ),
+    'postgresql': (
+        "(SELECT string_agg(COALESCE(action->>'name', '') || ' ' || "
+        "COALESCE(action->>'desc', action->>'description', ''), ' ') "
+        "FROM jsonb_array_elements(CASE WHEN jsonb_typeof({column}) = 'array' THEN {column} END) AS action "
+        "WHERE jsonb_typeof(action) = 'object')"
+    ),
+}
+
+# Highlight delimiters: private-use characters that user text won't hold,
+# swapped for <mark> after the snippet is HTML-escaped
+MARK_START, MARK_END = '\ue000', '\ue001'
+
+SQLITE_SCHEMA = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS search_index USING fts5("
+    "title, body, owner_id UNINDEXED, lore_map_id UNINDEXED, tokenize = 'porter unicode61')",
+]
+
+POSTGRES_SCHEMA = [
+    "CREATE TABLE IF NOT EXISTS search_document ("
+    "id BIGINT PRIMARY KEY, owner_id INTEGER, lore_map_id INTEGER, "
+    "title TEXT, body TEXT, document TSVECTOR)",
+    "CREATE INDEX IF NOT EXISTS ix_search_document_document ON search_document USING GIN (document)",
+    "CREATE INDEX IF NOT EXISTS ix_search_document_owner_id ON search_document (owner_id)",
+]
+
+
+def supported(conn):
+    return conn.dialect.name in ('sqlite', 'postgresql')
+
+
+def create_schema(conn):
+    schema = SQLITE_SCHEMA if conn.dialect.name == 'sqlite' else POSTGRES_SCHEMA
+    for statement in schema:
+        conn.execute(text(statement))
+
+
+def _keys(entity_type, ids):
+    code = TYPE_CODES[entity_type]
+    return [entity_id * 4 + code for entity_id in ids]
+
+
+def remove(conn, entity_type, ids):
+    """Drop the indexed documents for the given entity ids."""
+    if not ids or not supported(conn):
+        return
+    table, key = ('search_index', 'rowid') if conn.dialect.name == 'sqlite' else ('search_document', 'id')
+    conn.execute(
+        text(f"DELETE FROM {table} WHERE {key} IN :keys").bindparams(bindparam('keys', expanding=True)),
+        {'keys': _keys(entity_type, ids)}
+    )
+
+
+def reindex(conn, entity_type, ids=None):
+    """Rebuild the documents for the given ids, or for every row when ids is None."""
+    if ids is not None and not ids:
+        return
+    if not supported(conn):
+        return
+
+    source, id_column = SOURCES[entity_type]
+    source = source.format(**{
+        column: ACTION_TEXT[conn.dialect.name].format(column=f'c.{column}') for column in ACTION_COLUMNS
+    })
+    params = {}
+    if ids is not None:
+        remove(conn, entity_type, ids)
+        source = f"{source} WHERE {id_column} IN :ids"
+        params['ids'] = list(ids)
+
+    if conn.dialect.name == 'sqlite':
+        statement = (
+            "INSERT INTO search_index (rowid, owner_id, lore_map_id, title, body) "
+            f"SELECT * FROM ({source})"
+        )
+    else:
+        statement = (
+            "INSERT INTO search_document (id, owner_id, lore_map_id, title, body, document) "
+            "SELECT key, owner_id, lore_map_id, title, body, "
+            "setweight(to_tsvector('english', COALESCE(title, '')), 'A') || "
+            "setweight(to_tsvector('english', body), 'B') "
+            f"FROM ({source}) AS src (key, owner_id, lore_map_id, title, body) "
+            "ON CONFLICT (id) DO NOTHING"
+        )
+
+    statement = text(statement)
+    if ids is not None:
+        statement = statement.bindparams(bindparam('ids', expanding=True))
+    conn.execute(statement, params)
+
+
+@sa_event.listens_for(db.session, 'after_flush')
+def _sync_search_index(session, flush_context):
+    conn = session.connection()
+    if not supported(conn):
+        return
+
+    changed = defaultdict(set)
+    removed = defaultdict(set)
+    deleted_maps = set()
+
+    for obj in session.new:
+        if type(obj) in SEARCHABLE:
+            changed[SEARCHABLE[type(obj)][0]].add(obj.id)
+
+    for obj in session.dirty:
+        if type(obj) in SEARCHABLE:
+            entity_type, columns = SEARCHABLE[type(obj)]
+            attrs = sa_inspect(obj).attrs
+            if any(attrs[column].history.has_changes() for column in columns):
+                changed[entity_type].add(obj.id)
+
+    for obj in session.deleted:
+        if type(obj) in SEARCHABLE:
+            removed[SEARCHABLE[type(obj)][0]].add(obj.id)
+            if isinstance(obj, LoreMap):
+                deleted_maps.add(obj.id)
+
+    for entity_type, ids in removed.items():
+        remove(conn, entity_type, ids)
+    for entity_type, ids in changed.items():
+        reindex(conn, entity_type, ids - removed[entity_type])
+
+    if deleted_maps:
+        # Events removed with their map, including any the cascade didn't load
+        table = 'search_index' if conn.dialect.name == 'sqlite' else 'search_document'
+        conn.execute(
+            text(f"DELETE FROM {table} WHERE lore_map_id IN :ids").bindparams(
+                bindparam('ids', expanding=True)
+            ),
+            {'ids': list(deleted_maps)}
+        )
+
+
+def _fts5_query(query):
+    """Quote each word so user input can't inject FTS5 syntax; prefix-match the last."""
+    words = re.findall(r'\w+', query)
+    if not words:
+        return None
+    terms = [f'"{word}"' for word in words]
+    terms[-1] += '*'
+    return ' '.join(terms)
+
+
+def _highlight(snippet):
+    """HTML-escape a snippet of user text, then mark the matches."""
+    return html.escape(snippet or '').replace(MARK_START, '<mark>').replace(MARK_END, '</mark>')
+
+
+def search(conn, user_id, query, types=None, limit=20):
+    """Ranked matches visible to ``user_id`` (their own rows plus official ones)."""
+    codes = [TYPE_CODES[t] for t in (types or TYPE_CODES)]
+    params = {'user_id': user_id, 'limit': limit, 'codes': codes,
+              'mark_start': MARK_START, 'mark_end': MARK_END}
+
+    if conn.dialect.name == 'sqlite':
+        params['query'] = _fts5_query(query)
+        if not params['query']:
+            return []
+        statement = text(
+            "SELECT rowid AS key, lore_map_id, title, "
+            "snippet(search_index, -1, :mark_start, :mark_end, '…', 16) AS snippet, "
+            "-bm25(search_index, 10.0, 1.0) AS score "
+            "FROM search_index "
+            "WHERE search_index MATCH :query "
+            "AND (owner_id = :user_id OR owner_id IS NULL) "
+            "AND rowid % 4 IN :codes "
+            "ORDER BY bm25(search_index, 10.0, 1.0) LIMIT :limit"
+        )
+    elif conn.dialect.name == 'postgresql':
+        params['query'] = query
+        params['headline_options'] = f'StartSel={MARK_START}, StopSel={MARK_END}, MaxWords=24, MinWords=8'
+        # Headlines are costly, so only build them for the page being returned
+        statement = text(
+            "SELECT key, lore_map_id, title, "
+            "ts_headline('english', body, q, :headline_options) "
+            "AS snippet, score FROM ("
+            "SELECT d.id AS key, d.lore_map_id, d.title, d.body, q, ts_rank_cd(d.document, q) AS score "
+            "FROM search_document d, websearch_to_tsquery('english', :query) q "
+            "WHERE d.document @@ q "
+            "AND (d.owner_id = :user_id OR d.owner_id IS NULL) "
+            "AND d.id % 4 IN :codes "
+            "ORDER BY score DESC LIMIT :limit) AS hits "
+            "ORDER BY score DESC"
+        )
+    else:
+        return []
+
+    statement = statement.bindparams(bindparam('codes', expanding=True))
+    return [{
+        "type": TYPE_NAMES[row.key % 4],
+        "id": row.key // 4,
+        "lore_map_id": row.lore_map_id,
+        "title": row.title,
+        "snippet": _highlight(row.snippet),
+        "score": row.score
+    } for row in conn.execute(statement, params)]
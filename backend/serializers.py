@@ -0,0 +1,215 @@
+"""Response schemas and the app's JSON provider.
+
+Each schema lists a model's output keys once and is compiled into a plain
+function returning a dict literal, so serializing a row costs one call
+instead of a hand-written dict built key by key in every route:
+
+    EVENT.dump(event)          # ORM object or named Row (attribute access)
+    EVENT.dump_row(row)        # tuple selected in EVENT.columns order
+
+``FastJSONProvider`` encodes with orjson when it is installed and falls back
+to the standard library otherwise (or when ``JSON_ENCODER = 'json'``).
+"""
+import json
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # Optional speedup; stdlib json is used without it
+    orjson = None
+
+
+class Field:
+    """One output key.
+
+    ``source`` is the attribute to read, or a tuple of attributes passed
+    together to ``convert``; it defaults to the key. ``default`` replaces
+    falsy values, matching the ``value or default`` cleanup routes used.
+    """
+
+    __slots__ = ('key', 'sources', 'default', 'convert')
+
+    def __init__(self, key, source=None, default=None, convert=None):
+        sources = source or key
+        self.key = key
+        self.sources = (sources,) if isinstance(sources, str) else tuple(sources)
+        self.default = default
+        self.convert = convert
+        if not all(name.isidentifier() for name in self.sources):
+            raise ValueError(f"Invalid source for field {key!r}: {self.sources}")
+        if default is not None and len(self.sources) > 1:
+            raise ValueError(f"Field {key!r}: default needs a single source")
+
+
+class Schema:
+    """Ordered set of fields compiled into ``dump`` and ``dump_row``."""
+
+    def __init__(self, name, *fields):
+        self.name = name
+        self.fields = tuple(f if isinstance(f, Field) else Field(f) for f in fields)
+        self.keys = tuple(field.key for field in self.fields)
+        # Distinct source attributes, the column order dump_row expects
+        self.columns = tuple(dict.fromkeys(s for field in self.fields for s in field.sources))
+        self.dump = self._compile(lambda source: f"obj.{source}")
+        index = {column: i for i, column in enumerate(self.columns)}
+        self.dump_row = self._compile(lambda source: f"obj[{index[source]}]")
+        self._subsets = {}
+
+    def __contains__(self, key):
+        return key in self.keys
+
+    def only(self, keys):
+        """Schema restricted to ``keys``, in the order given. Cached per key tuple."""
+        keys = tuple(keys)
+        subset = self._subsets.get(keys)
+        if subset is None:
+            by_key = {field.key: field for field in self.fields}
+            unknown = [key for key in keys if key not in by_key]
+            if unknown:
+                raise KeyError(', '.join(unknown))
+            subset = self._subsets[keys] = Schema(self.name, *[by_key[key] for key in keys])
+        return subset
+
+    def dump_many(self, items):
+        return list(map(self.dump, items))
+
+    def dump_rows(self, rows):
+        return list(map(self.dump_row, rows))
+
+    def _compile(self, read):
+        namespace = {}
+        items = []
+        for i, field in enumerate(self.fields):
+            args = [read(source) for source in field.sources]
+            expr = args[0]
+            if field.default is not None:
+                namespace[f'_default{i}'] = field.default
+                expr = f"({expr} or _default{i})"
+            if field.convert is not None:
+                namespace[f'_convert{i}'] = field.convert
+                expr = f"_convert{i}({expr if field.default is not None else ', '.join(args)})"
+            items.append(f"{field.key!r}: {expr}")
+        source = "def dump(obj):\n    return {" + ", ".join(items) + "}\n"
+        exec(compile(source, f"<schema {self.name}>", 'exec'), namespace)
+        return namespace['dump']
+
+
+def _isoformat(value):
+    return value.isoformat() if value is not None else None
+
+
+def _position(x, y):
+    return {"x": x, "y": y}
+
+
+def _list_or_empty(value):
+    return value if value is not None else []
+
+
+LORE_MAP = Schema(
+    'lore_map',
+    'id', 'title', 'description',
+    Field('created_at', convert=_isoformat),
+    Field('updated_at', convert=_isoformat),
+)
+
+EVENT = Schema(
+    'event',
+    'id', 'title', 'description', 'location',
+    Field('position', source=('position_x', 'position_y'), convert=_position),
+    'is_party_location',
+    Field('is_completed', default=False),
+    Field('dm_notes', default=''),
+    'order_number',
+    Field('battle_map_url', source='image_url'),
+    Field('conditions', convert=_list_or_empty),
+)
+
+EVENT_CONNECTION = Schema(
+    'event_connection',
+    'id',
+    Field('from', source='from_event_id'),
+    Field('to', source='to_event_id'),
+    'description',
+    Field('connection_type', default='default'),
+)
+
+# Event-character link joined with its character's name, type and flag
+EVENT_CHARACTER = Schema(
+    'event_character',
+    'id', 'event_id', 'character_id', 'role',
+    Field('character_name', source='name'),
+    'character_type',
+    Field('is_official', default=False),
+)
+
+_ABILITY_SCORES = ('strength', 'dexterity', 'constitution', 'intelligence', 'wisdom', 'charisma')
+
+# Catalog fields in response order; also the set ``?fields=`` may pick from
+CHARACTER = Schema(
+    'character',
+    'id', 'name', 'character_type', 'description',
+    *[Field(score, default=10) for score in _ABILITY_SCORES],
+    Field('armor_class', default=10),
+    Field('hit_points', default=1),
+    'challenge_rating', 'creature_type',
+    Field('is_official', default=False),
+    'user_id',
+    'actions', 'legendary_actions', 'special_abilities', 'reactions', 'skills',
+    'damage_resistances', 'damage_immunities', 'condition_immunities',
+    'senses', 'languages',
+)
+
+JOB = Schema(
+    'job',
+    'id', 'kind', 'status', 'attempts', 'max_attempts', 'last_error',
+    Field('run_at', convert=_isoformat),
+    Field('created_at', convert=_isoformat),
+    Field('finished_at', convert=_isoformat),
+)
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """JSON provider backed by orjson when available.
+
+    Output matches the stdlib provider: sorted keys per ``sort_keys``,
+    string keys for int-keyed dicts and Flask's handling of dates, decimals
+    and dataclasses via ``default``. Pretty-printed (debug) responses and
+    calls with extra ``json.dumps`` arguments use the stdlib path.
+    """
+
+    def __init__(self, app):
+        super().__init__(app)
+        self.use_orjson = orjson is not None and app.config.get('JSON_ENCODER', 'auto') != 'json'
+
+    def _orjson_options(self):
+        options = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+        if self.sort_keys:
+            options |= orjson.OPT_SORT_KEYS
+        return options
+
+    def dumps_bytes(self, obj):
+        """Compact UTF-8 encoded JSON, ready to splice into a response body."""
+        if self.use_orjson:
+            return orjson.dumps(obj, default=self.default, option=self._orjson_options())
+        return json.dumps(
+            obj, default=self.default, ensure_ascii=self.ensure_ascii,
+            sort_keys=self.sort_keys, separators=(',', ':')
+        ).encode('utf-8')
+
+    def dumps(self, obj, **kwargs):
+        if self.use_orjson and not kwargs:
+            return self.dumps_bytes(obj).decode('utf-8')
+        return super().dumps(obj, **kwargs)
+
+    def loads(self, s, **kwargs):
+        if self.use_orjson and not kwargs:
+            return orjson.loads(s)
+        return super().loads(s, **kwargs)
+
+    def response(self, *args, **kwargs):
+        pretty = (self.compact is None and self._app.debug) or self.compact is False
+        if not self.use_orjson or pretty:
+            return super().response(*args, **kwargs)
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(self.dumps_bytes(obj) + b'\n', mimetype=self.mimetype)
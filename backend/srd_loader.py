@@ -0,0 +1,230 @@
+"""Bulk loader for official 5e SRD monsters.
+
+Reads a JSON array or JSON Lines file of stat blocks incrementally, maps each
+monster onto ``Character`` columns and upserts them in batches with
+executemany-style bulk inserts and updates. Each row stores a SHA-256 of its
+normalized stat block, so re-running the loader only writes monsters whose
+content actually changed.
+
+Both the dnd5eapi layout (``index``, ``armor_class`` as a list,
+``proficiencies``) and the Open5e layout (``slug``, ``skills`` as a dict,
+string resistances) are understood.
+
+    flask --app app load-srd monsters.json
+"""
+import hashlib
+import json
+from datetime import datetime
+
+import click
+from flask.cli import with_appcontext
+
+import official_catalog
+import search_index
+from challenge_ratings import CHALLENGE_RATINGS, parse_challenge_rating
+from extensions import db
+from models import Character
+
+BATCH_SIZE = 500
+READ_CHUNK_SIZE = 64 * 1024
+
+ABILITIES = ('strength', 'dexterity', 'constitution', 'intelligence', 'wisdom', 'charisma')
+CR_LABELS = {value: label for label, value in CHALLENGE_RATINGS.items()}
+
+
+def iter_json_array(fp, chunk_size=READ_CHUNK_SIZE):
+    """Yield the items of a top-level JSON array without loading the whole file."""
+    decoder = json.JSONDecoder()
+    buffer = fp.read(chunk_size)
+    pos = 0
+    started = False
+
+    while True:
+        while pos < len(buffer) and (buffer[pos].isspace() or (started and buffer[pos] == ',')):
+            pos += 1
+        if pos >= len(buffer):
+            more = fp.read(chunk_size)
+            if not more:
+                if started:
+                    raise ValueError("Unexpected end of JSON array")
+                return
+            buffer, pos = buffer[pos:] + more, 0
+            continue
+
+        if not started:
+            if buffer[pos] != '[':
+                raise ValueError("Expected a JSON array of monsters")
+            started = True
+            pos += 1
+            continue
+        if buffer[pos] == ']':
+            return
+
+        try:
+            item, end = decoder.raw_decode(buffer, pos)
+        except json.JSONDecodeError:
+            more = fp.read(chunk_size)
+            if not more:
+                raise
+            buffer, pos = buffer[pos:] + more, 0
+            continue
+
+        yield item
+        pos = end
+        if pos > chunk_size:
+            buffer, pos = buffer[pos:], 0
+
+
+def iter_monsters(path):
+    with open(path, encoding='utf-8') as fp:
+        if path.endswith('.jsonl') or path.endswith('.ndjson'):
+            for line in fp:
+                if line.strip():
+                    yield json.loads(line)
+        else:
+            yield from iter_json_array(fp)
+
+
+def _join(value):
+    """Flatten SRD lists like ``["fire", {"name": "poisoned"}]`` into display text."""
+    if not value:
+        return None
+    if isinstance(value, str):
+        return value
+    if isinstance(value, dict):
+        return ', '.join(f"{key.replace('_', ' ')} {val}" for key, val in value.items())
+    return ', '.join(item['name'] if isinstance(item, dict) else str(item) for item in value)
+
+
+def _armor_class(value):
+    if isinstance(value, list):
+        value = value[0] if value else None
+    if isinstance(value, dict):
+        value = value.get('value')
+    return int(value) if value is not None else 10
+
+
+def _skills(monster):
+    if isinstance(monster.get('skills'), dict):
+        return monster['skills'] or None
+    skills = {}
+    for entry in monster.get('proficiencies') or []:
+        name = (entry.get('proficiency') or {}).get('name', '')
+        if name.startswith('Skill: '):
+            skills[name[len('Skill: '):].lower()] = entry.get('value')
+    return skills or None
+
+
+def _json_or_none(value):
+    return value or None
+
+
+def normalize(monster):
+    """Map one SRD stat block onto Character column values."""
+    name = monster['name']
+    key = monster.get('index') or monster.get('slug') or name.lower().replace(' ', '-')
+    cr = parse_challenge_rating(monster.get('challenge_rating'))
+
+    row = {
+        'source_key': f"srd:{key}"[:100],
+        'name': name[:100],
+        'character_type': 'Monster',
+        'description': monster.get('desc') or monster.get('description') or '',
+        'armor_class': _armor_class(monster.get('armor_class')),
+        'hit_points': int(monster.get('hit_points') or 1),
+        'challenge_rating': CR_LABELS.get(cr, str(monster.get('challenge_rating') or '0')),
+        'challenge_rating_value': cr,
+        'creature_type': (monster.get('type') or '')[:50] or None,
+        'actions': _json_or_none(monster.get('actions')),
+        'legendary_actions': _json_or_none(monster.get('legendary_actions')),
+        'special_abilities': _json_or_none(monster.get('special_abilities')),
+        'reactions': _json_or_none(monster.get('reactions')),
+        'skills': _json_or_none(_skills(monster)),
+        'damage_resistances': _join(monster.get('damage_resistances')),
+        'damage_immunities': _join(monster.get('damage_immunities')),
+        'condition_immunities': _join(monster.get('condition_immunities')),
+        'senses': _join(monster.get('senses')),
+        'languages': _join(monster.get('languages')),
+    }
+    for ability in ABILITIES:
+        row[ability] = int(monster.get(ability) or 10)
+
+    row['source_hash'] = hashlib.sha256(
+        json.dumps(row, sort_keys=True).encode('utf-8')
+    ).hexdigest()
+    return row
+
+
+def _batches(rows, size):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def load_monsters(monsters, batch_size=BATCH_SIZE, progress=None):
+    """Upsert official monsters by source key; returns inserted/updated/unchanged counts."""
+    counts = {'inserted': 0, 'updated': 0, 'unchanged': 0}
+
+    for batch in _batches((normalize(monster) for monster in monsters), batch_size):
+        # Last one wins if a file repeats a monster
+        batch = list({row['source_key']: row for row in batch}.values())
+        existing = {
+            source_key: (char_id, source_hash)
+            for char_id, source_key, source_hash in db.session.query(
+                Character.id, Character.source_key, Character.source_hash
+            ).filter(Character.source_key.in_([row['source_key'] for row in batch]))
+        }
+
+        now = datetime.utcnow()
+        inserts, updates = [], []
+        for row in batch:
+            row.update(is_official=True, user_id=None, updated_at=now)
+            if row['source_key'] not in existing:
+                inserts.append(row)
+            elif existing[row['source_key']][1] != row['source_hash']:
+                updates.append(dict(row, id=existing[row['source_key']][0]))
+
+        if inserts:
+            db.session.bulk_insert_mappings(Character, inserts)
+        if updates:
+            db.session.bulk_update_mappings(Character, updates)
+
+        if inserts or updates:
+            # Bulk writes bypass the ORM hook that maintains the search index
+            changed_ids = [char_id for (char_id,) in db.session.query(Character.id).filter(
+                Character.source_key.in_([row['source_key'] for row in inserts + updates])
+            )]
+            search_index.reindex(db.session.connection(), 'character', changed_ids)
+        db.session.commit()
+
+        counts['inserted'] += len(inserts)
+        counts['updated'] += len(updates)
+        counts['unchanged'] += len(batch) - len(inserts) - len(updates)
+        if progress:
+            progress(counts)
+
+    if counts['inserted'] or counts['updated']:
+        official_catalog.invalidate()
+    return counts
+
+
+@click.command('load-srd')
+@click.argument('path', type=click.Path(exists=True, dir_okay=False))
+@click.option('--batch-size', default=BATCH_SIZE, show_default=True, help='Monsters per transaction.')
+@with_appcontext
+def load_srd_command(path, batch_size):
+    """Import or refresh official monsters from an SRD JSON/JSONL file."""
+    def report(counts):
+        total = sum(counts.values())
+        click.echo(f"{total} monsters processed "
+                   f"({counts['inserted']} new, {counts['updated']} updated, "
+                   f"{counts['unchanged']} unchanged)")
+
+    counts = load_monsters(iter_monsters(path), batch_size, report)
+    click.echo(f"Done: {counts['inserted']} new, {counts['updated']} updated, "
+               f"{counts['unchanged']} unchanged")
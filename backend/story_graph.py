@@ -0,0 +1,331 @@
+"""Story-graph analysis for a lore map.
+
+Events are nodes and connections are edges (from -> to). ``event_completed``
+conditions make an event depend on another event being completed (or, with
+``required: false``, not being completed). The graph is built once per lore
+map version and cached per process, so repeat requests only pay for the
+version check. Every pass is O(V + E).
+
+Only ``event_completed`` conditions are evaluated. Character and custom
+condition state lives in the client, so those conditions never lock an
+event here.
+"""
+import threading
+from collections import OrderedDict, deque
+
+from extensions import db
+from models import Event, EventConnection
+
+CACHE_SIZE = 32
+
+
+def parse_conditions(conditions):
+    """Stored conditions as a list of dicts; legacy rows hold ``{}`` or a single object."""
+    if isinstance(conditions, list):
+        return [condition for condition in conditions if isinstance(condition, dict)]
+    if isinstance(conditions, dict) and conditions.get('type'):
+        return [conditions]
+    return []
+
+
+def remap_condition_targets(conditions, resolve):
+    """``conditions`` with each target replaced by ``resolve(target)``, or None if none changed.
+
+    Keeps the stored shape: a list, or a legacy single object.
+    """
+    changed = False
+
+    def remap(condition):
+        nonlocal changed
+        if not isinstance(condition, dict) or condition.get('target') is None:
+            return condition
+        target = resolve(condition['target'])
+        if target == condition['target']:
+            return condition
+        changed = True
+        return dict(condition, target=target)
+
+    if isinstance(conditions, list):
+        conditions = [remap(condition) for condition in conditions]
+    else:
+        conditions = remap(conditions)
+    return conditions if changed else None
+
+
+def _target_id(condition):
+    try:
+        return int(condition.get('target'))
+    except (TypeError, ValueError):
+        return None
+
+
+class StoryGraph:
+    """Adjacency lists over dense node indexes, plus the unlock bookkeeping.
+
+    ``unmet[i]`` counts the ``event_completed`` conditions of node ``i`` that
+    currently fail; a node is locked while it is non-zero. ``dependents[j]``
+    is the reverse map: nodes whose conditions mention node ``j``.
+    """
+
+    def __init__(self, version, events, connections):
+        self.version = version
+        self.lock = threading.Lock()
+        self.ids = []
+        self.index = {}
+        self.completed = []
+        self.party = []
+        conditions = []
+        for event_id, is_completed, is_party_location, event_conditions in events:
+            self.index[event_id] = len(self.ids)
+            self.ids.append(event_id)
+            self.completed.append(bool(is_completed))
+            self.party.append(bool(is_party_location))
+            conditions.append(event_conditions)
+
+        size = len(self.ids)
+        self.successors = [[] for _ in range(size)]
+        self.in_degree = [0] * size
+        for from_id, to_id in connections:
+            source, target = self.index.get(from_id), self.index.get(to_id)
+            if source is not None and target is not None:
+                self.successors[source].append(target)
+                self.in_degree[target] += 1
+
+        self.requirements = [[] for _ in range(size)]
+        self.dependents = [[] for _ in range(size)]
+        self.unknown_targets = {}
+        for node, event_conditions in enumerate(conditions):
+            for condition in parse_conditions(event_conditions):
+                if condition.get('type') != 'event_completed':
+                    continue
+                target = self.index.get(_target_id(condition))
+                if target is None:
+                    self.unknown_targets.setdefault(self.ids[node], []).append(condition.get('target'))
+                    continue
+                required = condition.get('required', True) not in (False, 'false')
+                self.requirements[node].append((target, required))
+                # Conditions are read node by node, so repeats are adjacent
+                if not self.dependents[target] or self.dependents[target][-1] != node:
+                    self.dependents[target].append(node)
+
+        self.unmet = [
+            sum(1 for target, required in requirements if self.completed[target] != required)
+            for requirements in self.requirements
+        ]
+
+    def is_locked(self, node):
+        return self.unmet[node] > 0
+
+    def blocked_by(self, node):
+        """Ids of the events whose completion state keeps ``node`` locked."""
+        return [self.ids[target] for target, required in self.requirements[node]
+                if self.completed[target] != required]
+
+    def set_completed(self, node, completed):
+        """Flip ``node``'s completion, re-checking only the events that depend on it.
+
+        Returns the delta as event ids: ``available`` (just unlocked),
+        ``locked`` (just locked) and ``next`` (unlocked events directly after
+        ``node``, once it is completed).
+        """
+        available, locked = [], []
+        if self.completed[node] != completed:
+            self.completed[node] = completed
+            for dependent in self.dependents[node]:
+                was_locked = self.unmet[dependent] > 0
+                for target, required in self.requirements[dependent]:
+                    if target == node:
+                        self.unmet[dependent] += 1 if completed != required else -1
+                if was_locked and self.unmet[dependent] == 0:
+                    available.append(self.ids[dependent])
+                elif not was_locked and self.unmet[dependent] > 0:
+                    locked.append(self.ids[dependent])
+        following = [self.ids[successor] for successor in self.successors[node]
+                     if not self.completed[successor] and not self.is_locked(successor)]
+        return {"available": available, "locked": locked, "next": following if completed else []}
+
+    def start_nodes(self):
+        """The party's location(s), or every event without incoming connections."""
+        party = [node for node, here in enumerate(self.party) if here]
+        if party:
+            return party
+        return [node for node, degree in enumerate(self.in_degree) if degree == 0]
+
+    def reachable(self, start):
+        """Nodes reachable from ``start`` without passing through locked events."""
+        seen = [False] * len(self.ids)
+        queue = deque(start)
+        for node in start:
+            seen[node] = True
+        order = []
+        while queue:
+            node = queue.popleft()
+            order.append(node)
+            for successor in self.successors[node]:
+                if not seen[successor] and not self.is_locked(successor):
+                    seen[successor] = True
+                    queue.append(successor)
+        return order
+
+    def cycles(self):
+        """Strongly connected components that contain a cycle (iterative Tarjan)."""
+        size = len(self.ids)
+        index = [-1] * size
+        low = [0] * size
+        on_stack = [False] * size
+        stack = []
+        components = []
+        counter = 0
+
+        for root in range(size):
+            if index[root] != -1:
+                continue
+            work = [(root, 0)]
+            while work:
+                node, child = work[-1]
+                if child == 0:
+                    index[node] = low[node] = counter
+                    counter += 1
+                    stack.append(node)
+                    on_stack[node] = True
+                successors = self.successors[node]
+                if child < len(successors):
+                    work[-1] = (node, child + 1)
+                    successor = successors[child]
+                    if index[successor] == -1:
+                        work.append((successor, 0))
+                    elif on_stack[successor]:
+                        low[node] = min(low[node], index[successor])
+                    continue
+                work.pop()
+                if work:
+                    parent = work[-1][0]
+                    low[parent] = min(low[parent], low[node])
+                if low[node] == index[node]:
+                    component = []
+                    while True:
+                        member = stack.pop()
+                        on_stack[member] = False
+                        component.append(member)
+                        if member == node:
+                            break
+                    if len(component) > 1 or node in self.successors[node]:
+                        components.append(component)
+        return components
+
+    def topological_order(self):
+        """Nodes ordered so connections and required completions point forward.
+
+        Cycles can't be ordered; when only cyclic nodes remain, the earliest
+        one is taken as if its incoming edges were absent, so every node is
+        still placed exactly once.
+        """
+        size = len(self.ids)
+        edges = [list(successors) for successors in self.successors]
+        degree = list(self.in_degree)
+        for node, requirements in enumerate(self.requirements):
+            for target, required in requirements:
+                if required and target != node:
+                    edges[target].append(node)
+                    degree[node] += 1
+
+        placed = [False] * size
+        queue = deque(node for node in range(size) if degree[node] == 0)
+        order = []
+        next_forced = 0
+        while len(order) < size:
+            if not queue:
+                while placed[next_forced] or degree[next_forced] == 0:
+                    next_forced += 1
+                queue.append(next_forced)
+                degree[next_forced] = 0
+            node = queue.popleft()
+            if placed[node]:
+                continue
+            placed[node] = True
+            order.append(node)
+            for successor in edges[node]:
+                degree[successor] -= 1
+                if degree[successor] == 0 and not placed[successor]:
+                    queue.append(successor)
+        return order
+
+    def analyze(self):
+        with self.lock:
+            return self._analyze()
+
+    def _analyze(self):
+        start = self.start_nodes()
+        ids = self.ids
+        return {
+            "version": self.version,
+            "start": [ids[node] for node in start],
+            "reachable": [ids[node] for node in self.reachable(start)],
+            "locked": [{"id": ids[node], "blocked_by": self.blocked_by(node)}
+                       for node in range(len(ids)) if self.is_locked(node)],
+            "cycles": [[ids[node] for node in component] for component in self.cycles()],
+            "order": [ids[node] for node in self.topological_order()],
+            "unknown_targets": self.unknown_targets
+        }
+
+
+def build_graph(lore_map_id, version):
+    events = db.session.query(
+        Event.id, Event.is_completed, Event.is_party_location, Event.conditions
+    ).filter(Event.lore_map_id == lore_map_id).order_by(Event.id).all()
+    connections = db.session.query(
+        EventConnection.from_event_id, EventConnection.to_event_id
+    ).join(
+        Event, EventConnection.from_event_id == Event.id
+    ).filter(Event.lore_map_id == lore_map_id).order_by(EventConnection.id).all()
+    return StoryGraph(version, events, connections)
+
+
+_cache = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def get_graph(lore_map):
+    """The lore map's story graph, rebuilt only when its version has moved on."""
+    version = lore_map.version or 0
+    with _cache_lock:
+        graph = _cache.get(lore_map.id)
+        if graph is not None and graph.version == version:
+            _cache.move_to_end(lore_map.id)
+            return graph
+
+    graph = build_graph(lore_map.id, version)
+    with _cache_lock:
+        _cache[lore_map.id] = graph
+        _cache.move_to_end(lore_map.id)
+        while len(_cache) > CACHE_SIZE:
+            _cache.popitem(last=False)
+    return graph
+
+
+def record_completion(lore_map, event_id, completed, previous_version):
+    """Apply a committed completion toggle to the cached graph; return the unlock delta.
+
+    ``lore_map.version`` must already be the version the toggle committed.
+    When the toggle was the only change since ``previous_version`` and the
+    cached graph is at that version, it is updated in place in time
+    proportional to the event's dependents. Otherwise (including when a
+    concurrent commit also bumped the version) the graph is rebuilt and the
+    toggle replayed on it to get the same delta.
+    """
+    with _cache_lock:
+        graph = _cache.get(lore_map.id)
+    if graph is not None:
+        with graph.lock:
+            node = graph.index.get(event_id)
+            if (node is not None and graph.version == previous_version
+                    and lore_map.version == previous_version + 1):
+                delta = graph.set_completed(node, completed)
+                graph.version = lore_map.version
+                return delta
+
+    graph = get_graph(lore_map)
+    with graph.lock:
+        node = graph.index[event_id]
+        graph.set_completed(node, not completed)
+        return graph.set_completed(node, completed)
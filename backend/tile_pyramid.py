@@ -0,0 +1,84 @@
+"""Deep-zoom tile pyramids for large battle maps.
+
+Level ``z = levels - 1`` is the upload at full resolution and each level
+below halves it, down to level 0 where the whole map fits in one tile.
+Every level is cut into ``TILE_SIZE`` px WebP tiles; edge tiles are smaller.
+The pyramid lives next to the resized variants, at
+``variants/<name>/tiles/<z>/<x>_<y>.webp``, with an ``info.json``
+describing it. It is built in a scratch directory and renamed into place,
+so clients see either no pyramid or a complete one.
+
+Builds run as ``tiles`` jobs (see ``jobs``), never on the request path.
+"""
+import json
+import math
+import os
+import shutil
+import threading
+
+from PIL import Image, ImageOps
+
+import image_variants
+
+TILE_SIZE = 256
+TILE_FORMAT = 'webp'
+
+
+def tiles_dir(upload_folder, filename):
+    return os.path.join(image_variants.variants_dir(upload_folder, filename), 'tiles')
+
+
+def tile_path(z, x, y):
+    """Path of one tile relative to the upload's tiles directory."""
+    return f'{z}/{x}_{y}.{TILE_FORMAT}'
+
+
+def level_count(width, height):
+    return max(0, math.ceil(math.log2(max(width, height) / TILE_SIZE))) + 1
+
+
+def build_tiles(upload_folder, filename):
+    """Cut the full pyramid for one upload, replacing any previous one."""
+    target = tiles_dir(upload_folder, filename)
+    scratch = f'{target}.{os.getpid()}.{threading.get_ident()}.tmp'
+    shutil.rmtree(scratch, ignore_errors=True)
+
+    with Image.open(os.path.join(upload_folder, filename)) as original:
+        image = ImageOps.exif_transpose(original)
+        if image.mode not in ('RGB', 'RGBA'):
+            image = image.convert('RGBA' if 'transparency' in image.info or 'A' in image.mode else 'RGB')
+        width, height = image.size
+        levels = level_count(width, height)
+
+        # Full resolution first; each smaller level is reduced from the one above
+        for z in range(levels - 1, -1, -1):
+            columns = math.ceil(image.width / TILE_SIZE)
+            rows = math.ceil(image.height / TILE_SIZE)
+            os.makedirs(os.path.join(scratch, str(z)))
+            for x in range(columns):
+                for y in range(rows):
+                    box = (x * TILE_SIZE, y * TILE_SIZE,
+                           min((x + 1) * TILE_SIZE, image.width), min((y + 1) * TILE_SIZE, image.height))
+                    image.crop(box).save(os.path.join(scratch, tile_path(z, x, y)), 'WEBP',
+                                         quality=image_variants.WEBP_QUALITY, method=4)
+            if z:
+                image = image.resize((math.ceil(image.width / 2), math.ceil(image.height / 2)),
+                                     Image.LANCZOS, reducing_gap=2.0)
+
+    with open(os.path.join(scratch, 'info.json'), 'w') as info:
+        json.dump({
+            "width": width,
+            "height": height,
+            "tile_size": TILE_SIZE,
+            "levels": levels,
+            "format": TILE_FORMAT
+        }, info)
+
+    # Swap in the finished pyramid; an older one is moved aside first
+    old = None
+    if os.path.isdir(target):
+        old = f'{scratch}.old'
+        os.replace(target, old)
+    os.replace(scratch, target)
+    if old:
+        shutil.rmtree(old, ignore_errors=True)
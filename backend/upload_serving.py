@@ -0,0 +1,116 @@
+"""Sending upload files without holding a worker for the whole transfer.
+
+``UPLOAD_OFFLOAD`` picks the strategy:
+
+* ``''`` (default): the worker answers conditional and ``Range`` requests
+  itself and hands the open file to the server's ``wsgi.file_wrapper``.
+  Under gunicorn that is ``os.sendfile``, so the bytes are copied by the
+  kernel, ranges included: the file is positioned at the range start and
+  gunicorn sends ``Content-Length`` bytes from there.
+* ``'x-sendfile'``: Apache (mod_xsendfile) or lighttpd read the absolute
+  path from an ``X-Sendfile`` header.
+* ``'x-accel-redirect'``: nginx serves ``UPLOAD_ACCEL_PREFIX`` + the path
+  relative to ``UPLOAD_FOLDER`` from an ``internal`` location aliased to
+  it, for example::
+
+      location /_uploads/ { internal; alias /srv/lorekeep/uploads/; }
+
+With a proxy the worker only stats the file; ``304`` answers are still
+given here, while ranges are left to the proxy.
+"""
+import mimetypes
+import os
+from urllib.parse import quote
+
+from flask import current_app, request
+from werkzeug.exceptions import NotFound, RequestedRangeNotSatisfiable
+from werkzeug.security import safe_join
+from werkzeug.wsgi import wrap_file
+
+import image_variants
+import jobs
+from utils import make_etag
+
+CHUNK_SIZE = 64 * 1024
+OFFLOAD_MODES = ('', 'x-sendfile', 'x-accel-redirect')
+# SVG can carry script; never let it run in our origin
+SVG_POLICY = "default-src 'none'; style-src 'unsafe-inline'; sandbox"
+
+
+def _precompressed(upload_folder, filename):
+    """(path, encoding) of the best precompressed copy the client accepts, or None."""
+    for encoding in image_variants.COMPRESSED:
+        if encoding in request.accept_encodings:
+            path = image_variants.compressed_path(upload_folder, filename, encoding)
+            if os.path.isfile(path):
+                return path, encoding
+    return None
+
+
+def send_upload(upload_folder, relative_path, max_age, immutable=False):
+    """Send ``relative_path`` under ``upload_folder`` with caching, ranges and offload."""
+    path = safe_join(upload_folder, relative_path)
+    if path is None or not os.path.isfile(path):
+        raise NotFound()
+
+    filename = os.path.basename(relative_path)
+    mimetype = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+    encoding = None
+    if image_variants.is_vector(filename) and relative_path == filename:
+        found = _precompressed(upload_folder, filename)
+        if found:
+            path, encoding = found
+        elif not os.path.isdir(image_variants.variants_dir(upload_folder, filename)):
+            jobs.queue_missing('image_variants', upload_folder, filename)
+
+    stat = os.stat(path)
+    offload = current_app.config['UPLOAD_OFFLOAD']
+    if offload not in OFFLOAD_MODES:
+        raise ValueError(f"UPLOAD_OFFLOAD must be one of {', '.join(map(repr, OFFLOAD_MODES))}")
+
+    if offload:
+        response = current_app.response_class(mimetype=mimetype)
+        if offload == 'x-sendfile':
+            response.headers['X-Sendfile'] = os.path.abspath(path)
+        else:
+            relative = os.path.relpath(path, upload_folder).replace(os.sep, '/')
+            response.headers['X-Accel-Redirect'] = current_app.config['UPLOAD_ACCEL_PREFIX'] + quote(relative)
+        response.headers['Content-Length'] = stat.st_size
+    else:
+        file = open(path, 'rb')
+        response = current_app.response_class(
+            wrap_file(request.environ, file, CHUNK_SIZE), mimetype=mimetype, direct_passthrough=True
+        )
+        response.headers['Content-Length'] = stat.st_size
+
+    if encoding:
+        response.content_encoding = encoding
+    if mimetype == 'image/svg+xml':
+        response.vary.add('Accept-Encoding')
+        response.headers['Content-Security-Policy'] = SVG_POLICY
+        response.headers['X-Content-Type-Options'] = 'nosniff'
+    response.last_modified = int(stat.st_mtime)
+    response.set_etag(make_etag(relative_path, encoding, stat.st_mtime_ns, stat.st_size))
+    response.cache_control.max_age = max_age
+    response.cache_control.public = True
+    if immutable:
+        response.cache_control.immutable = True
+    response.headers['Accept-Ranges'] = 'bytes'
+
+    if offload:
+        return response.make_conditional(request.environ)
+
+    try:
+        response.make_conditional(request.environ, accept_ranges=True, complete_length=stat.st_size)
+    except RequestedRangeNotSatisfiable:
+        file.close()
+        raise
+    if response.status_code in (304, 412) or request.method == 'HEAD':
+        # No body is sent, so nothing would close the file
+        file.close()
+    elif response.status_code == 206 and 'wsgi.file_wrapper' in request.environ:
+        # Werkzeug's range wrapper reads through Python; position the file
+        # instead so the server's sendfile covers just the range
+        file.seek(response.content_range.start)
+        response.response = request.environ['wsgi.file_wrapper'](file, CHUNK_SIZE)
+    return response
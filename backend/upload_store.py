@@ -0,0 +1,229 @@
+"""Content-addressed, reference-counted upload storage.
+
+An upload is streamed to a temporary file in ``UPLOAD_FOLDER`` while its
+SHA-256 is computed chunk by chunk, then renamed to ``<sha256>.<ext>``.
+Identical files therefore land on the same name and are written once. The
+``upload`` table counts the events whose ``image_url`` points at each file;
+the session's ``after_flush`` hook keeps the counts in step with ORM
+changes to ``Event.image_url``, and routes that write events through bulk
+operations call ``adjust`` themselves.
+
+Nothing is deleted on the request path. ``flask --app app gc-uploads``
+removes files whose count has been zero for a grace period. The row is
+deleted (and so locked) before the file is unlinked, while ``store`` claims
+the row before it renames its file into place, so a concurrent upload of
+the same content either keeps the row alive or re-creates the file.
+
+Files uploaded before this store existed keep their ``<timestamp>_<name>``
+names and are not counted.
+"""
+import hashlib
+import os
+import re
+import tempfile
+import time
+from collections import Counter
+from datetime import datetime, timedelta
+
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+from sqlalchemy import bindparam, event as sa_event, inspect as sa_inspect, text
+from sqlalchemy.dialects import postgresql, sqlite
+
+import image_variants
+from extensions import db
+from models import Event, Upload
+
+CHUNK_SIZE = 64 * 1024
+URL_PREFIX = '/api/uploads/'
+TEMP_PREFIX = '.upload-'
+
+_HASHED_NAME = re.compile(r'^([0-9a-f]{64})\.[a-z0-9]+$')
+
+
+def url_for_file(filename):
+    return f'{URL_PREFIX}{filename}'
+
+
+def filename_from_url(url):
+    if url and url.startswith(URL_PREFIX):
+        return url[len(URL_PREFIX):]
+    return None
+
+
+def content_hash(filename):
+    """The SHA-256 a stored filename is named after, or None for legacy names."""
+    match = _HASHED_NAME.match(filename or '')
+    return match.group(1) if match else None
+
+
+def _claim(sha256, extension, size):
+    """Make sure a row exists for ``sha256`` and restart its grace period.
+
+    Returns the extension the content is stored under, which is the one it
+    was first uploaded with.
+    """
+    table = Upload.__table__
+    now = datetime.utcnow()
+    touch = table.update().where(table.c.sha256 == sha256).values(updated_at=now)
+    if db.session.execute(touch).rowcount == 0:
+        dialect = postgresql if db.session.get_bind().dialect.name == 'postgresql' else sqlite
+        db.session.execute(dialect.insert(table).values(
+            sha256=sha256, extension=extension, size=size, ref_count=0,
+            created_at=now, updated_at=now
+        ).on_conflict_do_nothing(index_elements=['sha256']))
+        # Lost a race with a concurrent insert: touch the row it created
+        db.session.execute(touch)
+    return db.session.execute(
+        text('SELECT extension FROM upload WHERE sha256 = :sha256'), {'sha256': sha256}
+    ).scalar()
+
+
+def store(source, extension, upload_folder, max_size=None):
+    """Stream ``source`` into the store and return its filename; the caller commits.
+
+    The returned file holds no reference by itself: point an event's
+    ``image_url`` at it in the same transaction. Raises ValueError once more
+    than ``max_size`` bytes have been read.
+    """
+    digest = hashlib.sha256()
+    size = 0
+    fd, tmp_path = tempfile.mkstemp(dir=upload_folder, prefix=TEMP_PREFIX, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as target:
+            for chunk in iter(lambda: source.read(CHUNK_SIZE), b''):
+                digest.update(chunk)
+                target.write(chunk)
+                size += len(chunk)
+                if max_size is not None and size > max_size:
+                    raise ValueError("File is larger than the upload limit")
+
+        sha256 = digest.hexdigest()
+        filename = f'{sha256}.{_claim(sha256, extension.lower(), size)}'
+        path = os.path.join(upload_folder, filename)
+        if os.path.exists(path):
+            os.remove(tmp_path)
+            # Keep an orphaned copy from being swept before this transaction commits
+            os.utime(path)
+        else:
+            os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return filename
+
+
+def adjust(conn, added=(), removed=()):
+    """Apply reference changes for image URLs gained and lost by events."""
+    deltas = Counter()
+    for url in added:
+        sha256 = content_hash(filename_from_url(url))
+        if sha256:
+            deltas[sha256] += 1
+    for url in removed:
+        sha256 = content_hash(filename_from_url(url))
+        if sha256:
+            deltas[sha256] -= 1
+
+    now = datetime.utcnow()
+    params = [{'sha256': sha256, 'delta': delta, 'now': now}
+              for sha256, delta in sorted(deltas.items()) if delta]
+    if params:
+        conn.execute(text(
+            'UPDATE upload SET ref_count = ref_count + :delta, updated_at = :now '
+            'WHERE sha256 = :sha256'
+        ), params)
+
+
+def image_urls(conn, event_ids):
+    """Current ``image_url`` values of the given events, for callers about to bulk-change them."""
+    if not event_ids:
+        return []
+    return conn.execute(
+        text('SELECT image_url FROM event WHERE id IN :ids AND image_url IS NOT NULL').bindparams(
+            bindparam('ids', expanding=True)
+        ),
+        {'ids': list(event_ids)}
+    ).scalars().all()
+
+
+@sa_event.listens_for(db.session, 'after_flush')
+def _sync_reference_counts(session, flush_context):
+    added, removed = [], []
+    for obj in session.new:
+        if isinstance(obj, Event) and obj.image_url:
+            added.append(obj.image_url)
+    for obj in session.dirty:
+        if isinstance(obj, Event):
+            history = sa_inspect(obj).attrs.image_url.history
+            if history.has_changes():
+                added.extend(url for url in history.added if url)
+                removed.extend(url for url in history.deleted if url)
+    for obj in session.deleted:
+        if isinstance(obj, Event) and obj.image_url:
+            removed.append(obj.image_url)
+    if added or removed:
+        adjust(session.connection(), added, removed)
+
+
+def _unlink(path):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+def collect_garbage(upload_folder, grace_seconds):
+    """Delete unreferenced stored files; returns how many were removed.
+
+    Each row is deleted with the same conditions it was selected by, so a
+    row claimed or referenced in the meantime survives. The file goes only
+    after the delete has locked the row and before that is committed.
+    """
+    cutoff = datetime.utcnow() - timedelta(seconds=grace_seconds)
+    candidates = db.session.query(Upload.id, Upload.sha256, Upload.extension).filter(
+        Upload.ref_count <= 0, Upload.updated_at < cutoff
+    ).all()
+    db.session.commit()
+
+    removed = 0
+    for upload_id, sha256, extension in candidates:
+        deleted = db.session.execute(text(
+            'DELETE FROM upload WHERE id = :id AND ref_count <= 0 AND updated_at < :cutoff'
+        ), {'id': upload_id, 'cutoff': cutoff}).rowcount
+        if deleted:
+            filename = f'{sha256}.{extension}'
+            _unlink(os.path.join(upload_folder, filename))
+            image_variants.remove_variants(upload_folder, filename)
+            removed += 1
+        db.session.commit()
+
+    # Temp files of crashed uploads, and stored files whose row never committed
+    known = {sha256 for (sha256,) in db.session.query(Upload.sha256)}
+    db.session.commit()
+    oldest = time.time() - grace_seconds
+    with os.scandir(upload_folder) as entries:
+        for entry in entries:
+            if not entry.is_file() or entry.stat().st_mtime >= oldest:
+                continue
+            sha256 = content_hash(entry.name)
+            if (sha256 and sha256 not in known) or \
+                    (entry.name.startswith(TEMP_PREFIX) and entry.name.endswith('.tmp')):
+                _unlink(entry.path)
+                if sha256:
+                    image_variants.remove_variants(upload_folder, entry.name)
+    return removed
+
+
+@click.command('gc-uploads')
+@click.option('--grace', type=int, default=None,
+              help='Seconds a file must have been unreferenced (default UPLOAD_GC_GRACE).')
+@with_appcontext
+def gc_uploads_command(grace):
+    """Delete stored uploads no event references any more."""
+    if grace is None:
+        grace = current_app.config['UPLOAD_GC_GRACE']
+    removed = collect_garbage(current_app.config['UPLOAD_FOLDER'], grace)
+    click.echo(f"Removed {removed} unreferenced upload(s)")
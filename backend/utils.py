@@ -1,21 +1,30 @@
-import json
+import hashlib
+from flask import current_app, jsonify, request
 from config import ALLOWED_EXTENSIONS
 
 
-def safe_parse_json(json_str):
-    """Safely parse a JSON string, returning None for invalid input."""
-    if not json_str:
-        return None
-    if isinstance(json_str, (list, dict)):
-        return json_str
-    if json_str in ['[object Object]', 'undefined', 'null', '']:
-        return None
-    try:
-        return json.loads(json_str)
-    except (json.JSONDecodeError, TypeError):
-        return None
-
-
 def allowed_file(filename):
     return '.' in filename and \
            filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
+
+
+def make_etag(*parts):
+    """Build a strong ETag from cheap version data (ids, counts, timestamps)."""
+    return hashlib.sha1('|'.join(str(part) for part in parts).encode('utf-8')).hexdigest()
+
+
+def conditional_jsonify(etag, build):
+    """Return 304 if the client already holds ``etag``, otherwise jsonify ``build()``.
+
+    ``build`` is only called on a miss, so unchanged polls skip serialization.
+    It may also return a ready response, e.g. one spliced from cached bytes.
+    """
+    if request.if_none_match.contains(etag):
+        response = current_app.response_class(status=304)
+    else:
+        response = build()
+        if not isinstance(response, current_app.response_class):
+            response = jsonify(response)
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'private, no-cache'
+    return response